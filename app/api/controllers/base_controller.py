@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Form, Request
 from app.utils.cache.user_session import UserSession, UserStates
 from app.services.ascii_service import ASCIIService
 from app.services.google_upload_file_service import GoogleDriveService
+from app.services.hybrid_retriever import HybridRecipeRetriever
 from app.dependencies import (
     BotMenuServiceDep,
     UserStatesDep,
@@ -12,6 +13,11 @@ from app.dependencies import (
     AskRagForRecipeDep,
     GoogleDriveServiceDep,
     RecipeFinderDep,
+    RecipeCatalogDep,
+    RecipeMessageRendererDep,
+    RagPrefetcherDep,
+    MenuQueryWarmupDep,
+    IngredientRecipeIndexDep,
 )
 from app.api.dtos.recipe_user_preferences_dto import RecipeUserPreferencesDTO
 from app.api.dtos.user_dtos import UserDTO
@@ -24,9 +30,10 @@ from app.api.services.user_service import UserService
 from app.api.services.food_service import FoodService
 from app.api.services.shopping_list_service import ShoppingListService
 from app.api.services.recipe_ratings_service import RecipeRatingsService
-from app.api.services.fuzzy_ingredients_recipes_service import FuzzyIngredientsRecipesService
 from app.api.services.recipes_view_data_service import RecipesViewDataService
 from app.config.logger_settings import get_logger
+from app.config.project_config import project_settings
+from app.config.menu_options import MEAL_TYPE_OPTIONS, DIETARY_PREFERENCE_OPTIONS
 
 
 logger = get_logger("base_controller")
@@ -58,6 +65,11 @@ async def reply(
     user_cache: UserCacheDep,
     rag_service: AskRagForRecipeDep,
     google_drive_service: GoogleDriveServiceDep,
+    recipe_catalog: RecipeCatalogDep,
+    message_renderer: RecipeMessageRendererDep,
+    rag_prefetcher: RagPrefetcherDep,
+    menu_warmup: MenuQueryWarmupDep,
+    ingredient_recipe_index: IngredientRecipeIndexDep,
     Body: str = Form()
 ):
     form_data = await request.form()
@@ -166,7 +178,7 @@ async def reply(
                     for data in RECIPES_ID:
                         recipe_id_list.extend(data)
 
-                    recipes_data = await RecipesViewDataService().get_recipes_view_data_by_list_id(uow, recipe_id_list)
+                    recipes_data = await RecipesViewDataService().get_recipes_view_data_by_list_id(uow, recipe_id_list, recipe_catalog)
                     await user_session.set_weekly_plan_recipes_dto(recipes_data)
                     # chunks = list(zip(*[iter(recipes_data)] * 4))
                     result_lines = []
@@ -294,26 +306,7 @@ async def reply(
                     index_recipe = int(user_message) - 1
                     weekly_recipes = await user_session.get_weekly_plan_recipes_dto()
                     recipe: RecipesViewDataDTO = weekly_recipes[index_recipe]
-
-                    name = recipe.name if recipe.name is not None else ""
-                    sub_title = recipe.sub_title if recipe.sub_title is not None else ""
-                    meal_type = recipe.meal_type if recipe.meal_type is not None else ""
-                    minutes = recipe.minutes if recipe.minutes is not None else ""
-                    preparation_method = recipe.preparation_method if recipe.preparation_method is not None else ""
-                    ingredients = recipe.ingredients if recipe.ingredients is not None else ""
-                    nut_recommend = recipe.nut_recommend if recipe.nut_recommend is not None else ""
-                    comment = recipe.comment if recipe.comment is not None else ""
-
-                    recipe_details = (
-                        f"*Name:* {name}\n"
-                        f"*Sub title:* {sub_title}\n"
-                        f"*Meal type:* {meal_type}\n"
-                        f"*Minutes:* {minutes}\n"
-                        f"*Preparation Method:*\n{preparation_method}\n"
-                        f"*Ingredients:*\n{ingredients}\n"
-                        f"*Nut recommend:*\n{nut_recommend}\n"
-                        f"*Comment:*\n{comment}\n\n"
-                    )
+                    recipe_details = message_renderer.render(recipe.model_dump(), with_header=False)
                     await bot_menu_service.send_message(whatsapp_number, recipe_details)
                     await user_session.set_state(UserStates.PREPARING_WEEKLY_MENU)
                     await bot_menu_service.send_next_choice_menu(whatsapp_number)
@@ -490,21 +483,21 @@ async def reply(
                 case "1" | "2" | "3" | "4" | "5" | "6" | "7" | "8":
                     # await user_states.set(whatsapp_number, UserStates.DIETARY_PREFERENCE_FILTER)
                     await user_session.set_state(UserStates.DIETARY_PREFERENCE_FILTER)
-                    meal_type = {
-                        "1": "Breakfast", #"ארוחת בוקר", #"Breakfast",
-                        "2": "Lunch", #"ארוחת צהריים", #"Lunch",
-                        "3": "Dinner", #"ארוחת ערב", #"Dinner",
-                        "4": "Snack", #"נשנוש", #"Snack",
-                        "5": "Side Dish", #"תוספת", #"Side Dish",
-                        "6": "Salads", #"סלטים", #"Salads",
-                        "7": "Desserts", #"קינוחים", #"Desserts",
-                        "8": "Soups" #"מרקים", #"Soups"
-                    }[user_message]
+                    meal_type = MEAL_TYPE_OPTIONS[user_message]
                     # user_cache[whatsapp_number]["user_recipe_preference"].meal_type = meal_type
                     await user_session.update_user_recipe_preference(meal_type=meal_type)
+                    # Fetch RAG inputs in background while user answers the next menus
+                    rag_prefetcher.prefetch_rag_inputs(
+                        whatsapp_number,
+                        uow,
+                        user.id,
+                        user.ascii_result_link,
+                        restrictions_loaded=await user_session.get_all_restriction_products() is not None,
+                    )
                     await bot_menu_service.ask_user_dietary_preference_menu(whatsapp_number)
                 case "0":
                     # await user_states.set(whatsapp_number, UserStates.MAIN_MENU)
+                    rag_prefetcher.cancel(whatsapp_number)
                     await user_session.set_state(UserStates.MAIN_MENU)
                     await bot_menu_service.send_main_menu(whatsapp_number)
                 case _:
@@ -516,18 +509,14 @@ async def reply(
             # After client choose meal type
             match user_message:
                 case "1" | "2" | "3" | "4" | "5":
-                    dietary_preference = {
-                        "1": "Vegetarian", #"צִמחוֹנִי", #
-                        "2": "Vegan", #"טִבעוֹנִי", #"Vegan",
-                        "3": "High Protein", #"חלבון גבוה", #"High Protein",
-                        "4": "Low Carb", #"דל פחמימות", #"Low Carb",
-                        "5": "No preference"
-                    }[user_message]
+                    dietary_preference = DIETARY_PREFERENCE_OPTIONS[user_message]
                     
                     # user_cache[whatsapp_number]["user_recipe_preference"].dietary_preference = dietary_preference
                     await user_session.update_user_recipe_preference(dietary_preference=dietary_preference)
                     dietary_preference = await user_session.get_user_recipe_preference()
                     logger.debug(f"UPDATE Dietary preference: {dietary_preference}")
+                    # Warm query embedding for the flow's preferences while user types ingredients
+                    rag_prefetcher.prefetch_query_embedding(whatsapp_number, rag_service, dietary_preference.model_copy())
                     # await user_states.set(whatsapp_number, UserStates.INCLUDE_INGREDIENTS_FILTER)
                     await user_session.set_state(UserStates.INCLUDE_INGREDIENTS_FILTER)
                     await bot_menu_service.ask_user_include_ingredients_menu(whatsapp_number)
@@ -549,15 +538,12 @@ async def reply(
                     restrictions_products = await user_session.get_all_restriction_products()
                     if restrictions_products is None:
                         logger.debug("Restrictions not found [INCLUDE_INGREDIENTS_FILTER], processing ASCII result...")
-                        ascii_result_link = user.ascii_result_link
-                        if ascii_result_link:
-                            file_id = ascii_result_link.split("/d/")[1].split("/view")[0]
-                            logger.debug(f"File ID: {file_id}")
-                            high_sensitivity_foods_codes, low_sensitivity_foods_codes = await ASCIIService.process_csv(file_id)
+                        # Prefetched since meal type choice, fetched here when not ready yet
+                        restriction_foods = await rag_prefetcher.get_restriction_foods(whatsapp_number, uow, user.ascii_result_link)
+                        if restriction_foods is not None:
+                            restrictions_lab_codes, high_sensitivity_foods, low_sensitivity_foods = restriction_foods
                             # user_cache[whatsapp_number]["restrictions_lab_codes"] = high_sensitivity_foods_codes + low_sensitivity_foods_codes
-                            await user_session.set_restrictions_lab_codes(high_sensitivity_foods_codes + low_sensitivity_foods_codes)
-                            high_sensitivity_foods: list[FoodDTO] = await FoodService().get_foods_by_list_lab_codes(uow, high_sensitivity_foods_codes)
-                            low_sensitivity_foods: list[FoodDTO] = await FoodService().get_foods_by_list_lab_codes(uow, low_sensitivity_foods_codes)
+                            await user_session.set_restrictions_lab_codes(restrictions_lab_codes)
                             # user_cache[whatsapp_number]["high_sensitivity_foods"] = high_sensitivity_foods
                             # user_cache[whatsapp_number]["low_sensitivity_foods"] = low_sensitivity_foods
                             # user_cache[whatsapp_number]["all_restriction_products"] = high_sensitivity_foods + low_sensitivity_foods
@@ -566,17 +552,23 @@ async def reply(
                             await user_session.set_all_restriction_products(high_sensitivity_foods + low_sensitivity_foods)
                             # user_cache[whatsapp_number]["user_recipe_preference"].banned_foods = [food.name for food in user_cache[whatsapp_number]["all_restriction_products"]]
                             all_restr_products = await user_session.get_all_restriction_products()
-                            await user_session.update_user_recipe_preference(banned_foods=[food.name for food in all_restr_products])
+                            await user_session.update_user_recipe_preference(
+                                banned_foods=[food.name for food in all_restr_products],
+                                banned_food_ids=[food.id for food in all_restr_products],
+                            )
                         
                     else:
                         # user_cache[whatsapp_number]["user_recipe_preference"].banned_foods = [food.name for food in restrictions_products]
-                        await user_session.update_user_recipe_preference(banned_foods=[food.name for food in restrictions_products])
+                        await user_session.update_user_recipe_preference(
+                            banned_foods=[food.name for food in restrictions_products],
+                            banned_food_ids=[food.id for food in restrictions_products],
+                        )
                     
                     # await user_states.set(whatsapp_number, UserStates.USER_WAITING_ANSWER)
                     await user_session.set_state(UserStates.USER_WAITING_ANSWER)
                     
                     # Get disliked recipes
-                    disliked_recipes_list = await RecipeRatingsService.get_disliked_recipes_by_user_id(uow, user.id)
+                    disliked_recipes_list = await rag_prefetcher.get_disliked_recipes(whatsapp_number, uow, user.id)
                     disliked_recipes_id = [recipe.recipe_id for recipe in disliked_recipes_list]
                     disliked_recipes_comments = [recipe.comment for recipe in disliked_recipes_list if recipe.comment is not None]
                     logger.info(f"Disliked recipes list: {disliked_recipes_list} for user: {user.id}")
@@ -587,34 +579,36 @@ async def reply(
                     
                     # Asc RAG for get recipes
                     user_recipe_preference = await user_session.get_user_recipe_preference()
+
                     # personalized_recipe, recipe_id, recipe_name = await rag_service.ask_recipe(user_recipe_preference) #user_cache[whatsapp_number]["user_recipe_preference"])
-                    if user_recipe_preference.include_ingredients != "No preference":
-                        recipes_ingredients_list = await recipe_finder.find_recipes_by_ingredients(
-                            user_input=user_recipe_preference.include_ingredients,
-                            similarity_threshold=80
-                        )
-                        if recipes_ingredients_list:
-                            logger.info(f"Find recipes by ingredients count: {len(recipes_ingredients_list)}, {recipes_ingredients_list}")
-                            recipes_id = await FuzzyIngredientsRecipesService().get_recipes_by_ingredients(uow, recipes_ingredients_list)
-                            logger.info(f"Find recipes by ingredients count: {len(recipes_id)}, {recipes_id}")
-                            set_recipes_by_ingredients = list(set(recipes_id))
-                            logger.info(f"SET RECIPES count: {len(set_recipes_by_ingredients)}, {set_recipes_by_ingredients}")
-                            final_answer_recipe = await rag_service.ask_recipe(user_recipe_preference, set_recipes_by_ingredients)
-                            # # TODO for test
-                            # await user_session.set_state(UserStates.MAIN_MENU)
-                            # await bot_menu_service.send_main_menu(whatsapp_number)
-                            # return
-                        
-                        else:
-                            logger.warning("No recipes found by ingredients with FuzzyIngredientsRecipesService")
-                            await bot_menu_service.send_message(whatsapp_number, "We didn't find any recipes matching your *Include Ingredients* setting, please try specifying other products!")
-                            await asyncio.sleep(1.5)
-                            await user_session.set_state(UserStates.MAIN_MENU)
-                            await bot_menu_service.send_main_menu(whatsapp_number)
-                            return
-                    
-                    else:
-                        final_answer_recipe = await rag_service.ask_recipe(user_recipe_preference)
+                    retriever = HybridRecipeRetriever(
+                        rag_service,
+                        recipe_finder,
+                        uow,
+                        rrf_k=project_settings.hybrid_rrf_k,
+                        max_candidates=project_settings.hybrid_max_candidates,
+                        vector_match_count=project_settings.hybrid_vector_match_count,
+                        menu_warmup=menu_warmup,
+                        ingredient_index=ingredient_recipe_index,
+                    )
+                    # A query embedding still in flight keeps running and is joined by the retrieval request
+                    rag_prefetcher.cancel(whatsapp_number)
+                    retrieval = await retriever.retrieve(user_recipe_preference)
+                    if retrieval.ingredients_requested and not retrieval.ingredients_found:
+                        logger.warning("No recipes found by ingredients with FuzzyIngredientsRecipesService")
+                        await bot_menu_service.send_message(whatsapp_number, "We didn't find any recipes matching your *Include Ingredients* setting, please try specifying other products!")
+                        await asyncio.sleep(1.5)
+                        await user_session.set_state(UserStates.MAIN_MENU)
+                        await bot_menu_service.send_main_menu(whatsapp_number)
+                        return
+
+                    final_answer_recipe = await rag_service.ask_recipe(
+                        user_recipe_preference,
+                        retrieval.recipe_ids,
+                        ingredient_hits=retrieval.ingredient_hits,
+                        similarities=retrieval.similarities,
+                        usage_state=UserStates.INCLUDE_INGREDIENTS_FILTER.value,
+                    )
                     
                     if final_answer_recipe is None:
                         await bot_menu_service.send_message(whatsapp_number, "We didn't find any recipes matching your *Include Ingredients* setting, please try specifying other products!")
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.dependencies import LLMUsageTrackerDep, verify_metrics_token
+
+
+router = APIRouter(tags=["Metrics"], dependencies=[Depends(verify_metrics_token)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(usage_tracker: LLMUsageTrackerDep):
+    """
+    LLM usage counters in Prometheus text format
+    """
+    return PlainTextResponse(usage_tracker.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/llm-usage")
+async def llm_usage(usage_tracker: LLMUsageTrackerDep) -> dict:
+    """
+    LLM usage aggregates per model and conversation state as JSON
+    """
+    return usage_tracker.snapshot()
@@ -14,3 +14,5 @@ class AskRecipeAnswerDTO(Base):
     filtered_restrictions_recipes_id: Optional[list[int]] = None
     recipes_id_after_filter: Optional[list[int]] = None
     recipes_after_filter: Optional[list[dict]] = None # Recipes which will be analyzed by LLM
+    llm_usage: Optional[dict] = None # Model, tokens, estimated cost and latency of LLM call
+    stage_timings_ms: Optional[dict[str, float]] = None # Wall time of RAG stages: embedding, search, load, filter, rerank, prompt, llm
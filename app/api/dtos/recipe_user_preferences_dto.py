@@ -9,5 +9,6 @@ class RecipeUserPreferencesDTO(Base):
     include_ingredients: Optional[str] = "No preference"
     additional_notes: Optional[str] = ""
     banned_foods: Optional[list[str]] = None
+    banned_food_ids: Optional[list[int]] = None
     disliked_recipes_id: Optional[list[int]] = None
     disliked_recipes_comments: Optional[list[str]] = None
@@ -15,6 +15,12 @@ class FuzzyIngredientsRecipesRepository:
         result = await self.client.read(table=self.table, query={})
         return [FuzzyIngredientsRecipesDTO(**data) for data in result]
 
+    async def get_version(self) -> tuple[int, int | None]:
+        """
+        (rows count, max id), changes when rows are added or deleted
+        """
+        return await self.client.count_and_max_id(self.table)
+
     async def get_recipes_by_ingredients(self, ingredients: list[str]) -> list[FuzzyIngredientsRecipesDTO]:
         if not ingredients:
             return []
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
-from app.api.controllers import base_controller
+from app.api.controllers import base_controller, metrics_controller
 
 
 base_router = APIRouter()
 base_router.include_router(base_controller.router)
+base_router.include_router(metrics_controller.router)
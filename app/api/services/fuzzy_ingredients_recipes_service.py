@@ -9,22 +9,27 @@ logger = get_logger(__name__)
 
 class FuzzyIngredientsRecipesService:
     @staticmethod
-    async def get_list_ingridients_he_en(uow: IUnitOfWork) -> list[str] | None:
+    async def get_ingredients_version(uow: IUnitOfWork) -> tuple[int, int | None]:
         """
-        Get all ingredients on Hebrew and English
+        Get rows count and max id of ingredients table
         """
+        try:
+            async with uow:
+                return await uow.fuzzy_ingredients_recipes_repository.get_version()
+
+        except Exception as e:
+            raise FuzzyIngredientsRecipesServiceException(e)
 
+    @staticmethod
+    async def get_all_ingredients(uow: IUnitOfWork) -> list[FuzzyIngredientsRecipesDTO]:
+        """
+        Get all ingredients with their recipe ids
+        """
         try:
             async with uow:
                 ingredients: list[FuzzyIngredientsRecipesDTO] = await uow.fuzzy_ingredients_recipes_repository.get_all_fuzzy_ingredients_recipes()
-                result_he = [ing.ingredient_he for ing in ingredients]
-                result_en = [ing.ingredient_en for ing in ingredients]
-                logger.info(f"Result_he count: {len(result_he)}")
-                logger.info(f"Result_en count: {len(result_en)}")
-                result = []
-                result.extend(result_he)
-                result.extend(result_en)
-                return result
+                logger.info(f"Ingredients count: {len(ingredients)}")
+                return ingredients
 
         except Exception as e:
             raise FuzzyIngredientsRecipesServiceException(e)
@@ -31,9 +31,10 @@ class RecipesService:
                 logger.info(f"Recipe food map len: {len(recipe_food_map)}")
                 logger.debug(f"Recipe food map: {recipe_food_map}")
                 # 3. Filter recipes, excluding those containing forbidden foods
+                forbidden_foods = set(forbidden_foods)
                 allowed_recipes = [
                     recipe for recipe in recipes
-                    if not any(food_id in forbidden_foods for food_id in recipe_food_map.get(recipe.id, []))
+                    if forbidden_foods.isdisjoint(recipe_food_map.get(recipe.id, []))
                 ]
                 logger.info(f"Allowed recipes len: {len(allowed_recipes)}")
                 logger.debug(f"Allowed recipes: {[r.id for r in allowed_recipes]}")
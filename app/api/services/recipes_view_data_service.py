@@ -1,4 +1,5 @@
 from app.utils.unitofwork import IUnitOfWork
+from app.services.recipe_catalog import RecipeCatalog
 from app.api.dtos.recipes_view_data_dtos import RecipesViewDataDTO
 from app.api.services.service_exceptions import RecipesViewDataServiceException
 from app.config.logger_settings import get_logger
@@ -10,12 +11,17 @@ logger = get_logger(__name__)
 class RecipesViewDataService:
     @staticmethod
     async def get_recipes_view_data_by_list_id(
-        uow: IUnitOfWork, list_id: list[int]
+        uow: IUnitOfWork, list_id: list[int], recipe_catalog: RecipeCatalog | None = None
     ) -> list[RecipesViewDataDTO]:
         """
-        Get recipes by list_id
+        Get recipes by list_id, from recipe catalog (in list_id order) when it is given
         """
         try:
+            if recipe_catalog is not None:
+                recipes = [RecipesViewDataDTO(**data) for data in await recipe_catalog.get_recipes(list_id)]
+                logger.info(f"Got next recipes from catalog count: {len(recipes)}")
+                return recipes
+
             async with uow:
                 recipes: list[RecipesViewDataDTO] = await uow.recipes_view_data_repository.get_recipes_view_data_by_list_id(list_id)
                 logger.info(f"Got next recipes count: {len(recipes)}, {recipes}")
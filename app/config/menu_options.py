@@ -0,0 +1,20 @@
+# Options of fixed bot menus: user's answer -> value saved to recipe preferences
+
+MEAL_TYPE_OPTIONS = {
+    "1": "Breakfast", #"ארוחת בוקר", #"Breakfast",
+    "2": "Lunch", #"ארוחת צהריים", #"Lunch",
+    "3": "Dinner", #"ארוחת ערב", #"Dinner",
+    "4": "Snack", #"נשנוש", #"Snack",
+    "5": "Side Dish", #"תוספת", #"Side Dish",
+    "6": "Salads", #"סלטים", #"Salads",
+    "7": "Desserts", #"קינוחים", #"Desserts",
+    "8": "Soups" #"מרקים", #"Soups"
+}
+
+DIETARY_PREFERENCE_OPTIONS = {
+    "1": "Vegetarian", #"צִמחוֹנִי", #
+    "2": "Vegan", #"טִבעוֹנִי", #"Vegan",
+    "3": "High Protein", #"חלבון גבוה", #"High Protein",
+    "4": "Low Carb", #"דל פחמימות", #"Low Carb",
+    "5": "No preference"
+}
@@ -10,6 +10,42 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 class ProjectSettings(BaseSettings):
     log_dir: str = os.path.join(BASE_DIR, "logs")
     recipes_rag_csv_path: str = os.path.join(BASE_DIR, "recipes.csv")
+    embedding_cache_path: str = os.path.join(BASE_DIR, "cache", "embeddings.sqlite3")
+    embedding_cache_maxsize: int = config("EMBEDDING_CACHE_MAXSIZE", cast=int, default=1024)
+    embedding_cache_ttl: int = config("EMBEDDING_CACHE_TTL", cast=int, default=24 * 3600)
+    embedding_cache_disk_maxsize: int = config("EMBEDDING_CACHE_DISK_MAXSIZE", cast=int, default=100_000)
+    recommendation_cache_maxsize: int = config("RECOMMENDATION_CACHE_MAXSIZE", cast=int, default=512)
+    recommendation_cache_ttl: int = config("RECOMMENDATION_CACHE_TTL", cast=int, default=900)
+    prompt_token_budget: int = config("PROMPT_TOKEN_BUDGET", cast=int, default=3000)
+    prompt_max_field_chars: int = config("PROMPT_MAX_FIELD_CHARS", cast=int, default=600)
+    prompt_max_ingredients_chars: int = config("PROMPT_MAX_INGREDIENTS_CHARS", cast=int, default=500)
+    prompt_max_comments: int = config("PROMPT_MAX_COMMENTS", cast=int, default=5)
+    prompt_max_comment_chars: int = config("PROMPT_MAX_COMMENT_CHARS", cast=int, default=200)
+    local_rerank_enabled: bool = config("LOCAL_RERANK_ENABLED", cast=bool, default=False)
+    local_rerank_margin: float = config("LOCAL_RERANK_MARGIN", cast=float, default=0.2)
+    recipe_catalog_refresh_interval: float = config("RECIPE_CATALOG_REFRESH_INTERVAL", cast=float, default=300)
+    recipe_catalog_full_reload_every: int = config("RECIPE_CATALOG_FULL_RELOAD_EVERY", cast=int, default=12)
+    recipe_food_matrix_refresh_interval: float = config("RECIPE_FOOD_MATRIX_REFRESH_INTERVAL", cast=float, default=300)
+    recipe_food_matrix_full_reload_every: int = config("RECIPE_FOOD_MATRIX_FULL_RELOAD_EVERY", cast=int, default=12)
+    recipe_message_cache_maxsize: int = config("RECIPE_MESSAGE_CACHE_MAXSIZE", cast=int, default=4096)
+    hybrid_rrf_k: int = config("HYBRID_RRF_K", cast=int, default=60)
+    hybrid_max_candidates: int = config("HYBRID_MAX_CANDIDATES", cast=int, default=30)
+    hybrid_vector_match_count: int = config("HYBRID_VECTOR_MATCH_COUNT", cast=int, default=15)
+    menu_warmup_refresh_interval: float = config("MENU_WARMUP_REFRESH_INTERVAL", cast=float, default=60)
+    vector_index_dtype: str = config("VECTOR_INDEX_DTYPE", default="float32")
+    vector_index_rescore: bool = config("VECTOR_INDEX_RESCORE", cast=bool, default=False)
+    vector_index_rescore_path: str = os.path.join(BASE_DIR, "cache", "recipe_embeddings_float32.npy")
+    ann_index_path: str = config("ANN_INDEX_PATH", default=os.path.join(BASE_DIR, "cache", "recipe_ivf_index.npz"))
+    ann_index_n_probe: int = config("ANN_INDEX_N_PROBE", cast=int, default=8)
+    llm_chat_model: str = config("LLM_CHAT_MODEL", default="gpt-4")
+    llm_fallback_chat_model: str = config("LLM_FALLBACK_CHAT_MODEL", default="gpt-4o-mini")
+    llm_daily_budget_usd: float = config("LLM_DAILY_BUDGET_USD", cast=float, default=0.0)
+    llm_usage_history_size: int = config("LLM_USAGE_HISTORY_SIZE", cast=int, default=1000)
+    metrics_token: str = config("METRICS_TOKEN", default="")
+    rag_prefetch_ttl: float = config("RAG_PREFETCH_TTL", cast=float, default=600)
+    recipe_finder_refresh_interval: float = config("RECIPE_FINDER_REFRESH_INTERVAL", cast=float, default=300)
+    recipe_finder_full_reload_every: int = config("RECIPE_FINDER_FULL_RELOAD_EVERY", cast=int, default=12)
+    embeddings_checkpoint_path: str = os.path.join(BASE_DIR, "cache", "recipe_embeddings_checkpoint.json")
     account_sid: str = config("TWILIO_ACCOUNT_SID")
     auth_token: str = config("TWILIO_AUTH_TOKEN")
     twilio_number: str = config("TWILIO_NUMBER")
@@ -17,6 +53,13 @@ class ProjectSettings(BaseSettings):
     SUPABASE_URL: str = config("SUPABASE_URL")
     SUPABASE_KEY: str = config("SUPABASE_KEY")
     OPENAI_API_KEY: str = config("OPENAI_API_KEY")
+    OPENAI_HTTP2: bool = config("OPENAI_HTTP2", cast=bool, default=True)
+    OPENAI_MAX_CONNECTIONS: int = config("OPENAI_MAX_CONNECTIONS", cast=int, default=20)
+    OPENAI_MAX_CONCURRENCY: int = config("OPENAI_MAX_CONCURRENCY", cast=int, default=8)
+    OPENAI_MAX_RETRIES: int = config("OPENAI_MAX_RETRIES", cast=int, default=3)
+    OPENAI_EMBEDDINGS_TIMEOUT: float = config("OPENAI_EMBEDDINGS_TIMEOUT", cast=float, default=15.0)
+    OPENAI_CHAT_TIMEOUT: float = config("OPENAI_CHAT_TIMEOUT", cast=float, default=60.0)
+    OPENAI_STREAM_COMPLETIONS: bool = config("OPENAI_STREAM_COMPLETIONS", cast=bool, default=True)
     GOOGLE_CLIENT_ID: str = config("GOOGLE_CLIENT_ID")
     GOOGLE_CREDENTIAL_JSON_PATH: str = os.path.join(BASE_DIR, "client_secret.json")
     GOOGLE_TOKEN_PICKLE_PATH: str = os.path.join(BASE_DIR, "token.pickle")
@@ -151,6 +151,17 @@ class SupabaseClient(ISupabaseClient):
             self._logger.error(f"Filter operation failed: {e}")
             raise
 
+    async def count_and_max_id(self, table: str) -> tuple[int, int | None]:
+        """Rows count and largest 'id' of table, one request without row payload"""
+        try:
+            result = await self._client.table(table).select("id", count="exact").order("id", desc=True).limit(1).execute()
+            max_id = result.data[0]["id"] if result.data else None
+            return result.count or 0, max_id
+
+        except Exception as e:
+            self._logger.error(f"Count operation failed: {e}")
+            raise
+
     async def close(self):
         """Close the database connection"""
         with self._lock:
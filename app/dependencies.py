@@ -1,13 +1,21 @@
+import hmac
 from enum import Enum
 from typing import Annotated
-from fastapi import Depends, Request
+from fastapi import Depends, HTTPException, Request
 from app.utils.unitofwork import IUnitOfWork 
 from app.utils.cache.ttl_cache import InMemoryUserCache
 from app.wa_hooks.bot_menu_service import BotMenuService
 from app.config.logger_settings import get_logger
+from app.config.project_config import project_settings
 from app.services.rag_service import AskRagForRecipe
 from app.services.google_upload_file_service import GoogleDriveService
 from app.services.recipe_finder import RecipeFinder
+from app.services.ingredient_recipe_index import IngredientRecipeIndex
+from app.services.recipe_catalog import RecipeCatalog
+from app.services.recipe_message_renderer import RecipeMessageRenderer
+from app.services.llm_usage_tracker import LLMUsageTracker
+from app.services.rag_prefetcher import RagPrefetcher
+from app.services.menu_query_warmup import MenuQueryWarmup
 
 
 logger = get_logger("dependencies")
@@ -41,6 +49,41 @@ def get_recipe_finder(request: Request) -> RecipeFinder:
     return request.app.state.recipe_finder
 
 
+def get_recipe_catalog(request: Request) -> RecipeCatalog:
+    return request.app.state.recipe_catalog
+
+
+def get_recipe_message_renderer(request: Request) -> RecipeMessageRenderer:
+    return request.app.state.recipe_message_renderer
+
+
+def get_llm_usage_tracker(request: Request) -> LLMUsageTracker:
+    return request.app.state.llm_usage_tracker
+
+
+def get_rag_prefetcher(request: Request) -> RagPrefetcher:
+    return request.app.state.rag_prefetcher
+
+
+def get_menu_query_warmup(request: Request) -> MenuQueryWarmup:
+    return request.app.state.menu_query_warmup
+
+
+def get_ingredient_recipe_index(request: Request) -> IngredientRecipeIndex:
+    return request.app.state.ingredient_recipe_index
+
+
+def verify_metrics_token(request: Request) -> None:
+    """
+    Metrics endpoints are disabled without METRICS_TOKEN, otherwise 'Authorization: Bearer <token>' is required
+    """
+    if not project_settings.metrics_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {project_settings.metrics_token}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+
 BotMenuServiceDep = Annotated[BotMenuService, Depends(get_bot_menu_service)]
 UserStatesDep = Annotated[dict, Depends(get_user_states)]
 UserCacheDep = Annotated[InMemoryUserCache, Depends(get_user_cache)]
@@ -48,3 +91,9 @@ UOWDep = Annotated[IUnitOfWork, Depends(get_unit_of_work)]
 AskRagForRecipeDep = Annotated[AskRagForRecipe, Depends(get_rag_service)]
 GoogleDriveServiceDep = Annotated[GoogleDriveService, Depends(get_google_driver_service)]
 RecipeFinderDep = Annotated[RecipeFinder, Depends(get_recipe_finder)]
+RecipeCatalogDep = Annotated[RecipeCatalog, Depends(get_recipe_catalog)]
+RecipeMessageRendererDep = Annotated[RecipeMessageRenderer, Depends(get_recipe_message_renderer)]
+LLMUsageTrackerDep = Annotated[LLMUsageTracker, Depends(get_llm_usage_tracker)]
+RagPrefetcherDep = Annotated[RagPrefetcher, Depends(get_rag_prefetcher)]
+MenuQueryWarmupDep = Annotated[MenuQueryWarmup, Depends(get_menu_query_warmup)]
+IngredientRecipeIndexDep = Annotated[IngredientRecipeIndex, Depends(get_ingredient_recipe_index)]
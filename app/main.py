@@ -1,5 +1,8 @@
+import os
 import time
+import httpx
 import uvicorn
+from typing import Callable
 from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
 
@@ -9,22 +12,45 @@ from app.utils.cache.ttl_cache import InMemoryUserCache
 # from app.utils.cache.user_session import UserSession, UserStates
 from app.services.google_upload_file_service import GoogleDriveService
 from app.services.recipe_finder import RecipeFinder
-from app.api.services.fuzzy_ingredients_recipes_service import FuzzyIngredientsRecipesService
+from app.services.recipe_finder_refresher import RecipeFinderRefresher
+from app.services.ingredient_recipe_index import IngredientRecipeIndex
 from app.wa_hooks.message_hooks import MessageClient
 from app.wa_hooks.bot_menu_service import BotMenuService
 from app.config.logger_settings import get_logger
 from app.config.project_config import project_settings
 from app.database.db import get_supabase_client
 from app.services.rag_service import AskRagForRecipe
+from app.services.vector_index import RecipeVectorIndex
+from app.services.ivf_index import RecipeIVFIndex
+from app.utils.cache.embedding_cache import EmbeddingCache
+from app.utils.cache.recommendation_cache import RecommendationCache
+from app.services.openai_client import OpenAIClient
+from app.services.prompt_builder import RecipePromptBuilder
+from app.services.recipe_reranker import RecipeReranker
+from app.services.recipe_catalog import RecipeCatalog
+from app.services.recipe_food_matrix import RecipeFoodMatrix
+from app.services.recipe_message_renderer import RecipeMessageRenderer
+from app.services.llm_usage_tracker import LLMUsageTracker
+from app.services.rag_prefetcher import RagPrefetcher
+from app.services.menu_query_warmup import MenuQueryWarmup
 
 
 logger = get_logger("main")
 
 
-async def create_recipe_finder(uow: IUnitOfWork) -> RecipeFinder:
+async def create_recipe_finder_refresher(
+    uow: IUnitOfWork, on_swap: Callable[[RecipeFinder, IngredientRecipeIndex], None]
+) -> RecipeFinderRefresher:
     logger.info(f"Creating [RecipeFinder]...")
-    ingredients = await FuzzyIngredientsRecipesService().get_list_ingridients_he_en(uow) 
-    return RecipeFinder(ingredients)
+    recipe_finder_refresher = RecipeFinderRefresher(
+        uow,
+        on_swap=on_swap,
+        refresh_interval=project_settings.recipe_finder_refresh_interval,
+        full_reload_every=project_settings.recipe_finder_full_reload_every,
+    )
+    await recipe_finder_refresher.load()
+    recipe_finder_refresher.start_background_refresh()
+    return recipe_finder_refresher
 
 
 def create_google_driver_service() -> GoogleDriveService:
@@ -33,10 +59,186 @@ def create_google_driver_service() -> GoogleDriveService:
     return google_drive_service
 
 
-def create_rag_service(supabase_client) -> AskRagForRecipe:
+async def create_recipe_vector_index(supabase_client) -> RecipeVectorIndex | RecipeIVFIndex:
+    if os.path.exists(project_settings.ann_index_path):
+        logger.info("Creating [RecipeIVFIndex]...")
+        ann_index = RecipeIVFIndex(n_probe=project_settings.ann_index_n_probe)
+        try:
+            ann_index.load(project_settings.ann_index_path)
+            return ann_index
+        except Exception as e:
+            logger.error(f"Failed to load ANN index, using exact index: {e}")
+
+    logger.info("Creating [RecipeVectorIndex]...")
+    vector_index = RecipeVectorIndex(
+        supabase_client,
+        dtype=project_settings.vector_index_dtype,
+        rescore_path=project_settings.vector_index_rescore_path if project_settings.vector_index_rescore else None,
+    )
+    try:
+        await vector_index.load()
+    except Exception as e:
+        # RAG falls back to Supabase RPC 'match_recipes' while index is not loaded
+        logger.error(f"Failed to load recipe vector index: {e}")
+    return vector_index
+
+
+async def create_recipe_catalog(supabase_client) -> RecipeCatalog:
+    logger.info("Creating [RecipeCatalog]...")
+    recipe_catalog = RecipeCatalog(
+        supabase_client,
+        refresh_interval=project_settings.recipe_catalog_refresh_interval,
+        full_reload_every=project_settings.recipe_catalog_full_reload_every,
+    )
+    try:
+        await recipe_catalog.load()
+    except Exception as e:
+        # Missing recipes are fetched from DB on lookup until the next refresh
+        logger.error(f"Failed to load recipe catalog: {e}")
+    recipe_catalog.start_background_refresh()
+    return recipe_catalog
+
+
+async def create_recipe_food_matrix(supabase_client) -> RecipeFoodMatrix:
+    logger.info("Creating [RecipeFoodMatrix]...")
+    recipe_food_matrix = RecipeFoodMatrix(
+        supabase_client,
+        refresh_interval=project_settings.recipe_food_matrix_refresh_interval,
+        full_reload_every=project_settings.recipe_food_matrix_full_reload_every,
+    )
+    try:
+        await recipe_food_matrix.load()
+    except Exception as e:
+        # Restriction queries fall back to 'recipes_foods' DB reads while matrix is not loaded
+        logger.error(f"Failed to load recipe food matrix: {e}")
+    recipe_food_matrix.start_background_refresh()
+    return recipe_food_matrix
+
+
+def create_recipe_message_renderer(recipe_catalog: RecipeCatalog) -> RecipeMessageRenderer:
+    logger.info("Creating [RecipeMessageRenderer]...")
+    message_renderer = RecipeMessageRenderer(maxsize=project_settings.recipe_message_cache_maxsize)
+    message_renderer.prerender(recipe_catalog.get_many(recipe_catalog.ids()))
+    return message_renderer
+
+
+def create_embedding_cache() -> EmbeddingCache:
+    logger.info("Creating [EmbeddingCache]...")
+    return EmbeddingCache(
+        db_path=project_settings.embedding_cache_path,
+        maxsize=project_settings.embedding_cache_maxsize,
+        ttl=project_settings.embedding_cache_ttl,
+        disk_maxsize=project_settings.embedding_cache_disk_maxsize,
+    )
+
+
+def create_recommendation_cache() -> RecommendationCache:
+    logger.info("Creating [RecommendationCache]...")
+    return RecommendationCache(
+        maxsize=project_settings.recommendation_cache_maxsize,
+        ttl=project_settings.recommendation_cache_ttl,
+    )
+
+
+def create_openai_client() -> OpenAIClient:
+    logger.info("Creating [OpenAIClient]...")
+    return OpenAIClient(
+        api_key=project_settings.OPENAI_API_KEY,
+        http2=project_settings.OPENAI_HTTP2,
+        max_connections=project_settings.OPENAI_MAX_CONNECTIONS,
+        max_concurrency=project_settings.OPENAI_MAX_CONCURRENCY,
+        max_retries=project_settings.OPENAI_MAX_RETRIES,
+        timeouts={
+            "embeddings": httpx.Timeout(project_settings.OPENAI_EMBEDDINGS_TIMEOUT, connect=5.0),
+            "chat/completions": httpx.Timeout(project_settings.OPENAI_CHAT_TIMEOUT, connect=5.0),
+        },
+    )
+
+
+def create_prompt_builder() -> RecipePromptBuilder:
+    logger.info("Creating [RecipePromptBuilder]...")
+    return RecipePromptBuilder(
+        token_budget=project_settings.prompt_token_budget,
+        max_field_chars=project_settings.prompt_max_field_chars,
+        max_ingredients_chars=project_settings.prompt_max_ingredients_chars,
+        max_comments=project_settings.prompt_max_comments,
+        max_comment_chars=project_settings.prompt_max_comment_chars,
+        dedupe_foods=True,
+    )
+
+
+def create_llm_usage_tracker() -> LLMUsageTracker:
+    logger.info("Creating [LLMUsageTracker]...")
+    return LLMUsageTracker(
+        daily_budget=project_settings.llm_daily_budget_usd,
+        history_size=project_settings.llm_usage_history_size,
+    )
+
+
+def create_recipe_reranker() -> RecipeReranker | None:
+    if not project_settings.local_rerank_enabled:
+        return None
+    logger.info("Creating [RecipeReranker]...")
+    return RecipeReranker(confidence_margin=project_settings.local_rerank_margin)
+
+
+def create_rag_service(
+    openai_client: OpenAIClient,
+    supabase_client,
+    vector_index: RecipeVectorIndex | RecipeIVFIndex,
+    embedding_cache: EmbeddingCache,
+    recommendation_cache: RecommendationCache,
+    recipe_catalog: RecipeCatalog,
+    message_renderer: RecipeMessageRenderer,
+    usage_tracker: LLMUsageTracker,
+    recipe_food_matrix: RecipeFoodMatrix,
+) -> AskRagForRecipe:
     logger.info("Creating [RagService]...")
-    openai_key = project_settings.OPENAI_API_KEY
-    return AskRagForRecipe(openai_key, supabase_client, project_settings.recipes_rag_csv_path)
+    return AskRagForRecipe(
+        openai_client,
+        supabase_client,
+        project_settings.recipes_rag_csv_path,
+        vector_index=vector_index,
+        embedding_cache=embedding_cache,
+        recommendation_cache=recommendation_cache,
+        stream_completions=project_settings.OPENAI_STREAM_COMPLETIONS,
+        prompt_builder=create_prompt_builder(),
+        reranker=create_recipe_reranker(),
+        recipe_catalog=recipe_catalog,
+        message_renderer=message_renderer,
+        usage_tracker=usage_tracker,
+        chat_model=project_settings.llm_chat_model,
+        fallback_chat_model=project_settings.llm_fallback_chat_model,
+        recipe_food_matrix=recipe_food_matrix,
+    )
+
+
+def create_rag_prefetcher() -> RagPrefetcher:
+    logger.info("Creating [RagPrefetcher]...")
+    return RagPrefetcher(ttl=project_settings.rag_prefetch_ttl)
+
+
+async def create_menu_query_warmup(
+    rag_service: AskRagForRecipe,
+    recipe_catalog: RecipeCatalog,
+    vector_index: RecipeVectorIndex | RecipeIVFIndex,
+) -> MenuQueryWarmup:
+    logger.info("Creating [MenuQueryWarmup]...")
+    menu_warmup = MenuQueryWarmup(
+        rag_service,
+        recipe_catalog,
+        # IVF index is built offline from a file, only the in-process index is reloaded from DB
+        vector_index=vector_index if isinstance(vector_index, RecipeVectorIndex) else None,
+        match_count=project_settings.hybrid_vector_match_count,
+        refresh_interval=project_settings.menu_warmup_refresh_interval,
+    )
+    try:
+        await menu_warmup.warm()
+    except Exception as e:
+        # Requests fall back to embedding call and vector search
+        logger.error(f"Failed to warm up menu queries: {e}")
+    menu_warmup.start_background_refresh()
+    return menu_warmup
 
 
 def create_uow_client(supabase_client) -> IUnitOfWork:
@@ -77,15 +279,65 @@ async def lifespan(app: FastAPI):
     app.state.user_cache = get_user_cache()
     app.state.uow = create_uow_client(supabase_client)
     sup_client = await supabase_client.get_client()
-    app.state.rag_service = create_rag_service(sup_client)
+    app.state.recipe_vector_index = await create_recipe_vector_index(sup_client)
+    app.state.recipe_catalog = await create_recipe_catalog(sup_client)
+    app.state.recipe_food_matrix = await create_recipe_food_matrix(sup_client)
+    app.state.recipe_message_renderer = create_recipe_message_renderer(app.state.recipe_catalog)
+    app.state.embedding_cache = create_embedding_cache()
+    app.state.recommendation_cache = create_recommendation_cache()
+    app.state.openai_client = create_openai_client()
+    app.state.llm_usage_tracker = create_llm_usage_tracker()
+    app.state.rag_service = create_rag_service(
+        app.state.openai_client,
+        sup_client,
+        app.state.recipe_vector_index,
+        app.state.embedding_cache,
+        app.state.recommendation_cache,
+        app.state.recipe_catalog,
+        app.state.recipe_message_renderer,
+        app.state.llm_usage_tracker,
+        app.state.recipe_food_matrix,
+    )
+    app.state.menu_query_warmup = await create_menu_query_warmup(
+        app.state.rag_service, app.state.recipe_catalog, app.state.recipe_vector_index
+    )
+    app.state.rag_prefetcher = create_rag_prefetcher()
     app.state.google_drive_service = create_google_driver_service()
-    app.state.recipe_finder = await create_recipe_finder(app.state.uow)
+
+    def swap_recipe_finder(finder: RecipeFinder, index: IngredientRecipeIndex) -> None:
+        # Dependencies read app.state per request, no await between assignments so requests see a matching pair
+        app.state.recipe_finder = finder
+        app.state.ingredient_recipe_index = index
+
+    app.state.recipe_finder_refresher = await create_recipe_finder_refresher(app.state.uow, on_swap=swap_recipe_finder)
 
     yield
 
     # Code for finish app (shutdown)
+    await app.state.recipe_finder_refresher.stop()
+    app.state.recipe_finder_refresher = None
     app.state.uow = None
+    await app.state.menu_query_warmup.stop()
+    app.state.menu_query_warmup = None
+    app.state.rag_prefetcher.stop()
+    logger.info(f"RAG prefetcher stats: {app.state.rag_prefetcher.stats()}")
+    app.state.rag_prefetcher = None
     app.state.rag_service = None
+    app.state.recipe_vector_index = None
+    await app.state.recipe_food_matrix.stop()
+    app.state.recipe_food_matrix = None
+    await app.state.recipe_catalog.stop()
+    app.state.recipe_catalog = None
+    logger.info(f"Recipe message renderer stats: {app.state.recipe_message_renderer.stats()}")
+    app.state.recipe_message_renderer = None
+    app.state.embedding_cache.close()
+    app.state.embedding_cache = None
+    logger.info(f"Recommendation cache stats: {app.state.recommendation_cache.stats()}")
+    app.state.recommendation_cache = None
+    logger.info(f"LLM usage: {app.state.llm_usage_tracker.snapshot()['totals']}")
+    app.state.llm_usage_tracker = None
+    await app.state.openai_client.aclose()
+    app.state.openai_client = None
     logger.info("Shutting down app...")
 
 
@@ -0,0 +1,77 @@
+import re
+from functools import lru_cache
+
+
+def build_trie_pattern(words: tuple[str, ...]) -> str:
+    """
+    Build regex alternation from a character trie of words,
+    so matching cost grows with text length, not with number of words
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        is_end = "" in node
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != ""]
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1 and not is_end:
+            return alternatives[0]
+        pattern = "(?:" + "|".join(alternatives) + ")"
+        return pattern + "?" if is_end else pattern
+
+    return build(trie)
+
+
+class BannedFoodsMatcher:
+    """
+    Substring matcher for a user's banned foods list.
+    Banned foods are compiled into one trie-shaped regex, so a recipe 'foods' string
+    is scanned once instead of once per banned food. Verdicts are memoized per foods text,
+    repeated requests over the same recipes are dict lookups.
+    Expects lowercased text, same as the legacy 'banned.lower() in foods.lower()' check.
+    """
+
+    def __init__(self, banned_foods: tuple[str, ...], max_memo_size: int = 8192):
+        self.banned_foods = banned_foods
+        self._pattern = re.compile(build_trie_pattern(banned_foods)) if banned_foods else None
+        self._memo: dict[str, str | None] = {}
+        self._max_memo_size = max_memo_size
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def search(self, foods_lower: str) -> str | None:
+        """
+        Return a banned food found in lowercased foods text, or None
+        """
+        if self._pattern is None or not foods_lower:
+            return None
+        try:
+            return self._memo[foods_lower]
+        except KeyError:
+            pass
+
+        match = self._pattern.search(foods_lower)
+        result = match.group(0) if match else None
+        if len(self._memo) >= self._max_memo_size:
+            self._memo.clear()
+        self._memo[foods_lower] = result
+        return result
+
+
+@lru_cache(maxsize=1024)
+def _compile_banned_foods(banned_foods: tuple[str, ...]) -> BannedFoodsMatcher:
+    return BannedFoodsMatcher(banned_foods)
+
+
+def get_banned_foods_matcher(banned_foods: list[str] | None) -> BannedFoodsMatcher:
+    """
+    Matcher for banned foods list, compiled once per distinct list and reused across requests
+    """
+    normalized = tuple(sorted({food.lower() for food in banned_foods or [] if food}))
+    return _compile_banned_foods(normalized)
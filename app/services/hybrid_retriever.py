@@ -0,0 +1,114 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from app.config.logger_settings import get_logger
+from app.utils.unitofwork import IUnitOfWork
+from app.api.dtos.recipe_user_preferences_dto import RecipeUserPreferencesDTO
+from app.api.services.fuzzy_ingredients_recipes_service import FuzzyIngredientsRecipesService
+from app.services.rag_service import AskRagForRecipe
+from app.services.recipe_finder import RecipeFinder
+from app.services.menu_query_warmup import MenuQueryWarmup
+from app.services.ingredient_recipe_index import IngredientRecipeIndex
+
+
+logger = get_logger("hybrid_retriever")
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = RRF_K) -> list[int]:
+    """
+    Merge ranked id lists, score of id is sum of 1 / (k + rank) over lists where it appears
+    """
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, recipe_id in enumerate(ranking, start=1):
+            scores[recipe_id] = scores.get(recipe_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+@dataclass
+class HybridRetrievalResult:
+    recipe_ids: list[int] = field(default_factory=list)  # Fused ranking, best first
+    similarities: dict[int, float] = field(default_factory=dict)
+    ingredient_hits: dict[int, int] = field(default_factory=dict)
+    ingredients_requested: bool = False
+
+    @property
+    def ingredients_found(self) -> bool:
+        return bool(self.ingredient_hits)
+
+
+class HybridRecipeRetriever:
+    """
+    Runs fuzzy ingredient search and embedding search concurrently
+    and merges both rankings with reciprocal rank fusion.
+    Fuzzy ranking orders recipes by number of matched ingredients, taken from in-memory
+    ingredient index when given, otherwise from 'fuzzy_ingredients_recipes' table.
+    """
+
+    def __init__(
+        self,
+        rag_service: AskRagForRecipe,
+        recipe_finder: RecipeFinder,
+        uow: IUnitOfWork,
+        rrf_k: int = RRF_K,
+        max_candidates: int = 30,
+        vector_match_count: int = 15,
+        menu_warmup: MenuQueryWarmup | None = None,
+        ingredient_index: IngredientRecipeIndex | None = None,
+    ):
+        self._rag_service = rag_service
+        self._recipe_finder = recipe_finder
+        self._uow = uow
+        self._rrf_k = rrf_k
+        self._max_candidates = max_candidates
+        self._vector_match_count = vector_match_count
+        self._menu_warmup = menu_warmup
+        self._ingredient_index = ingredient_index
+
+    async def retrieve(self, preferences: RecipeUserPreferencesDTO) -> HybridRetrievalResult:
+        include_ingredients = (preferences.include_ingredients or "").strip()
+        ingredients_requested = bool(include_ingredients) and include_ingredients != "No preference"
+
+        if ingredients_requested:
+            similar_recipes, ingredient_hits = await asyncio.gather(
+                self._rag_service.search_recipes(preferences.model_dump(), self._vector_match_count),
+                self._find_by_ingredients(include_ingredients),
+            )
+        else:
+            similar_recipes = None
+            if self._menu_warmup is not None:
+                # Fixed menu combination, embedding and search were done on startup
+                similar_recipes = self._menu_warmup.get(preferences, self._vector_match_count)
+            if similar_recipes is None:
+                similar_recipes = await self._rag_service.search_recipes(preferences.model_dump(), self._vector_match_count)
+            ingredient_hits = Counter()
+
+        vector_ranking = [int(r["recipe_id"]) for r in similar_recipes]
+        # most_common keeps first-seen order for equal counts
+        fuzzy_ranking = [recipe_id for recipe_id, _ in ingredient_hits.most_common()]
+        recipe_ids = reciprocal_rank_fusion([vector_ranking, fuzzy_ranking], self._rrf_k)[:self._max_candidates]
+        logger.info(f"Hybrid retrieval: vector {len(vector_ranking)}, fuzzy {len(fuzzy_ranking)}, fused top: {recipe_ids[:10]}")
+
+        return HybridRetrievalResult(
+            recipe_ids=recipe_ids,
+            similarities={int(r["recipe_id"]): r["similarity"] for r in similar_recipes},
+            ingredient_hits=dict(ingredient_hits),
+            ingredients_requested=ingredients_requested,
+        )
+
+    async def _find_by_ingredients(self, include_ingredients: str) -> Counter:
+        ingredients = await self._recipe_finder.find_recipes_by_ingredients(
+            user_input=include_ingredients,
+            similarity_threshold=80
+        )
+        if not ingredients:
+            return Counter()
+        if self._ingredient_index is not None:
+            ranked = self._ingredient_index.rank(ingredients)
+            logger.info(f"Find recipes by ingredients count: {len(ranked)}")
+            return Counter(dict(ranked))
+        recipes_id = await FuzzyIngredientsRecipesService().get_recipes_by_ingredients(self._uow, ingredients)
+        logger.info(f"Find recipes by ingredients count: {len(recipes_id)}")
+        return Counter(recipes_id)
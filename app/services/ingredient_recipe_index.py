@@ -0,0 +1,86 @@
+import numpy as np
+from app.config.logger_settings import get_logger
+from app.api.dtos.fuzzy_ingredients_recipes_dtos import FuzzyIngredientsRecipesDTO
+
+
+logger = get_logger("ingredient_recipe_index")
+
+EMPTY_IDS = np.empty(0, dtype=np.int64)
+
+
+class IngredientRecipeIndex:
+    """
+    In-memory inverted index of 'fuzzy_ingredients_recipes': ingredient name (Hebrew and English)
+    -> sorted unique recipe ids. Replaces per request 'get_recipes_by_ingredients' queries,
+    names are matched exactly like the DB 'in' filter, RecipeFinder returns names in the same form.
+    Immutable after build, a rebuilt index replaces the old one as a whole.
+    """
+
+    def __init__(self, rows: list[FuzzyIngredientsRecipesDTO]):
+        # Name -> row positions, a name may repeat across rows and languages
+        self._rows_by_name: dict[str, list[int]] = {}
+        self._recipe_ids: list[np.ndarray] = []
+        for position, row in enumerate(rows):
+            self._recipe_ids.append(np.unique(np.asarray(row.recipe_id_list or [], dtype=np.int64)))
+            for name in dict.fromkeys((row.ingredient_he, row.ingredient_en)):
+                if name:
+                    self._rows_by_name.setdefault(name, []).append(position)
+        logger.info(f"Ingredient recipe index: {len(self._rows_by_name)} names, {len(self._recipe_ids)} ingredients")
+
+    def __len__(self) -> int:
+        return len(self._rows_by_name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows_by_name
+
+    def get(self, name: str) -> np.ndarray:
+        """
+        Sorted recipe ids of ingredient name
+        """
+        return self._merge(self._rows_by_name.get(name, []))
+
+    def union(self, names: list[str]) -> np.ndarray:
+        """
+        Sorted recipe ids containing any of the ingredients
+        """
+        return self._merge(self._matched_rows(names))
+
+    def intersection(self, names: list[str]) -> np.ndarray:
+        """
+        Sorted recipe ids containing all of the ingredients, empty when some name is unknown
+        """
+        known = list(dict.fromkeys(names))
+        if not known or any(name not in self._rows_by_name for name in known):
+            return EMPTY_IDS
+        # Smallest sets first, intersection shrinks fastest
+        id_sets = sorted((self.get(name) for name in known), key=len)
+        result = id_sets[0]
+        for recipe_ids in id_sets[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, recipe_ids, assume_unique=True)
+        return result
+
+    def rank(self, names: list[str]) -> list[tuple[int, int]]:
+        """
+        (recipe_id, matched ingredients count) for recipes with any of the ingredients,
+        most matched first, ties by recipe id
+        """
+        rows = self._matched_rows(names)
+        if not rows:
+            return []
+        recipe_ids, counts = np.unique(np.concatenate([self._recipe_ids[row] for row in rows]), return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        return [(int(recipe_ids[i]), int(counts[i])) for i in order]
+
+    def _matched_rows(self, names: list[str]) -> list[int]:
+        # Hebrew and English names of one ingredient count once
+        rows = dict.fromkeys(row for name in names for row in self._rows_by_name.get(name, []))
+        return list(rows)
+
+    def _merge(self, rows: list[int]) -> np.ndarray:
+        if not rows:
+            return EMPTY_IDS
+        if len(rows) == 1:
+            return self._recipe_ids[rows[0]]
+        return np.unique(np.concatenate([self._recipe_ids[row] for row in rows]))
@@ -0,0 +1,159 @@
+import os
+import numpy as np
+from app.config.logger_settings import get_logger
+from app.services.vector_index import SIMILARITY_THRESHOLD, normalize_rows
+
+
+logger = get_logger("ivf_index")
+
+
+def spherical_kmeans(
+    matrix: np.ndarray, n_lists: int, iterations: int = 20, seed: int = 0, chunk_size: int = 8192
+) -> np.ndarray:
+    """
+    k-means on unit vectors with cosine similarity, returns normalized centroids (n_lists x dim)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign_lists(matrix, centroids, chunk_size)
+        counts = np.bincount(assignments, minlength=n_lists)
+        order = np.argsort(assignments, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.zeros_like(centroids)
+        non_empty = counts > 0
+        sums[non_empty] = np.add.reduceat(matrix[order], starts[non_empty], axis=0)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists with random points
+            sums[empty] = matrix[rng.choice(len(matrix), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def assign_lists(matrix: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+    assignments = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), chunk_size):
+        assignments[start:start + chunk_size] = np.argmax(matrix[start:start + chunk_size] @ centroids.T, axis=1)
+    return assignments
+
+
+class RecipeIVFIndex:
+    """
+    Approximate cosine index (inverted file): vectors are clustered by coarse centroids,
+    a query scans only 'n_probe' closest lists. Same search interface as RecipeVectorIndex.
+    Built offline (scripts/build_recipe_ann_index.py), saved to .npz and loaded on startup.
+    Larger 'n_probe' gives better recall and slower queries.
+    """
+
+    def __init__(self, n_probe: int = 8):
+        self.n_probe = n_probe
+        self._recipe_ids: np.ndarray | None = None
+        self._matrix: np.ndarray | None = None  # Rows grouped by list
+        self._centroids: np.ndarray | None = None
+        self._offsets: np.ndarray | None = None  # List i is rows offsets[i]:offsets[i + 1]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._matrix is not None and len(self._recipe_ids) > 0
+
+    def __len__(self) -> int:
+        return 0 if self._recipe_ids is None else len(self._recipe_ids)
+
+    @property
+    def n_lists(self) -> int:
+        return 0 if self._centroids is None else len(self._centroids)
+
+    def build(
+        self,
+        recipe_ids: list[int],
+        embeddings: list[list[float]] | np.ndarray,
+        n_lists: int | None = None,
+        iterations: int = 20,
+        train_size: int = 256,
+        seed: int = 0,
+    ) -> None:
+        """
+        Cluster vectors into 'n_lists' lists (default ~sqrt(N)).
+        Centroids are trained on up to 'train_size' points per list.
+        """
+        matrix = normalize_rows(np.array(embeddings, dtype=np.float32))
+        n_lists = n_lists or max(1, int(np.sqrt(len(matrix))))
+        n_lists = min(n_lists, len(matrix))
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(matrix), n_lists * train_size)
+        sample = matrix[rng.choice(len(matrix), sample_size, replace=False)] if sample_size < len(matrix) else matrix
+        centroids = spherical_kmeans(sample, n_lists, iterations, seed)
+
+        assignments = assign_lists(matrix, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        self._recipe_ids = np.asarray(recipe_ids, dtype=np.int64)[order]
+        self._matrix = np.ascontiguousarray(matrix[order])
+        self._centroids = centroids.astype(np.float32)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        logger.info(f"IVF index built: {len(self)} vectors, {n_lists} lists, largest list {counts.max()}")
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            recipe_ids=self._recipe_ids,
+            matrix=self._matrix,
+            centroids=self._centroids,
+            offsets=self._offsets,
+        )
+        os.replace(tmp_path, path)
+        logger.info(f"IVF index saved to {path}")
+
+    def load(self, path: str) -> None:
+        with np.load(path) as data:
+            self._recipe_ids = data["recipe_ids"]
+            self._matrix = data["matrix"]
+            self._centroids = data["centroids"]
+            self._offsets = data["offsets"]
+        logger.info(f"IVF index loaded from {path}: {len(self)} vectors, {self.n_lists} lists, n_probe {self.n_probe}")
+
+    def search(
+        self,
+        query_embedding: list[float],
+        match_count: int = 10,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+    ) -> list[dict]:
+        """
+        Return up to match_count rows {'recipe_id', 'similarity'} ordered by similarity,
+        same shape as RecipeVectorIndex.search
+        """
+        if not self.is_loaded or match_count <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        # At least one list is scanned, n_probe <= 0 from settings would leave nothing to search
+        n_probe = max(1, min(self.n_probe, self.n_lists))
+        centroid_scores = self._centroids @ query
+        lists = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe] if n_probe < self.n_lists else np.arange(self.n_lists)
+
+        # Lists are contiguous row ranges, slices are scanned without copying
+        spans = [(self._offsets[i], self._offsets[i + 1]) for i in lists]
+        scores = np.concatenate([self._matrix[start:end] @ query for start, end in spans])
+        recipe_ids = np.concatenate([self._recipe_ids[start:end] for start, end in spans])
+        if not len(scores):
+            return []
+
+        k = min(match_count, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [
+            {"recipe_id": int(recipe_ids[i]), "similarity": float(scores[i])}
+            for i in top
+            if scores[i] >= similarity_threshold
+        ]
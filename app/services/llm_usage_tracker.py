@@ -0,0 +1,187 @@
+import time
+import threading
+from collections import deque, defaultdict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("llm_usage_tracker")
+
+# USD per 1K tokens: (prompt, completion)
+MODEL_PRICES = {
+    "gpt-4": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+DEFAULT_MODEL_PRICE = MODEL_PRICES["gpt-4"]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, DEFAULT_MODEL_PRICE)
+    return (prompt_tokens / 1000) * prompt_price + (completion_tokens / 1000) * completion_price
+
+
+@dataclass
+class LLMUsageRecord:
+    model: str
+    state: str
+    prompt_tokens: int = 0
+    estimated_prompt_tokens: int = 0  # Prompt builder estimate, compared with 'prompt_tokens' reported by API
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost: float = 0.0
+    latency_ms: float = 0.0
+    cached: bool = False
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class UsageAggregate:
+    requests: int = 0
+    cached: int = 0
+    prompt_tokens: int = 0
+    estimated_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost: float = 0.0
+    latency_ms: float = 0.0
+
+    def add(self, record: LLMUsageRecord) -> None:
+        self.requests += 1
+        self.cached += record.cached
+        self.prompt_tokens += record.prompt_tokens
+        self.estimated_prompt_tokens += record.estimated_prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.total_tokens += record.total_tokens
+        self.cost += record.cost
+        self.latency_ms += record.latency_ms
+
+    def to_dict(self) -> dict:
+        calls = self.requests - self.cached
+        return {
+            **asdict(self),
+            "cost": round(self.cost, 6),
+            "latency_ms": round(self.latency_ms, 3),
+            "avg_prompt_tokens": round(self.prompt_tokens / calls, 1) if calls else 0.0,
+            "avg_latency_ms": round(self.latency_ms / calls, 3) if calls else 0.0,
+        }
+
+
+class LLMUsageTracker:
+    """
+    App-scoped accounting of LLM chat usage.
+    Keeps cumulative counters per model and per conversation state, the last 'history_size'
+    records for rolling aggregates, and spend of the current UTC day for the budget guard.
+    'daily_budget' <= 0 disables the guard.
+    """
+
+    def __init__(self, daily_budget: float = 0.0, history_size: int = 1000, rolling_window: float = 3600):
+        self.daily_budget = daily_budget
+        self._rolling_window = rolling_window
+        self._records: deque[LLMUsageRecord] = deque(maxlen=history_size)
+        self._totals = UsageAggregate()
+        self._by_model: dict[str, UsageAggregate] = defaultdict(UsageAggregate)
+        self._by_state: dict[str, UsageAggregate] = defaultdict(UsageAggregate)
+        self._by_model_state: dict[tuple[str, str], UsageAggregate] = defaultdict(UsageAggregate)
+        self._day = self._today()
+        self._day_cost = 0.0
+        self._budget_exceeded_logged = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def _roll_day(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._day_cost = 0.0
+            self._budget_exceeded_logged = False
+
+    def record(self, record: LLMUsageRecord) -> None:
+        with self._lock:
+            self._roll_day()
+            self._records.append(record)
+            self._totals.add(record)
+            self._by_model[record.model].add(record)
+            self._by_state[record.state].add(record)
+            self._by_model_state[(record.model, record.state)].add(record)
+            self._day_cost += record.cost
+        logger.info(
+            f"LLM usage: model {record.model}, state {record.state}, prompt {record.prompt_tokens} "
+            f"(estimated {record.estimated_prompt_tokens}), "
+            f"completion {record.completion_tokens}, cost ${record.cost:.4f}, {record.latency_ms:.0f} ms, "
+            f"cached {record.cached}, today ${self._day_cost:.4f}"
+        )
+
+    @property
+    def daily_cost(self) -> float:
+        with self._lock:
+            self._roll_day()
+            return self._day_cost
+
+    def is_over_budget(self) -> bool:
+        if self.daily_budget <= 0:
+            return False
+        over_budget = self.daily_cost >= self.daily_budget
+        if over_budget and not self._budget_exceeded_logged:
+            self._budget_exceeded_logged = True
+            logger.warning(f"LLM daily budget ${self.daily_budget:.2f} exceeded: ${self._day_cost:.4f} spent today")
+        return over_budget
+
+    def snapshot(self) -> dict:
+        """
+        Cumulative and rolling (last 'rolling_window' seconds of kept history) aggregates
+        """
+        since = time.time() - self._rolling_window
+        rolling_by_model: dict[str, UsageAggregate] = defaultdict(UsageAggregate)
+        rolling_by_state: dict[str, UsageAggregate] = defaultdict(UsageAggregate)
+        with self._lock:
+            self._roll_day()
+            for record in self._records:
+                if record.timestamp >= since:
+                    rolling_by_model[record.model].add(record)
+                    rolling_by_state[record.state].add(record)
+            return {
+                "day": self._day,
+                "daily_cost": round(self._day_cost, 6),
+                "daily_budget": self.daily_budget,
+                "over_budget": 0 < self.daily_budget <= self._day_cost,
+                "totals": self._totals.to_dict(),
+                "by_model": {name: value.to_dict() for name, value in self._by_model.items()},
+                "by_state": {name: value.to_dict() for name, value in self._by_state.items()},
+                "rolling_window_seconds": self._rolling_window,
+                "rolling_by_model": {name: value.to_dict() for name, value in rolling_by_model.items()},
+                "rolling_by_state": {name: value.to_dict() for name, value in rolling_by_state.items()},
+            }
+
+    def render_metrics(self) -> str:
+        """
+        Counters labeled by model and conversation state, in Prometheus text exposition format
+        """
+        counters = (
+            ("llm_requests_total", "requests", "LLM recommendation requests, cache hits included"),
+            ("llm_cache_hits_total", "cached", "Recommendations served from cache or shared with an identical in-flight call"),
+            ("llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens"),
+            ("llm_estimated_prompt_tokens_total", "estimated_prompt_tokens", "Prompt tokens estimated by prompt builder"),
+            ("llm_completion_tokens_total", "completion_tokens", "Completion tokens"),
+            ("llm_cost_usd_total", "cost", "Estimated spend in USD"),
+            ("llm_latency_ms_total", "latency_ms", "Wall time of LLM calls in milliseconds"),
+        )
+        with self._lock:
+            self._roll_day()
+            lines = []
+            for name, attribute, description in counters:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for (model, state), aggregate in self._by_model_state.items():
+                    lines.append(f'{name}{{model="{model}",state="{state}"}} {getattr(aggregate, attribute)}')
+            lines.append("# HELP llm_daily_cost_usd Estimated spend of the current UTC day")
+            lines.append("# TYPE llm_daily_cost_usd gauge")
+            lines.append(f"llm_daily_cost_usd {self._day_cost}")
+            lines.append("# HELP llm_daily_budget_usd Daily budget, 0 when disabled")
+            lines.append("# TYPE llm_daily_budget_usd gauge")
+            lines.append(f"llm_daily_budget_usd {self.daily_budget}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,110 @@
+import asyncio
+from itertools import product
+from app.config.logger_settings import get_logger
+from app.config.menu_options import MEAL_TYPE_OPTIONS, DIETARY_PREFERENCE_OPTIONS
+from app.api.dtos.recipe_user_preferences_dto import RecipeUserPreferencesDTO
+from app.services.rag_service import AskRagForRecipe
+from app.services.recipe_catalog import RecipeCatalog
+from app.services.vector_index import RecipeVectorIndex
+
+
+logger = get_logger("menu_query_warmup")
+
+
+class MenuQueryWarmup:
+    """
+    Precomputed embedding search for every fixed menu combination without ingredients
+    (meal type x dietary preference). Query embeddings are requested once in one batch on startup,
+    candidate lists are searched again when recipe catalog version changes. With 'vector_index'
+    the in-process index is reloaded from 'recipe_embeddings' first, so new recipes reach the warm set
+    (an offline-built IVF index file is not passed and changes only with a rebuild and restart).
+    Requests with the same query text skip the embedding call and vector search.
+    """
+
+    def __init__(
+        self,
+        rag_service: AskRagForRecipe,
+        recipe_catalog: RecipeCatalog | None = None,
+        vector_index: RecipeVectorIndex | None = None,
+        match_count: int = 15,
+        refresh_interval: float = 60,
+    ):
+        self._rag_service = rag_service
+        self._recipe_catalog = recipe_catalog
+        self._vector_index = vector_index
+        self._match_count = match_count
+        self._refresh_interval = refresh_interval
+        self._embeddings: dict[str, list[float]] = {}
+        self._candidates: dict[str, list[dict]] = {}
+        self._catalog_version: int | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    @staticmethod
+    def menu_preferences() -> list[RecipeUserPreferencesDTO]:
+        return [
+            RecipeUserPreferencesDTO(meal_type=meal_type, dietary_preference=dietary_preference)
+            for meal_type, dietary_preference in product(MEAL_TYPE_OPTIONS.values(), DIETARY_PREFERENCE_OPTIONS.values())
+        ]
+
+    async def warm(self) -> None:
+        query_texts = list(dict.fromkeys(
+            self._rag_service.build_query_text(preferences.model_dump()) for preferences in self.menu_preferences()
+        ))
+        missing = [text for text in query_texts if text not in self._embeddings]
+        if missing:
+            embeddings = await self._rag_service.get_embeddings(missing)
+            self._embeddings.update(zip(missing, embeddings))
+        await self.refresh()
+
+    async def refresh(self) -> None:
+        """
+        Search candidates for all warmed queries, swapped in at once
+        """
+        version = self._recipe_catalog.version if self._recipe_catalog is not None else None
+        candidates = {}
+        for query_text, embedding in self._embeddings.items():
+            candidates[query_text] = await self._rag_service.search_by_embedding(embedding, self._match_count)
+        self._candidates = candidates
+        self._catalog_version = version
+        logger.info(f"Menu queries warmed: {len(candidates)} combinations, catalog version {version}")
+
+    def get(self, preferences: RecipeUserPreferencesDTO, match_count: int) -> list[dict] | None:
+        """
+        Precomputed rows {'recipe_id', 'similarity'} for preferences, None when query is not warmed
+        """
+        if match_count > self._match_count:
+            return None
+        candidates = self._candidates.get(self._rag_service.build_query_text(preferences.model_dump()))
+        if candidates is None:
+            return None
+        self.hits += 1
+        return candidates[:match_count]
+
+    def start_background_refresh(self) -> None:
+        if self._refresh_task is None and self._recipe_catalog is not None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            if self._recipe_catalog.version == self._catalog_version:
+                continue
+            try:
+                if self._vector_index is not None:
+                    await self._vector_index.load()
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh menu queries: {e}")
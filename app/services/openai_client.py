@@ -0,0 +1,153 @@
+import json
+import random
+import asyncio
+import httpx
+from typing import AsyncIterator
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("openai_client")
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+DEFAULT_TIMEOUTS = {
+    "embeddings": httpx.Timeout(30.0, connect=5.0),
+    "chat/completions": httpx.Timeout(60.0, connect=5.0),
+}
+
+
+class OpenAIClient:
+    """
+    App-scoped transport for OpenAI API.
+    One pooled httpx.AsyncClient (keep-alive, optional HTTP/2) shared by all calls,
+    with per-endpoint timeouts, retries with jittered backoff on 429/5xx
+    and a limit of concurrent requests.
+    A 429 response pauses all new requests for its backoff delay, so concurrent
+    callers do not keep hitting the rate limit while one of them waits.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.openai.com/v1",
+        http2: bool = False,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        timeouts: dict[str, httpx.Timeout] | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self._cooldown_until = 0.0
+
+    def _backoff_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self._backoff_max)
+                except ValueError:
+                    pass
+        # Full jitter: random delay up to exponential cap
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+
+    async def _wait_for_cooldown(self) -> None:
+        delay = self._cooldown_until - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _start_cooldown(self, delay: float) -> None:
+        self._cooldown_until = max(self._cooldown_until, asyncio.get_running_loop().time() + delay)
+
+    async def post(self, endpoint: str, payload: dict) -> httpx.Response:
+        """
+        POST to OpenAI endpoint (e.g. 'embeddings', 'chat/completions') with retries.
+        Returns last response, caller checks status code.
+        """
+        timeout = self._timeouts.get(endpoint)
+        attempt = 0
+        while True:
+            response = None
+            await self._wait_for_cooldown()
+            try:
+                async with self._semaphore:
+                    response = await self._client.post(f"/{endpoint}", json=payload, timeout=timeout)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self._max_retries:
+                    return response
+                logger.warning(f"OpenAI '{endpoint}' returned {response.status_code}, retry {attempt + 1}/{self._max_retries}")
+
+            except httpx.TransportError as e:
+                if attempt >= self._max_retries:
+                    raise
+                logger.warning(f"OpenAI '{endpoint}' transport error: {e!r}, retry {attempt + 1}/{self._max_retries}")
+
+            delay = self._backoff_delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                self._start_cooldown(delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def stream(self, endpoint: str, payload: dict) -> AsyncIterator[dict]:
+        """
+        POST with 'stream: true' and yield parsed server-sent events.
+        Same retry policy as 'post' (429/5xx and transport errors), but only before
+        the first event is received, a stream broken after that raises.
+        """
+        timeout = self._timeouts.get(endpoint)
+        attempt = 0
+        received = False
+        while True:
+            response = None
+            await self._wait_for_cooldown()
+            try:
+                async with self._semaphore:
+                    async with self._client.stream("POST", f"/{endpoint}", json={**payload, "stream": True}, timeout=timeout) as response:
+                        if response.status_code == 200:
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    return
+                                received = True
+                                yield json.loads(data)
+                            return
+
+                        await response.aread()
+                        if response.status_code not in RETRY_STATUS_CODES or attempt >= self._max_retries:
+                            raise Exception(f"Error calling OpenAI API: {response.text}")
+                        logger.warning(f"OpenAI '{endpoint}' stream returned {response.status_code}, retry {attempt + 1}/{self._max_retries}")
+
+            except httpx.TransportError as e:
+                if received or attempt >= self._max_retries:
+                    raise
+                logger.warning(f"OpenAI '{endpoint}' stream transport error: {e!r}, retry {attempt + 1}/{self._max_retries}")
+                response = None
+
+            delay = self._backoff_delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                self._start_cooldown(delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+        logger.info("OpenAI client closed")
@@ -0,0 +1,174 @@
+import re
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("prompt_builder")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate without tokenizer: ~4 chars per token for Latin text,
+    ~2 chars per token for Hebrew and other non-ASCII text
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    ascii_chars = len(text) - non_ascii
+    return (ascii_chars + 3) // 4 + (non_ascii + 1) // 2
+
+
+def truncate(text, max_chars: int | None):
+    if max_chars is None or text is None or len(str(text)) <= max_chars:
+        return text
+    cut = str(text)[:max_chars].rsplit(" ", 1)[0]
+    return f"{cut}…"
+
+
+def dedupe_list_text(text) -> str:
+    """
+    Remove repeated items from ';' or ',' separated list, keeping order
+    """
+    if not text:
+        return text
+    items = [item.strip() for item in re.split(r"[;,]", str(text))]
+    unique = list(dict.fromkeys(item for item in items if item))
+    return ", ".join(unique)
+
+
+class RecipePromptBuilder:
+    """
+    Build LLM prompt for recipe recommendation within a token budget.
+    Long recipe fields are truncated, food lists deduped, disliked comments capped.
+    Recipes are added in ranking order while they fit the budget (at least one is always included).
+    With token_budget=None and no limits the prompt is the same as the unbounded one.
+    """
+
+    def __init__(
+        self,
+        token_budget: int | None = None,
+        max_field_chars: int | None = None,
+        max_ingredients_chars: int | None = None,
+        max_comments: int | None = None,
+        max_comment_chars: int | None = None,
+        dedupe_foods: bool = False,
+    ):
+        self.token_budget = token_budget
+        self.max_field_chars = max_field_chars
+        self.max_ingredients_chars = max_ingredients_chars
+        self.max_comments = max_comments
+        self.max_comment_chars = max_comment_chars
+        self.dedupe_foods = dedupe_foods
+
+    def build(self, recipes: list[dict], client_response: dict, recipe_id_first: bool = False) -> tuple[str, int]:
+        """
+        Return prompt and its estimated token count
+        """
+        prompt = self._build_instructions(recipe_id_first) + self._build_preferences(client_response)
+        prompt += "\nAvailable Recipes:\n"
+        tokens = estimate_tokens(prompt)
+
+        included = 0
+        for recipe in recipes:
+            block = self._build_recipe(recipe)
+            block_tokens = estimate_tokens(block)
+            if self.token_budget is not None and included and tokens + block_tokens > self.token_budget:
+                # Try shorter version without preparation method before dropping recipe
+                block = self._build_recipe(recipe, with_preparation=False)
+                block_tokens = estimate_tokens(block)
+                if tokens + block_tokens > self.token_budget:
+                    logger.info(f"Prompt token budget {self.token_budget} reached, "
+                                f"{len(recipes) - included} of {len(recipes)} recipes left out")
+                    break
+
+            prompt += block
+            tokens += block_tokens
+            included += 1
+
+        logger.info(f"Prepared prompt with {included} recipes, estimated tokens: {tokens}")
+        return prompt, tokens
+
+    @staticmethod
+    def _build_instructions(recipe_id_first: bool) -> str:
+        if recipe_id_first:
+            response_structure = (
+                "Structure your response as follows:\n"
+                "1. On the first line, in square brackets, ONLY include the internal recipe ID (e.g., [RECIPE_ID: abc123]), "
+                "but do NOT mention this to the client.\n"
+                "2. A friendly explanation of your recommendation, mentioning why it fits the client's needs.\n\n"
+            )
+        else:
+            response_structure = (
+                "Structure your response as follows:\n"
+                "1. A friendly explanation of your recommendation, mentioning why it fits the client's needs.\n"
+                "2. At the end, in square brackets, ONLY include the internal recipe ID (e.g., [RECIPE_ID: abc123]), "
+                "but do NOT mention this to the client.\n\n"
+            )
+
+        prompt = (
+            "You are a professional nutritionist helping a client choose the most suitable recipe.\n"
+            "Your task is to analyze the provided client preferences and a set of available recipes.\n"
+            "You need to find only one best match.\n"
+            "If none of the available recipes contain the specified 'must include' ingredients, "
+            "you must still choose the best match based on all *other* preferences.\n"
+            "In this case, mention this clearly and explain your reasoning.\n\n"
+        )
+        return prompt + response_structure
+
+    def _build_preferences(self, client_response: dict) -> str:
+        # Include client preferences
+        prompt = "Client Preferences:\n"
+        prompt += f"- Meal Type: {client_response.get('meal_type', 'No preference')}\n"
+        prompt += f"- Dietary Preference: {client_response.get('dietary_pref', 'No preference')}\n"
+
+        included_ingredients = client_response.get("include_ingredients", "").strip()
+        if included_ingredients:
+            prompt += (
+                "- Below are some of the client's Must Include Ingredients.\n"
+                "Use this only if the these ingredients are clear and helpful for understanding preferences. "
+                "Ignore them if they seem irrelevant or ambiguous:\n"
+                f"{included_ingredients[:350]}\n"
+            )
+        else:
+            prompt += "- User doesn't add Must Include Ingredients\n"
+
+        banned_foods = client_response.get("banned_foods", [])
+        if banned_foods:
+            prompt += f"- Forbidden Ingredients: {', '.join(banned_foods)}\n"
+
+        additional_notes = client_response.get("additional_notes", "").strip()
+        if additional_notes:
+            prompt += f"- Additional Notes: {additional_notes}\n"
+
+        disliked_comments = client_response.get("disliked_recipes_comments", [])
+        if disliked_comments:
+            if self.max_comments is not None:
+                # Latest comments are the most relevant
+                disliked_comments = disliked_comments[-self.max_comments:]
+            disliked_comments = [truncate(comment, self.max_comment_chars) for comment in disliked_comments]
+            prompt += (
+                "- Below are some of the client's comments on previously disliked recipes.\n"
+                "  Use this only if the comments are clear and helpful for understanding preferences. "
+                "Ignore them if they seem irrelevant or ambiguous.\n"
+                f"  {', '.join(disliked_comments)}\n"
+            )
+
+        return prompt
+
+    def _build_recipe(self, recipe: dict, with_preparation: bool = True) -> str:
+        recipe_id = recipe.get("id")
+        foods = recipe.get('foods', 'Unknown')
+        if self.dedupe_foods:
+            foods = dedupe_list_text(foods)
+
+        prompt = f"Recipe {recipe_id}:\n"
+        prompt += f"Name: {recipe.get('name', 'Unknown')}\n"
+        prompt += f"Subtitle: {truncate(recipe.get('sub_title', 'Unknown'), self.max_field_chars)}\n"
+        prompt += f"Preparation Time: {recipe.get('minutes', 'Unknown')} minutes\n"
+        prompt += f"Meal Type: {recipe.get('meal_type', 'Unknown')}\n"
+        prompt += f"Foods: {foods}\n"
+        prompt += f"Ingredients: {truncate(recipe.get('ingredients'), self.max_ingredients_chars)}\n"
+        if with_preparation:
+            prompt += f"Preparation Method: {truncate(recipe.get('preparation_method', 'Unknown'), self.max_field_chars)}\n"
+        # We don't expose this to the user, but include ID for extraction
+        prompt += f"[RECIPE_ID: {recipe_id}]\n\n"
+        return prompt
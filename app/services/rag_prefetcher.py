@@ -0,0 +1,151 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable
+from app.config.logger_settings import get_logger
+from app.utils.unitofwork import IUnitOfWork
+from app.api.dtos.food_dtos import FoodDTO
+from app.api.dtos.recipe_ratings_dtos import RecipeRatingsDTO
+from app.api.dtos.recipe_user_preferences_dto import RecipeUserPreferencesDTO
+from app.api.services.food_service import FoodService
+from app.api.services.recipe_ratings_service import RecipeRatingsService
+from app.services.ascii_service import ASCIIService
+from app.services.rag_service import AskRagForRecipe
+
+
+logger = get_logger("rag_prefetcher")
+
+RESTRICTIONS = "restrictions"
+DISLIKED_RECIPES = "disliked_recipes"
+QUERY_EMBEDDING = "query_embedding"
+
+
+async def fetch_restriction_foods(
+    uow: IUnitOfWork, ascii_result_link: str | None
+) -> tuple[list[str], list[FoodDTO], list[FoodDTO]] | None:
+    """
+    Lab codes, high and low sensitivity foods from user's ASCII result file, None without result link
+    """
+    if not ascii_result_link:
+        return None
+    file_id = ascii_result_link.split("/d/")[1].split("/view")[0]
+    logger.debug(f"File ID: {file_id}")
+    high_sensitivity_foods_codes, low_sensitivity_foods_codes = await ASCIIService.process_csv(file_id)
+    high_sensitivity_foods, low_sensitivity_foods = await asyncio.gather(
+        FoodService().get_foods_by_list_lab_codes(uow, high_sensitivity_foods_codes),
+        FoodService().get_foods_by_list_lab_codes(uow, low_sensitivity_foods_codes),
+    )
+    return high_sensitivity_foods_codes + low_sensitivity_foods_codes, high_sensitivity_foods, low_sensitivity_foods
+
+
+class RagPrefetcher:
+    """
+    Speculative background fetches of RAG inputs, keyed by WhatsApp number.
+    Started once per flow while user is still answering menus, a new flow cancels jobs left by
+    an abandoned one. The final step takes results which are ready and cancels the rest,
+    then fetches them itself. Jobs never write user session,
+    results are applied by the consumer. Unclaimed jobs are dropped after 'ttl' seconds.
+    Query embedding is not taken: it lands in the embedding cache, and a final request for the
+    same text still in flight joins the prefetch call (embedding calls are single-flight).
+    """
+
+    def __init__(self, ttl: float = 600):
+        self._ttl = ttl
+        self._jobs: dict[str, dict[str, tuple[asyncio.Task, float]]] = {}
+        self._query_texts: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, key: str, name: str, job: Callable[[], Awaitable[Any]], restart: bool = False) -> None:
+        """
+        Run 'job' in background, a running job with the same name is kept unless 'restart'
+        """
+        self._evict_expired()
+        jobs = self._jobs.setdefault(key, {})
+        if name in jobs:
+            if not restart:
+                return
+            jobs.pop(name)[0].cancel()
+
+        task = asyncio.create_task(job())
+        task.add_done_callback(lambda t: self._log_failure(key, name, t))
+        jobs[name] = (task, time.monotonic())
+
+    def take(self, key: str, name: str) -> tuple[bool, Any]:
+        """
+        (True, result) when job finished successfully, otherwise job is cancelled and (False, None) returned
+        """
+        task, _ = self._jobs.get(key, {}).pop(name, (None, 0.0))
+        if task is None:
+            return False, None
+        if task.done() and not task.cancelled() and task.exception() is None:
+            self.hits += 1
+            logger.info(f"Prefetched '{name}' used for {key}")
+            return True, task.result()
+
+        task.cancel()
+        self.misses += 1
+        logger.info(f"Prefetched '{name}' not ready for {key}, cancelled")
+        return False, None
+
+    def prefetch_rag_inputs(
+        self,
+        key: str,
+        uow: IUnitOfWork,
+        user_id: int,
+        ascii_result_link: str | None,
+        restrictions_loaded: bool,
+    ) -> None:
+        """
+        Start restrictions and disliked recipes fetches for a new flow,
+        results of a previous flow of the same user are never reused
+        """
+        self.cancel(key)
+        if not restrictions_loaded:
+            self.start(key, RESTRICTIONS, lambda: fetch_restriction_foods(uow, ascii_result_link))
+        self.start(key, DISLIKED_RECIPES, lambda: RecipeRatingsService.get_disliked_recipes_by_user_id(uow, user_id))
+
+    def prefetch_query_embedding(self, key: str, rag_service: AskRagForRecipe, preferences: RecipeUserPreferencesDTO) -> None:
+        """
+        Embed query for preferences known so far, restarted only when query text changed
+        """
+        query_text = rag_service.build_query_text(preferences.model_dump())
+        if self._query_texts.get(key) == query_text and QUERY_EMBEDDING in self._jobs.get(key, {}):
+            return
+        self._query_texts[key] = query_text
+        self.start(key, QUERY_EMBEDDING, lambda: rag_service.get_embedding(query_text), restart=True)
+
+    async def get_restriction_foods(
+        self, key: str, uow: IUnitOfWork, ascii_result_link: str | None
+    ) -> tuple[list[str], list[FoodDTO], list[FoodDTO]] | None:
+        ready, result = self.take(key, RESTRICTIONS)
+        if ready:
+            return result
+        return await fetch_restriction_foods(uow, ascii_result_link)
+
+    async def get_disliked_recipes(self, key: str, uow: IUnitOfWork, user_id: int) -> list[RecipeRatingsDTO]:
+        ready, result = self.take(key, DISLIKED_RECIPES)
+        if ready:
+            return result
+        return await RecipeRatingsService.get_disliked_recipes_by_user_id(uow, user_id)
+
+    def cancel(self, key: str) -> None:
+        self._query_texts.pop(key, None)
+        for task, _ in self._jobs.pop(key, {}).values():
+            task.cancel()
+
+    def stop(self) -> None:
+        for key in list(self._jobs):
+            self.cancel(key)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "pending": sum(len(jobs) for jobs in self._jobs.values())}
+
+    def _evict_expired(self) -> None:
+        deadline = time.monotonic() - self._ttl
+        for key in [key for key, jobs in self._jobs.items() if all(started < deadline for _, started in jobs.values())]:
+            self.cancel(key)
+
+    @staticmethod
+    def _log_failure(key: str, name: str, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Prefetch '{name}' failed for {key}: {task.exception()}")
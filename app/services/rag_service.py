@@ -1,76 +1,142 @@
+import os
 import re
 import csv
-import html
-import httpx
+import json
+import time
+import asyncio
+import hashlib
+from dataclasses import asdict
+from typing import Iterator, Callable
 from supabase import AsyncClient
 from app.config.logger_settings import get_logger
 from app.api.dtos.recipe_user_preferences_dto import RecipeUserPreferencesDTO
 from app.api.dtos.ask_recipe_dtos import AskRecipeAnswerDTO
+from app.services.vector_index import RecipeVectorIndex, SIMILARITY_THRESHOLD
+from app.services.ivf_index import RecipeIVFIndex
+from app.utils.cache.embedding_cache import EmbeddingCache
+from app.utils.cache.recommendation_cache import RecommendationCache, CachedRecommendation
+from app.services.openai_client import OpenAIClient
+from app.services.prompt_builder import RecipePromptBuilder
+from app.services.recipe_reranker import RecipeReranker, RerankResult
+from app.services.food_matcher import get_banned_foods_matcher
+from app.services.recipe_catalog import RecipeCatalog
+from app.services.recipe_food_matrix import RecipeFoodMatrix
+from app.services.recipe_message_renderer import RecipeMessageRenderer
+from app.services.llm_usage_tracker import LLMUsageTracker, LLMUsageRecord, estimate_cost
+from app.utils.stage_timer import StageTimer
+from app.utils.single_flight import SingleFlight
 
 
 logger = get_logger("rag_service")
 
-
-
-def clean_text(text: str) -> str:
-    if not text:
-        return ""
-    text = html.unescape(text)
-    text = text.replace("\\'", "'")
-    text = text.replace('\r\n', '\n')
-    text = text.replace('\r', '\n')
-    text = re.sub(r'\n{2,}', '\n', text)
-    return text.strip()
+EMBEDDING_MODEL = "text-embedding-ada-002"
+RECIPE_ID_PATTERN = re.compile(r"\[RECIPE_ID:\s*(\w+)\]")
 
 
 class RagService:
-    def __init__(self, openai_key: str):
-        self._openai_key = openai_key
+    def __init__(self, openai_client: OpenAIClient, embedding_cache: EmbeddingCache | None = None):
+        self._openai_client = openai_client
+        self._embedding_cache = embedding_cache
+        self._embedding_flight = SingleFlight()
 
     async def get_embedding(self, text: str) -> list[float]:
-        """Create embedding for given text using OpenAI API"""
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                "https://api.openai.com/v1/embeddings",
-                json={
-                    "input": text,
-                    "model": "text-embedding-ada-002"
-                },
-                headers={
-                    "Authorization": f"Bearer {self._openai_key}"
-                }
-            )
+        """
+        Create embedding for given text using OpenAI API, served from cache when possible.
+        Concurrent requests for the same text share one API call
+        """
+        if self._embedding_cache is not None:
+            embedding = await self._embedding_cache.get(text, EMBEDDING_MODEL)
+            if embedding is not None:
+                return embedding
 
-            if response.status_code != 200:
-                raise Exception(f"Error fetching embedding: {response.text}")
+        embedding, shared = await self._embedding_flight.do((EMBEDDING_MODEL, text), lambda: self._request_and_cache_embedding(text))
+        if shared:
+            logger.info("Embedding request coalesced with in-flight call")
+        return embedding
 
-            data = response.json()
-            return data['data'][0]['embedding']
+    async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeddings for many texts, cache misses are requested with one API call
+        """
+        embeddings: dict[str, list[float]] = {}
+        if self._embedding_cache is not None:
+            for text in texts:
+                embedding = await self._embedding_cache.get(text, EMBEDDING_MODEL)
+                if embedding is not None:
+                    embeddings[text] = embedding
+
+        missing = [text for text in dict.fromkeys(texts) if text not in embeddings]
+        if missing:
+            for text, embedding in zip(missing, await self._request_embeddings(missing)):
+                embeddings[text] = embedding
+                if self._embedding_cache is not None:
+                    await self._embedding_cache.set(text, EMBEDDING_MODEL, embedding)
+        return [embeddings[text] for text in texts]
+
+    async def _request_and_cache_embedding(self, text: str) -> list[float]:
+        embedding = await self._request_embedding(text)
+        if self._embedding_cache is not None:
+            await self._embedding_cache.set(text, EMBEDDING_MODEL, embedding)
+        return embedding
+
+    async def _request_embedding(self, text: str) -> list[float]:
+        embeddings = await self._request_embeddings([text])
+        return embeddings[0]
+
+    async def _request_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Create embeddings for many texts with one OpenAI API call"""
+        response = await self._openai_client.post(
+            "embeddings",
+            {
+                "input": texts,
+                "model": EMBEDDING_MODEL
+            }
+        )
+
+        if response.status_code != 200:
+            raise Exception(f"Error fetching embedding: {response.text}")
+
+        data = response.json()
+        return [item['embedding'] for item in sorted(data['data'], key=lambda item: item['index'])]
 
 
 class SaveRecipesEmbeddings(RagService):
-    def __init__(self, openai_key: str, supabase_client: AsyncClient):
+    """
+    Async ingestion of recipe embeddings from CSV into Supabase.
+    Recipes are streamed from the CSV, embedded in batches and bulk-upserted.
+    A checkpoint file keeps content hash per recipe, so unchanged recipes are skipped
+    and a crashed run continues from the last saved batch.
+    """
+
+    def __init__(
+        self,
+        openai_client: OpenAIClient,
+        supabase_client: AsyncClient,
+        checkpoint_path: str | None = None,
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+    ):
         self._supabase_client = supabase_client
         self.table_for_recipe_embeddings = "recipe_embeddings"
-        super().__init__(openai_key)
+        self._checkpoint_path = checkpoint_path
+        self._batch_size = batch_size
+        self._max_concurrency = max_concurrency
+        self._checkpoint_lock = asyncio.Lock()
+        super().__init__(openai_client)
 
     @staticmethod
-    def _load_recipes_from_csv(file_path: str) -> list[dict[str, str]]:
-        recipes = []
+    def _iter_recipes_from_csv(file_path: str) -> Iterator[tuple[str, str, str, str, str, str, str, str, str]]:
         with open(file_path, newline='', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile, delimiter=',')
             reader.fieldnames = [name.lstrip("\ufeff") for name in reader.fieldnames]
             reader.fieldnames[0] = "id"
 
             for row in reader:
-                recipe = (
+                yield (
                     row["id"], row["name"], row["sub_title"], row["preparation_method"], 
                     row["nut_recommend"], row["comment"], row["minutes"], row["meal_types"], 
                     row["ingredients"]
                 )
-                recipes.append(recipe)
-
-        return recipes
     
     @staticmethod
     def _build_recipe_text(recipe: tuple[str, str, str, str, str, str, str, str, str]) -> tuple[str, str]:
@@ -80,96 +146,200 @@ class SaveRecipesEmbeddings(RagService):
         text += f"Preparation Time: {minutes} minutes\nMeal Type: {meal_type}\nIngredients: {ingredients}"
         return recipe_id, text
 
-    def _upsert_embedding_to_supabase(self, recipe_id: str, embedding: list[float]):
+    @staticmethod
+    def _content_hash(text: str) -> str:
+        return hashlib.sha256(f"{EMBEDDING_MODEL}\n{text}".encode("utf-8")).hexdigest()
+
+    def _load_checkpoint(self) -> dict[str, str]:
         """
-        Save recipe embedding to Supabase
+        Load {recipe_id: content_hash} of recipes already saved to Supabase
         """
-
-        data = {
-            "recipe_id": recipe_id,
-            "embedding_vector": embedding
-        }
-        response = self._supabase_client.table(self.table_for_recipe_embeddings).upsert(data).execute()
+        if not self._checkpoint_path or not os.path.exists(self._checkpoint_path):
+            return {}
+        with open(self._checkpoint_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, checkpoint: dict[str, str]) -> None:
+        if not self._checkpoint_path:
+            return
+        os.makedirs(os.path.dirname(self._checkpoint_path), exist_ok=True)
+        tmp_path = f"{self._checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self._checkpoint_path)
+
+    async def _upsert_embeddings_to_supabase(self, rows: list[dict]):
+        """
+        Save batch of recipe embeddings to Supabase with one request
+        """
+        response = await self._supabase_client.table(self.table_for_recipe_embeddings).upsert(rows).execute()
         return response
 
-    def save_recipes(self, recipes_csv_path: str):
+    def _iter_changed_batches(
+        self, recipes_csv_path: str, checkpoint: dict[str, str], stats: dict[str, int]
+    ) -> Iterator[list[tuple[str, str, str]]]:
+        """
+        Yield batches of (recipe_id, text, content_hash) for new or changed recipes
+        """
+        batch = []
+        for recipe in self._iter_recipes_from_csv(recipes_csv_path):
+            recipe_id, text = self._build_recipe_text(recipe)
+            content_hash = self._content_hash(text)
+            if checkpoint.get(recipe_id) == content_hash:
+                stats["skipped"] += 1
+                continue
+
+            batch.append((recipe_id, text, content_hash))
+            if len(batch) >= self._batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    async def _process_batch(
+        self,
+        batch: list[tuple[str, str, str]],
+        checkpoint: dict[str, str],
+        stats: dict[str, int],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        try:
+            embeddings = await self._request_embeddings([text for _, text, _ in batch])
+            rows = [
+                {"recipe_id": recipe_id, "embedding_vector": embedding}
+                for (recipe_id, _, _), embedding in zip(batch, embeddings)
+            ]
+            await self._upsert_embeddings_to_supabase(rows)
+
+            async with self._checkpoint_lock:
+                for recipe_id, _, content_hash in batch:
+                    checkpoint[recipe_id] = content_hash
+                self._save_checkpoint(checkpoint)
+
+            stats["embedded"] += len(batch)
+            logger.debug(f"Saved embeddings for recipes {[recipe_id for recipe_id, _, _ in batch]}")
+
+        except Exception as e:
+            # Recipes of failed batch stay out of checkpoint and will be retried on next run
+            stats["failed"] += len(batch)
+            logger.error(f"Failed to save embeddings batch of {len(batch)} recipes: {e}")
+
+        finally:
+            semaphore.release()
+
+    async def save_recipes(self, recipes_csv_path: str) -> dict[str, int]:
         """
         Prepare embedings from CSV file and save to Supabase
         """
 
-        recipes = self._load_recipes_from_csv(recipes_csv_path)
-        recipe_embeddings = {}
+        checkpoint = self._load_checkpoint()
+        stats = {"embedded": 0, "skipped": 0, "failed": 0}
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        tasks = set()
 
-        for recipe in recipes:
-            recipe_id, text = self._build_recipe_text(recipe)
-            logger.debug(f"Processing recipe {recipe_id}...")
-            embedding = self.get_embedding(text)
-            recipe_embeddings[recipe_id] = embedding
-            logger.debug(f"Embedding created for recipe {recipe_id}")
-            
-            # Save in Supabase
-            self._upsert_embedding_to_supabase(recipe_id, embedding)
+        for batch in self._iter_changed_batches(recipes_csv_path, checkpoint, stats):
+            await semaphore.acquire()
+            task = asyncio.create_task(self._process_batch(batch, checkpoint, stats, semaphore))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+        logger.info(f"Recipes embeddings saved: {stats}")
+        return stats
 
 
 class AskRagForRecipe(RagService):
-    def __init__(self, openai_key: str, supabase_client: AsyncClient, csv_file_path: str):
+    def __init__(
+        self,
+        openai_client: OpenAIClient,
+        supabase_client: AsyncClient,
+        csv_file_path: str,
+        vector_index: RecipeVectorIndex | RecipeIVFIndex | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        recommendation_cache: RecommendationCache | None = None,
+        stream_completions: bool = False,
+        prompt_builder: RecipePromptBuilder | None = None,
+        reranker: RecipeReranker | None = None,
+        recipe_catalog: RecipeCatalog | None = None,
+        message_renderer: RecipeMessageRenderer | None = None,
+        usage_tracker: LLMUsageTracker | None = None,
+        chat_model: str = "gpt-4",
+        fallback_chat_model: str = "gpt-4o-mini",
+        recipe_food_matrix: RecipeFoodMatrix | None = None,
+    ):
         self._supabase_client = supabase_client
         self._csv_file_path = csv_file_path
         self._source_table = "recipes_view_data"
-        super().__init__(openai_key)
+        self._vector_index = vector_index
+        self._recommendation_cache = recommendation_cache
+        self._stream_completions = stream_completions
+        self._prompt_builder = prompt_builder or RecipePromptBuilder()
+        self._reranker = reranker
+        self._recipe_catalog = recipe_catalog
+        self._message_renderer = message_renderer or RecipeMessageRenderer()
+        self._usage_tracker = usage_tracker
+        self._chat_model = chat_model
+        self._fallback_chat_model = fallback_chat_model
+        self._recipe_food_matrix = recipe_food_matrix
+        self._recommendation_flight = SingleFlight()
+        super().__init__(openai_client, embedding_cache)
     
     async def get_recipe_info_message(self, recipe: dict) -> str:
         """
         Prepare message for WhatsApp with recipe info
         """
-
-        preparation = clean_text(recipe.get('preparation_method', '')).replace('\\r\\n', '\n')
-        ingredients = clean_text(recipe.get('ingredients', '')).replace(';', '\n')
-        nut_recommend = clean_text(recipe.get('nut_recommend', '')).replace('\\r\\n', '\n')
-        comment = clean_text(recipe.get('comment', '')).replace('\\r\\n', '\n')
-
-        name = clean_text(recipe.get('name', ''))
-        sub_title = clean_text(recipe.get('sub_title', ''))
-        meal_type = clean_text(recipe.get('meal_type', '')).replace(';', ', ')
-        minutes = recipe.get('minutes', '')
-
-        recipe_details = (
-            f"\n\n*🍽 Recipe structure:*\n"
-            f"*Name:* {name}\n"
-            f"*Sub title:* {sub_title}\n"
-            f"*Meal type:* {meal_type}\n"
-            f"*Minutes:* {minutes}\n"
-            f"*Preparation Method:*\n{preparation}\n"
-            f"*Ingredients:*\n{ingredients}\n"
-            f"*Nut recommend:*\n{nut_recommend}\n"
-            f"*Comment:*\n{comment}\n"
-        )
-        return recipe_details
+        return self._message_renderer.render(recipe)
     
     async def _load_recipes_from_db(self, recipe_ids: list[int]) -> list[dict[str, str]]:
         """
-        Load recipes from Supabase table 'recipes_view_data'
+        Load recipes from recipe catalog, or from Supabase table 'recipes_view_data' when there is no catalog.
+        Recipes from catalog keep the order of 'recipe_ids'
         """
-        response = await self._supabase_client.table(self._source_table).select("*").execute()
         if not recipe_ids:
             return []
 
-        response = await self._supabase_client.table(self._source_table).select("*").in_("id", recipe_ids).execute()    
+        if self._recipe_catalog is not None:
+            return await self._recipe_catalog.get_recipes(recipe_ids)
+
+        response = await self._supabase_client.table(self._source_table).select("*").in_("id", recipe_ids).execute()
         recipes = response.data  # This is a list of dicts
         return recipes
 
-    async def ask_recipe(self, client_response: RecipeUserPreferencesDTO, recipes_id: list[int] = None) -> AskRecipeAnswerDTO: #tuple[list[str, str], int, str]:
+    async def ask_recipe(
+        self,
+        client_response: RecipeUserPreferencesDTO,
+        recipes_id: list[int] = None,
+        ingredient_hits: dict[int, int] | None = None,
+        similarities: dict[int, float] | None = None,
+        usage_state: str = "recommendation",
+    ) -> AskRecipeAnswerDTO: #tuple[list[str, str], int, str]:
+        """
+        Find best recipe for client preferences.
+        Recipe details are prepared as soon as streamed LLM answer contains recipe ID,
+        while the explanation is still generating, and are sent by the caller after it.
+        'recipes_id' is a ranked list (e.g. from hybrid retrieval), its order is kept for LLM candidates.
+        'ingredient_hits' is {recipe_id: matched ingredients count} from fuzzy search and
+        'similarities' is {recipe_id: vector similarity}, both used by local reranker.
+        When reranker finds a clear winner, recipe is chosen locally without LLM.
+        LLM usage is accounted under 'usage_state'. Over the daily LLM budget recipe is chosen
+        locally when reranker is enabled, otherwise the cheaper fallback chat model is used.
+        """
         final_answer = AskRecipeAnswerDTO()
+        timer = StageTimer()
+        final_answer.stage_timings_ms = timer.timings
 
         client_response = client_response.model_dump()
         logger.info(f" ===> Client request for RAG: {client_response}")
         if recipes_id is None:
-            query_embedding = await self._get_query_embedding(client_response)
-            similar_recipes = await self._search_similar_embeddings(
-                query_embedding=query_embedding,
-                match_count=15
-            )
+            with timer.stage("embedding"):
+                query_embedding = await self._get_query_embedding(client_response)
+            with timer.stage("search"):
+                similar_recipes = await self._search_similar_embeddings(query_embedding=query_embedding, match_count=15)
             recipe_ids = [int(r["recipe_id"]) for r in similar_recipes]
+            similarities = {int(r["recipe_id"]): r["similarity"] for r in similar_recipes}
             logger.info(f"Recipes ID from RAG: {recipe_ids}")
 
         else:
@@ -177,14 +347,31 @@ class AskRagForRecipe(RagService):
             recipe_ids = recipes_id
         
         final_answer.recipes_id_from_rag = recipe_ids # Add recipes id from RAG
-        recipes = await self._load_recipes_from_db(recipe_ids)
-
-        banned_foods = client_response.get("banned_foods", [])
-        disliked_recipes_id = client_response.get("disliked_recipes_id", [])
+        banned_foods = client_response.get("banned_foods") or []
+        banned_food_ids = client_response.get("banned_food_ids")
+        # Food ids are checked against 'recipes_foods' bitsets, names only for recipes missing there
+        recipe_food_matrix = (
+            self._recipe_food_matrix
+            if banned_food_ids is not None and self._recipe_food_matrix is not None and self._recipe_food_matrix.is_loaded
+            else None
+        )
+        with timer.stage("load"):
+            recipes = await self._load_recipes_from_db(recipe_ids)
+            if self._recipe_catalog is not None:
+                foods_lower = self._recipe_catalog.foods_lower(recipe_ids)
+            elif recipe_food_matrix is None:
+                foods_lower = {r["id"]: r["foods"].lower() for r in recipes if r.get("foods")}
+            else:
+                foods_lower = None
+
+        disliked_recipes_id = client_response.get("disliked_recipes_id") or []
         logger.info(f"Banned foods: {banned_foods}")
         logger.info(f"Disliked recipes: {disliked_recipes_id}")
         # logger.info(f"Recipes: {recipes[:10]}")
-        filtered_recipes, filtered_disliked_id, filtered_banned_id = self._filter_recipes(recipes, banned_foods, disliked_recipes_id)
+        with timer.stage("filter"):
+            filtered_recipes, filtered_disliked_id, filtered_banned_id = self._filter_recipes(
+                recipes, banned_foods, disliked_recipes_id, foods_lower, banned_food_ids, recipe_food_matrix
+            )
         for i in filtered_recipes:
             logger.debug(f"Filtered recipe {i}")
 
@@ -198,10 +385,46 @@ class AskRagForRecipe(RagService):
             logger.warning(f"Filtered all recipes!")
             return None
         
-        result_after_asc_ai, recipe_id, prompt_for_llm = await self._ask_openai_for_best_recipe(filtered_recipes[:10], client_response)
+        rerank_result = None
+        if self._reranker is not None:
+            with timer.stage("rerank"):
+                rerank_result = self._reranker.rerank(filtered_recipes, client_response, similarities, ingredient_hits)
+            logger.info(f"Rerank top scores: {[(r['id'], round(s, 3)) for r, s in zip(rerank_result.recipes[:3], rerank_result.scores[:3])]}, "
+                        f"margin: {rerank_result.margin:.3f}")
+            # LLM gets candidates in local score order, so the best ones survive the prompt token budget
+            filtered_recipes = rerank_result.recipes
+            final_answer.recipes_after_filter = filtered_recipes
+            final_answer.recipes_id_after_filter = [r["id"] for r in filtered_recipes]
+
+            over_budget = self._usage_tracker is not None and self._usage_tracker.is_over_budget()
+            if over_budget or self._reranker.is_confident(rerank_result):
+                return await self._select_recipe_locally(final_answer, rerank_result, client_response, ingredient_hits)
+
+        candidates = filtered_recipes[:10]
+        recipe_details_tasks: dict[int, asyncio.Task] = {}
+
+        def on_recipe_id(early_recipe_id: str):
+            # Start preparing recipe details in parallel with the rest of LLM answer
+            recipe = next((r for r in candidates if str(r["id"]) == early_recipe_id), None)
+            if recipe is not None and recipe["id"] not in recipe_details_tasks:
+                logger.info(f"Recipe ID {early_recipe_id} detected in LLM stream")
+                recipe_details_tasks[recipe["id"]] = asyncio.create_task(
+                    self.get_recipe_info_message(recipe)
+                )
+
+        try:
+            result_after_asc_ai, recipe_id, prompt_for_llm, usage = await self._ask_openai_for_best_recipe(
+                candidates, client_response, on_recipe_id=on_recipe_id, timer=timer, usage_state=usage_state
+            )
+        except Exception:
+            for task in recipe_details_tasks.values():
+                task.cancel()
+            raise
+
         final_answer.ai_result_recomendation = result_after_asc_ai
         final_answer.ai_result_recipe_id = recipe_id
         final_answer.prompt_for_llm = prompt_for_llm
+        final_answer.llm_usage = usage
 
         logger.debug(f"Result after ASC AI:\n{result_after_asc_ai}\n Recipe_ID: {recipe_id}")
 
@@ -236,7 +459,13 @@ class AskRagForRecipe(RagService):
         #     f"*Comment:*\n{comment}\n"
         # )
 
-        recipe_details = await self.get_recipe_info_message(selected_recipe)
+        recipe_details_task = recipe_details_tasks.pop(selected_recipe["id"], None)
+        for task in recipe_details_tasks.values():
+            task.cancel()
+        if recipe_details_task is not None:
+            recipe_details = await recipe_details_task
+        else:
+            recipe_details = await self.get_recipe_info_message(selected_recipe)
         final_answer.ai_result_recipe_details = recipe_details
         final_answer.ai_result_recipe_name = selected_recipe.get('name')
         logger.debug(f"Final response: {final_answer}")
@@ -246,10 +475,55 @@ class AskRagForRecipe(RagService):
         # logger.debug(f"Final response:\n{final_response}\n Recipe_ID: {recipe_id}")
         # return final_response, recipe_id, selected_recipe.get('name')
     
-    async def _search_similar_embeddings(self, query_embedding: list[float], match_count: int = 10) -> list[str]:
+    async def search_recipes(self, client_response: dict, match_count: int = 15) -> list[dict]:
         """
-        Search for similar embeddings in Supabase using cosine similarity
+        Embedding search for client preferences, rows {'recipe_id', 'similarity'} ordered by similarity
         """
+        query_embedding = await self._get_query_embedding(client_response)
+        return await self.search_by_embedding(query_embedding, match_count)
+
+    async def search_by_embedding(self, query_embedding: list[float], match_count: int = 15) -> list[dict]:
+        return await self._search_similar_embeddings(query_embedding=query_embedding, match_count=match_count)
+
+    async def _select_recipe_locally(
+        self,
+        final_answer: AskRecipeAnswerDTO,
+        rerank_result: RerankResult,
+        client_response: dict,
+        ingredient_hits: dict[int, int] | None,
+    ) -> AskRecipeAnswerDTO:
+        """
+        Fill answer with the reranker winner and templated explanation instead of LLM recommendation
+        """
+        selected_recipe = rerank_result.best
+        signals = rerank_result.signals[0]
+        logger.info(f"Recipe {selected_recipe['id']} selected locally, margin: {rerank_result.margin:.3f}, signals: {signals}")
+
+        final_answer.ai_result_recomendation = self._reranker.explain(
+            selected_recipe, client_response, signals, (ingredient_hits or {}).get(selected_recipe["id"], 0)
+        )
+        final_answer.ai_result_recipe_id = selected_recipe["id"]
+        final_answer.prompt_for_llm = (
+            f"Recipe selected locally without LLM, score margin {rerank_result.margin:.3f}\n"
+            + "\n".join(
+                f"Recipe {recipe['id']}: score {score:.3f}, signals {recipe_signals}"
+                for recipe, score, recipe_signals in zip(rerank_result.recipes[:10], rerank_result.scores, rerank_result.signals)
+            )
+        )
+        final_answer.ai_result_recipe_details = await self.get_recipe_info_message(selected_recipe)
+        final_answer.ai_result_recipe_name = selected_recipe.get('name')
+        return final_answer
+
+    async def _search_similar_embeddings(self, query_embedding: list[float], match_count: int = 10) -> list[dict]:
+        """
+        Search for similar embeddings using cosine similarity.
+        Uses in-process vector index (exact or IVF) when loaded, otherwise Supabase RPC 'match_recipes'
+        """
+        if self._vector_index is not None and self._vector_index.is_loaded:
+            filtered_results = self._vector_index.search(query_embedding, match_count, SIMILARITY_THRESHOLD)
+            logger.debug(f"Filtered results from vector index [{len(filtered_results)}]: {filtered_results}")
+            return filtered_results
+
         response_data = await self._supabase_client.rpc("match_recipes", {  #"match_recipes" "match_recipes_ingridients"  match_ingridients_embeddings,{
                 "query_embedding": query_embedding,
                 "match_count": match_count
@@ -260,7 +534,7 @@ class AskRagForRecipe(RagService):
         if response_data:
             logger.debug(f"Found similar recipes [{len(response_data)}]: {response_data}")
             results = response_data
-            filtered_results = [r for r in results if r["similarity"] >= 0.75]
+            filtered_results = [r for r in results if r["similarity"] >= SIMILARITY_THRESHOLD]
             logger.debug(f"Filtered results [{len(filtered_results)}]: {filtered_results}")
             return filtered_results
         else:
@@ -268,13 +542,38 @@ class AskRagForRecipe(RagService):
             return []
     
     @staticmethod
-    def _filter_recipes(candidate_recipes, banned_foods_list: list[str], disliked_recipes_id: list[int]) -> tuple[list[dict], list[int], list[int]]:
+    def _filter_recipes(
+        candidate_recipes,
+        banned_foods_list: list[str],
+        disliked_recipes_id: list[int],
+        foods_lower: dict[int, str] | None = None,
+        banned_food_ids: list[int] | None = None,
+        recipe_food_matrix: RecipeFoodMatrix | None = None,
+    ) -> tuple[list[dict], list[int], list[int]]:
         """
         Filter recipes that contain banned foods or disliked recipes.
+        With 'recipe_food_matrix' recipes are banned by exact food ids from 'recipes_foods'.
+        Recipes missing in the matrix (or all, without it) are checked by banned food names
+        with one compiled matcher per distinct banned list,
+        'foods_lower' is {recipe_id: lowercased foods} prepared when recipes are loaded.
         """
+        foods_lower = foods_lower or {}
         filtered = []
         filtered_disliked = []
         filtered_banned = []
+        banned_by_id = set()
+        checked_by_id = set()
+        if recipe_food_matrix is not None:
+            candidate_ids = [recipe["id"] for recipe in candidate_recipes]
+            banned_by_id = recipe_food_matrix.recipes_with_any(candidate_ids, banned_food_ids or [])
+            checked_by_id = recipe_food_matrix.known(candidate_ids)
+        # Names are matched only when some recipe is not covered by food ids
+        banned_matcher = (
+            get_banned_foods_matcher(banned_foods_list)
+            if any(recipe["id"] not in checked_by_id for recipe in candidate_recipes)
+            else None
+        )
+        disliked_recipes_id = set(disliked_recipes_id or [])
         for recipe in candidate_recipes:
             if recipe["id"] in disliked_recipes_id:
                 # Skip recipes that are disliked
@@ -287,10 +586,14 @@ class AskRagForRecipe(RagService):
                 logger.critical(f"Catch recipe without foods: {recipe}")
                 continue
 
-            # Assume recipe includes a field "ingredients" that is a string listing the ingredients.
-            if any(banned.lower() in recipe["foods"].lower() for banned in banned_foods_list):
+            if recipe["id"] in checked_by_id:
+                banned = "food id" if recipe["id"] in banned_by_id else None
+            else:
+                # Assume recipe includes a field "ingredients" that is a string listing the ingredients.
+                banned = banned_matcher.search(foods_lower.get(recipe["id"]) or recipe["foods"].lower()) if banned_matcher else None
+            if banned:
                 # Skip recipes that contain any banned ingredient
-                logger.debug(f"Skipping recipe {recipe['id']} due to banned ingredient")
+                logger.debug(f"Skipping recipe {recipe['id']} due to banned ingredient '{banned}'")
                 filtered_banned.append(recipe["id"])
                 continue
 
@@ -302,20 +605,22 @@ class AskRagForRecipe(RagService):
         """
         Get query embedding from client response
         """
+        logger.info(f"meal_type: {client_response.get('meal_type')},\ndietary_pref: {client_response.get('dietary_preference')},\n"
+                    f"include_ingredients: {client_response.get('include_ingredients')},\nadditional_notes: {client_response.get('additional_notes')}")
+        query_text = self.build_query_text(client_response)
+        logger.info(f"Query text for embeding: {query_text}")
+        result = await self.get_embedding(query_text)
+        # logger.debug(f"Embeding for query: {result}")
+        return result
 
+    def build_query_text(self, client_response: dict) -> str:
+        """
+        Text which is embedded for client preferences
+        """
         meal_type = client_response.get("meal_type", "No preference")
         dietary_pref=client_response.get("dietary_preference", "No preference")
         include_ingredients = client_response.get("include_ingredients", "")
         additional_notes = client_response.get("additional_notes", "")
-        logger.info(f"meal_type: {meal_type},\ndietary_pref: {dietary_pref},\ninclude_ingredients: {include_ingredients},\nadditional_notes: {additional_notes}")
-
-        query_text = self.__build_query_text(
-            meal_type=meal_type,
-            dietary_pref=dietary_pref,
-            include_ingredients=include_ingredients,
-            additional_notes=additional_notes,
-            language="en",
-        )
 
         # query_text = self.__build_query_text(
         #     meal_type=client_response.meal_type,
@@ -323,10 +628,13 @@ class AskRagForRecipe(RagService):
         #     include_ingredients=client_response.include_ingredients,
         #     additional_notes=client_response.additional_notes,
         # )
-        logger.info(f"Query text for embeding: {query_text}")
-        result = await self.get_embedding(query_text)
-        # logger.debug(f"Embeding for query: {result}")
-        return result
+        return self.__build_query_text(
+            meal_type=meal_type,
+            dietary_pref=dietary_pref,
+            include_ingredients=include_ingredients,
+            additional_notes=additional_notes,
+            language="en",
+        )
     
     def get_recipes_from_csv_by_ids(self, file_path: str, recipe_ids: list[str]) -> list[dict]:
         """
@@ -456,83 +764,133 @@ class AskRagForRecipe(RagService):
     #     logger.debug(f"Result for client response: {result}")
     #     return result
 
-    def _prepare_ai_prompt(self, recipes, client_response):
+    def _prepare_ai_prompt(self, recipes, client_response, recipe_id_first: bool = False):
         """
         Take recipes from RAG and prepare AI prompt, in natural language, with fallback logic.
+        With 'recipe_id_first' the model is asked to start the answer with recipe ID,
+        so it can be detected early in streamed response.
+        Returns prompt and its estimated token count.
         """
-        prompt = (
-            "You are a professional nutritionist helping a client choose the most suitable recipe.\n"
-            "Your task is to analyze the provided client preferences and a set of available recipes.\n"
-            "You need to find only one best match.\n"
-            "If none of the available recipes contain the specified 'must include' ingredients, "
-            "you must still choose the best match based on all *other* preferences.\n"
-            "In this case, mention this clearly and explain your reasoning.\n\n"
-
-            "Structure your response as follows:\n"
-            "1. A friendly explanation of your recommendation, mentioning why it fits the client's needs.\n"
-            "2. At the end, in square brackets, ONLY include the internal recipe ID (e.g., [RECIPE_ID: abc123]), "
-            "but do NOT mention this to the client.\n\n"
-        )
-
-        # Include client preferences
-        prompt += "Client Preferences:\n"
-        prompt += f"- Meal Type: {client_response.get('meal_type', 'No preference')}\n"
-        prompt += f"- Dietary Preference: {client_response.get('dietary_pref', 'No preference')}\n"
-
-        included_ingredients = client_response.get("include_ingredients", "").strip()
-        if included_ingredients:
-            prompt += (
-                "- Below are some of the client's Must Include Ingredients.\n"
-                "Use this only if the these ingredients are clear and helpful for understanding preferences. "
-                "Ignore them if they seem irrelevant or ambiguous:\n"
-                f"{included_ingredients[:350]}\n"
-            )
+        return self._prompt_builder.build(recipes, client_response, recipe_id_first=recipe_id_first)
+
+    async def _ask_openai_for_best_recipe(
+        self,
+        recipes,
+        client_response,
+        on_recipe_id: Callable[[str], None] | None = None,
+        timer: StageTimer | None = None,
+        usage_state: str = "recommendation",
+    ) -> tuple[str, int, str, dict]:
+        """
+        Ask LLM to choose one of recipes, return cleaned message, recipe ID, prompt and usage record as dict
+        """
+        timer = timer or StageTimer()
+        with timer.stage("prompt"):
+            prompt, estimated_tokens = self._prepare_ai_prompt(recipes, client_response, recipe_id_first=self._stream_completions)
+
+        model = self._chat_model
+        if self._usage_tracker is not None and self._usage_tracker.is_over_budget():
+            model = self._fallback_chat_model
+            logger.warning(f"LLM daily budget exceeded, using fallback model {model}")
+
+        cache_key = None
+        if self._recommendation_cache is not None:
+            cache_key = RecommendationCache.make_key([r["id"] for r in recipes], client_response, model)
+            cached = await self._recommendation_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Recommendation served from cache, recipe ID: {cached.recipe_id}, "
+                            f"saved tokens: {cached.usage.get('total_tokens', 0)}")
+                record = LLMUsageRecord(model=model, state=usage_state, cached=True)
+                self._record_usage(record)
+                return cached.message, cached.recipe_id, prompt, asdict(record)
+
+        async def request_recommendation() -> tuple[str, str | None, dict]:
+            if self._stream_completions:
+                return await self._stream_recommendation(prompt, on_recipe_id, model)
+            return await self._request_recommendation(prompt, model)
+
+        # Identical concurrent prompts share one LLM call, only the first caller gets streamed recipe ID early
+        flight_key = (model, hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+        start = time.perf_counter()
+        with timer.stage("llm"):
+            (cleaned_message, recipe_id, usage), shared = await self._recommendation_flight.do(flight_key, request_recommendation)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if shared:
+            logger.info(f"Recommendation coalesced with in-flight LLM call, recipe ID: {recipe_id}")
+            record = LLMUsageRecord(model=model, state=usage_state, cached=True)
         else:
-            prompt += "- User doesn't add Must Include Ingredients\n"
-            # prompt += f"- Must Include Ingredients: {included_ingredients[:350]}\n" # For case if user try to send long message
-
-        banned_foods = client_response.get("banned_foods", [])
-        if banned_foods:
-            prompt += f"- Forbidden Ingredients: {', '.join(banned_foods)}\n"
-
-        additional_notes = client_response.get("additional_notes", "").strip()
-        if additional_notes:
-            prompt += f"- Additional Notes: {additional_notes}\n"
-
-        disliked_comments = client_response.get("disliked_recipes_comments", [])
-        if disliked_comments:
-            prompt += (
-                "- Below are some of the client's comments on previously disliked recipes.\n"
-                "  Use this only if the comments are clear and helpful for understanding preferences. "
-                "Ignore them if they seem irrelevant or ambiguous.\n"
-                f"  {', '.join(disliked_comments)}\n"
+            record = LLMUsageRecord(
+                model=model,
+                state=usage_state,
+                prompt_tokens=usage["prompt_tokens"],
+                estimated_prompt_tokens=estimated_tokens,
+                completion_tokens=usage["completion_tokens"],
+                total_tokens=usage["total_tokens"],
+                cost=usage["cost"],
+                latency_ms=latency_ms,
             )
+        self._record_usage(record)
 
-        prompt += "\nAvailable Recipes:\n"
-        for idx, recipe in enumerate(recipes, start=1):
-            recipe_id = recipe.get("id")
-            prompt += f"Recipe {recipe_id}:\n"
-            prompt += f"Name: {recipe.get('name', 'Unknown')}\n"
-            prompt += f"Subtitle: {recipe.get('sub_title', 'Unknown')}\n"
-            prompt += f"Preparation Time: {recipe.get('minutes', 'Unknown')} minutes\n"
-            prompt += f"Meal Type: {recipe.get('meal_type', 'Unknown')}\n"
-            prompt += f"Foods: {recipe.get('foods', 'Unknown')}\n"
-            prompt += f"Ingredients: {recipe.get('ingredients')}\n"
-            prompt += f"Preparation Method: {recipe.get('preparation_method', 'Unknown')}\n"
-            # We don't expose this to the user, but include ID for extraction
-            prompt += f"[RECIPE_ID: {recipe_id}]\n\n"
-
-        return prompt
-
-    async def _ask_openai_for_best_recipe(self, recipes, client_response) -> tuple[str, int, str]:
-        prompt = self._prepare_ai_prompt(recipes, client_response)
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self._openai_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": "gpt-4",
+        if cache_key is not None and recipe_id is not None and not shared:
+            await self._recommendation_cache.set(cache_key, CachedRecommendation(cleaned_message, recipe_id, {**usage, "model": model}))
+
+        return cleaned_message, recipe_id, prompt, asdict(record)
+
+    def _record_usage(self, record: LLMUsageRecord) -> None:
+        if self._usage_tracker is not None:
+            self._usage_tracker.record(record)
+
+    async def _request_recommendation(self, prompt: str, model: str = "gpt-4") -> tuple[str, str | None, dict]:
+        """
+        Ask OpenAI chat model to choose recipe, return cleaned message, recipe ID and token usage
+        """
+        payload = self._build_chat_payload(prompt, model)
+        response = await self._openai_client.post("chat/completions", payload)
+
+        if response.status_code != 200:
+            raise Exception(f"Error calling OpenAI API: {response.text}")
+
+        data = response.json()
+        message = data["choices"][0]["message"]["content"]
+        logger.info(f"Response from OpenAI: {message}")
+        return self._parse_recommendation(message, data.get("usage") or {}, model)
+
+    async def _stream_recommendation(
+        self, prompt: str, on_recipe_id: Callable[[str], None] | None = None, model: str = "gpt-4"
+    ) -> tuple[str, str | None, dict]:
+        """
+        Same as '_request_recommendation', but consumes streamed completion
+        and reports recipe ID as soon as the '[RECIPE_ID: ...]' marker is complete
+        """
+        payload = self._build_chat_payload(prompt, model)
+        payload["stream_options"] = {"include_usage": True}
+
+        parts = []
+        usage = {}
+        recipe_id_reported = False
+        async for event in self._openai_client.stream("chat/completions", payload):
+            if event.get("usage"):
+                usage = event["usage"]
+            for choice in event.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    parts.append(content)
+
+            if not recipe_id_reported and parts:
+                match = RECIPE_ID_PATTERN.search("".join(parts))
+                if match:
+                    recipe_id_reported = True
+                    if on_recipe_id is not None:
+                        on_recipe_id(match.group(1))
+
+        message = "".join(parts)
+        logger.info(f"Streamed response from OpenAI: {message}")
+        return self._parse_recommendation(message, usage, model)
+
+    @staticmethod
+    def _build_chat_payload(prompt: str, model: str = "gpt-4") -> dict:
+        return {
+            "model": model,
             "messages": [
                 {"role": "system", "content": "You are a helpful and friendly nutritionist."},
                 {"role": "user", "content": prompt}
@@ -541,34 +899,20 @@ class AskRagForRecipe(RagService):
             "temperature": 0.85
         }
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, headers=headers, json=payload)
-
-        if response.status_code != 200:
-            raise Exception(f"Error calling OpenAI API: {response.text}")
-
-        data = response.json()
+    @staticmethod
+    def _parse_recommendation(message: str, usage: dict, model: str = "gpt-4") -> tuple[str, str | None, dict]:
+        """
+        Extract recipe ID from LLM message, clean message and count token usage
+        """
         # Count tokens
-        usage = data.get("usage", {})
         prompt_tokens = usage.get("prompt_tokens", 0)
         completion_tokens = usage.get("completion_tokens", 0)
         total_tokens = usage.get("total_tokens", 0)
 
-        # Example price (update when needed)
-        # GPT-4 Turbo (April 2024): $0.01 per 1K prompt tokens, $0.03 per 1K completion
-        cost_prompt = (prompt_tokens / 1000) * 0.01
-        cost_completion = (completion_tokens / 1000) * 0.03
-        total_cost = cost_prompt + cost_completion
-        count_tokens_info = f"OpenAI Token Usage — Prompt: {prompt_tokens}, Completion: {completion_tokens}, Total: {total_tokens}"
-        prompt += f"\n\n{count_tokens_info}"
-        logger.info(count_tokens_info)
-        logger.info(f"Estimated Cost: ${total_cost:.4f}")
-
-        message = data["choices"][0]["message"]["content"]
-        logger.info(f"Response from OpenAI: {message}")
+        total_cost = estimate_cost(model, prompt_tokens, completion_tokens)
 
         # Extract recipe ID from format like [RECIPE_ID: abc123]
-        match = re.search(r"\[RECIPE_ID:\s*(\w+)\]", message)
+        match = RECIPE_ID_PATTERN.search(message)
         recipe_id = match.group(1) if match else None
 
         # Clean message from RECIPE_ID
@@ -576,4 +920,10 @@ class AskRagForRecipe(RagService):
         ltr_fix = "\u200E"
         cleaned_message = ltr_fix + cleaned_message
 
-        return cleaned_message, recipe_id, prompt
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "cost": total_cost,
+        }
+        return cleaned_message, recipe_id, usage
@@ -0,0 +1,199 @@
+import sys
+import asyncio
+from cachetools import TTLCache
+from supabase import AsyncClient
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("recipe_catalog")
+
+RECIPE_FIELDS = (
+    "id",
+    "name",
+    "sub_title",
+    "preparation_method",
+    "nut_recommend",
+    "comment",
+    "minutes",
+    "meal_type",
+    "foods",
+    "ingredients",
+)
+
+
+class RecipeCatalog:
+    """
+    App-scoped in-memory copy of 'recipes_view_data' indexed by recipe id.
+    Loaded once on startup, then refreshed in background: new recipes are fetched
+    incrementally by id, a full reload every few refreshes picks up edits and deletions.
+    Lookups are served from memory, ids which are not in the catalog yet are fetched from DB,
+    ids which are not in DB either are remembered until the next refresh interval.
+    'version' changes only on load and refresh, on-demand fetches don't move it or the incremental refresh position.
+    Returned records are shared, callers must not modify them.
+    """
+
+    def __init__(
+        self,
+        supabase_client: AsyncClient,
+        table: str = "recipes_view_data",
+        page_size: int = 1000,
+        refresh_interval: float = 300,
+        full_reload_every: int = 12,
+        missing_maxsize: int = 4096,
+    ):
+        self._supabase_client = supabase_client
+        self._table = table
+        self._page_size = page_size
+        self._refresh_interval = refresh_interval
+        self._full_reload_every = full_reload_every
+        self._records: dict[int, dict] = {}
+        self._foods_lower: dict[int, str] = {}
+        self._max_id = 0
+        self._missing_ids = TTLCache(maxsize=missing_maxsize, ttl=refresh_interval)
+        self._refresh_count = 0
+        self._refresh_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self.version = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, recipe_id: int) -> bool:
+        return recipe_id in self._records
+
+    async def load(self) -> None:
+        """
+        Full load of the view, replaces current records
+        """
+        async with self._lock:
+            rows = await self._fetch_rows()
+            records = {}
+            foods_lower = {}
+            for row in rows:
+                record = self._compact(row)
+                records[record["id"]] = record
+                if record["foods"]:
+                    foods_lower[record["id"]] = record["foods"].lower()
+
+            self._records = records
+            self._foods_lower = foods_lower
+            self._max_id = max(records, default=0)
+            self.version += 1
+        logger.info(f"Recipe catalog loaded: {len(self)} recipes, version {self.version}")
+
+    async def refresh(self) -> None:
+        """
+        Fetch recipes added after the last load, every 'full_reload_every' call does a full reload, 0 disables full reloads
+        """
+        self._refresh_count += 1
+        if self._full_reload_every and self._refresh_count % self._full_reload_every == 0:
+            await self.load()
+            return
+
+        async with self._lock:
+            rows = await self._fetch_rows(after_id=self._max_id)
+            if not rows:
+                return
+            self._add_rows(rows)
+            self._max_id = max(self._max_id, max(int(row["id"]) for row in rows))
+            self.version += 1
+        logger.info(f"Recipe catalog refreshed: {len(rows)} new recipes, version {self.version}")
+
+    def ids(self) -> list[int]:
+        return list(self._records)
+
+    def get(self, recipe_id: int) -> dict | None:
+        return self._records.get(recipe_id)
+
+    def get_many(self, recipe_ids: list[int]) -> list[dict]:
+        """
+        Records in requested order, unknown ids are skipped
+        """
+        records = self._records
+        return [records[recipe_id] for recipe_id in recipe_ids if recipe_id in records]
+
+    def foods_lower(self, recipe_ids: list[int]) -> dict[int, str]:
+        """
+        Lowercased 'foods' prepared at load time, for banned foods matching
+        """
+        foods_lower = self._foods_lower
+        return {recipe_id: foods_lower[recipe_id] for recipe_id in recipe_ids if recipe_id in foods_lower}
+
+    async def get_recipes(self, recipe_ids: list[int]) -> list[dict]:
+        """
+        Records in requested order, ids missing in memory are fetched from DB and added to catalog
+        """
+        missing = [
+            recipe_id
+            for recipe_id in dict.fromkeys(recipe_ids)
+            if recipe_id not in self._records and recipe_id not in self._missing_ids
+        ]
+        if missing:
+            logger.info(f"Recipe catalog miss, fetching from DB: {missing}")
+            response = await self._supabase_client.table(self._table).select("*").in_("id", missing).execute()
+            if response.data:
+                self._add_rows(response.data)
+            for recipe_id in missing:
+                if recipe_id not in self._records:
+                    self._missing_ids[recipe_id] = True
+        return self.get_many(recipe_ids)
+
+    def start_background_refresh(self) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh recipe catalog: {e}")
+
+    async def _fetch_rows(self, after_id: int | None = None) -> list[dict]:
+        rows = []
+        offset = 0
+        while True:
+            query = self._supabase_client.table(self._table).select("*")
+            if after_id is not None:
+                query = query.gt("id", after_id)
+            response = await query.order("id").range(offset, offset + self._page_size - 1).execute()
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < self._page_size:
+                return rows
+            offset += self._page_size
+
+    def _add_rows(self, rows: list[dict]) -> None:
+        # Copy on write, readers never see half-updated dicts
+        records = dict(self._records)
+        foods_lower = dict(self._foods_lower)
+        for row in rows:
+            record = self._compact(row)
+            records[record["id"]] = record
+            if record["foods"]:
+                foods_lower[record["id"]] = record["foods"].lower()
+        self._records = records
+        self._foods_lower = foods_lower
+
+    @staticmethod
+    def _compact(row: dict) -> dict:
+        record = {name: row.get(name) for name in RECIPE_FIELDS}
+        record["id"] = int(record["id"])
+        if record["meal_type"]:
+            # Few distinct values repeated in every row
+            record["meal_type"] = sys.intern(record["meal_type"])
+        return record
@@ -1,29 +1,78 @@
-from rapidfuzz import process
+import re
+import numpy as np
+from collections import Counter
+from rapidfuzz import process, fuzz, utils
 from app.config.logger_settings import get_logger
 
 logger = get_logger(__name__)
 
+WORD_PATTERN = re.compile(r'\w+')
+# Hebrew one-letter prefixes: and, the, in, to ("ושמן" -> "שמן")
+HEBREW_PREFIXES = "והבל"
+MAX_PREFIX_LETTERS = 2
+PHRASE_END = ""  # Trie key of the name ending at a node, tokens are never empty
+
 
 class RecipeFinder:
-    def __init__(self, known_ingredients: list[str]):
+    """
+    Fuzzy matching of user's free text to known ingredient names (Hebrew and English).
+    Vocabulary is pre-processed once (lowercase, no punctuation), empty and repeated names are dropped.
+    For a single-token word WRatio can't exceed 200 * shared / (shorter length + shared), where 'shared'
+    is the count of common characters (partial_ratio may align to a shorter window at the string border,
+    token scorers compare whole joined tokens unless the word is one of name's tokens, then the bound is 100),
+    so a character count prefilter drops names which can't reach the threshold, and the remaining
+    (word, name) pairs of the whole message are scored with one 'process.cpdist' call.
+
+    Free text goes through an exact pass first: a token trie of the names finds the longest known
+    phrase at each position ("olive oil" as one ingredient, not "olive" and "oil"), Hebrew prefix
+    letters of the phrase's first token are tried stripped. Only tokens left over are fuzzy matched.
+    """
+
+    def __init__(self, known_ingredients: list[str], limit: int = 5, workers: int = -1):
         self.known_ingredients = known_ingredients
+        self._limit = limit
+        self._workers = workers
+        # Processed name -> first original name, original names are what DB lookups expect
+        vocabulary: dict[str, str] = {}
+        for name in known_ingredients:
+            if not name:
+                continue
+            processed = utils.default_process(name)
+            if processed and processed not in vocabulary:
+                vocabulary[processed] = name
+        self._processed_vocabulary = list(vocabulary)
+        self._vocabulary = list(vocabulary.values())
+        # Length of joined tokens, token scorers see names without repeated spaces
+        self._lengths = np.array([len(" ".join(name.split())) for name in self._processed_vocabulary], dtype=np.int32)
+        # Character counts, one row per character, one column per name
+        alphabet = sorted(set("".join(self._processed_vocabulary)))
+        self._alphabet = {char: i for i, char in enumerate(alphabet)}
+        self._char_counts = np.zeros((len(alphabet), len(self._vocabulary)), dtype=np.uint8)
+        for column, name in enumerate(self._processed_vocabulary):
+            for char, count in Counter(name).items():
+                self._char_counts[self._alphabet[char], column] = min(count, 255)
+        self._phrase_trie: dict = {}
+        for i, name in enumerate(self._processed_vocabulary):
+            node = self._phrase_trie
+            for token in name.split():
+                node = node.setdefault(token, {})
+            node.setdefault(PHRASE_END, i)
+        logger.info(f"Ingredients vocabulary: {len(known_ingredients)} names, {len(self._vocabulary)} after dedupe")
 
     async def find_recipes_by_ingredients(self, user_input: str, similarity_threshold: int = 80) -> list[str] | None:
         """
         Main service method for finding recipes by ingredients
         """
 
-        # 1. Extract potential ingredients from text
-        possible_ingredients = self._extract_words(user_input)
-        logger.info(f"Extracted ingredients: {possible_ingredients}")
+        # 1. Exact pass over known phrases
+        tokens = utils.default_process(user_input).split()
+        exact_ingredients, leftover_tokens = self.match_phrases(tokens)
+        logger.info(f"Exact ingredients: {exact_ingredients}, left for fuzzy matching: {leftover_tokens}")
 
-        # 2. Fuzzy matching
-        corrected_ingredients = []
-        for word in possible_ingredients:
-            matches = process.extract(word, self.known_ingredients)
-            for match, score, _ in matches:
-                if score >= similarity_threshold:
-                    corrected_ingredients.append(match)
+        # 2. Fuzzy matching of leftover tokens, also without prefix letters
+        possible_ingredients = [variant for token in leftover_tokens for variant in self._prefix_variants(token)]
+        fuzzy_ingredients = self.match_words(possible_ingredients, similarity_threshold) if possible_ingredients else []
+        corrected_ingredients = list(dict.fromkeys(exact_ingredients + fuzzy_ingredients))
 
         # 3. Check if we found anything
         if not corrected_ingredients:
@@ -58,11 +107,106 @@ class RecipeFinder:
         # # 7. If nothing found - error
         # return {"status": "error", "message": "לא נמצאו מתכונים."}
 
+    def match_phrases(self, tokens: list[str]) -> tuple[list[str], list[str]]:
+        """
+        Greedy longest known phrase at each position of processed tokens.
+        Returns (matched names in text order, tokens not covered by any phrase)
+        """
+        matches = []
+        leftover = []
+        position = 0
+        while position < len(tokens):
+            best_end, best_index = position, None
+            for first in self._prefix_variants(tokens[position]):
+                node = self._phrase_trie.get(first)
+                end = position + 1
+                while node is not None:
+                    if PHRASE_END in node and end > best_end:
+                        best_end, best_index = end, node[PHRASE_END]
+                    if end == len(tokens):
+                        break
+                    node = node.get(tokens[end])
+                    end += 1
+            if best_index is None:
+                leftover.append(tokens[position])
+                position += 1
+            else:
+                matches.append(self._vocabulary[best_index])
+                position = best_end
+        return list(dict.fromkeys(matches)), leftover
+
+    @staticmethod
+    def _prefix_variants(token: str) -> list[str]:
+        """
+        Token and its forms without up to MAX_PREFIX_LETTERS Hebrew prefix letters, the token itself first
+        """
+        variants = [token]
+        while (
+            len(variants) <= MAX_PREFIX_LETTERS
+            and variants[-1][0] in HEBREW_PREFIXES
+            and len(variants[-1]) > 2
+        ):
+            variants.append(variants[-1][1:])
+        return variants
+
+    def match_words(self, words: list[str], similarity_threshold: int = 80) -> list[str]:
+        """
+        Up to 'limit' best known ingredients per word with score >= similarity_threshold,
+        in order of words, then score
+        """
+        queries = self._processed_queries(words)
+        if not queries or not self._vocabulary:
+            return []
+
+        candidates = [self._prefilter(query, similarity_threshold) for query in queries]
+        query_index = np.repeat(np.arange(len(queries)), [len(c) for c in candidates])
+        name_index = np.concatenate(candidates)
+        if not len(name_index):
+            return []
+
+        scores = process.cpdist(
+            [queries[i] for i in query_index],
+            [self._processed_vocabulary[i] for i in name_index],
+            scorer=fuzz.WRatio,
+            score_cutoff=similarity_threshold,
+            workers=self._workers,
+        )
+        matches = []
+        start = 0
+        for query_candidates in candidates:
+            end = start + len(query_candidates)
+            query_scores = scores[start:end]
+            # Ties keep vocabulary order like process.extract
+            passed = np.flatnonzero(query_scores >= similarity_threshold)
+            for i in passed[np.argsort(-query_scores[passed], kind="stable")[:self._limit]]:
+                matches.append(self._vocabulary[query_candidates[i]])
+            start = end
+        return list(dict.fromkeys(matches))
+
+    @staticmethod
+    def _processed_queries(words: list[str]) -> list[str]:
+        queries = dict.fromkeys(utils.default_process(word) for word in words)
+        return [query for query in queries if query]
+
+    def _prefilter(self, query: str, similarity_threshold: int) -> np.ndarray:
+        """
+        Indices of names which may score >= similarity_threshold with query
+        """
+        if " " in query:
+            # Token ratios of multi-token queries are not bounded by shared characters
+            return np.arange(len(self._vocabulary))
+        shared = np.zeros(len(self._vocabulary), dtype=np.int32)
+        for char, count in Counter(query).items():
+            row = self._alphabet.get(char)
+            if row is not None:
+                shared += np.minimum(self._char_counts[row], count)
+        shorter = np.minimum(self._lengths, len(query))
+        return np.flatnonzero(shared * 200 >= similarity_threshold * (shorter + shared))
+
     def _extract_words(self, text: str) -> list:
         """
         Simple parser for splitting text into words
         Can be replaced with more advanced NLP parsing
         """
-        import re
-        words = re.findall(r'\w+', text)  # Finds words in Hebrew and English
+        words = WORD_PATTERN.findall(text)  # Finds words in Hebrew and English
         return words
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Callable
+from app.config.logger_settings import get_logger
+from app.utils.unitofwork import IUnitOfWork
+from app.api.services.fuzzy_ingredients_recipes_service import FuzzyIngredientsRecipesService
+from app.services.recipe_finder import RecipeFinder
+from app.services.ingredient_recipe_index import IngredientRecipeIndex
+
+
+logger = get_logger("recipe_finder_refresher")
+
+
+class RecipeFinderRefresher:
+    """
+    Keeps RecipeFinder and IngredientRecipeIndex in sync with 'fuzzy_ingredients_recipes'.
+    Every 'refresh_interval' seconds rows count and max id are checked, full rows are loaded only
+    when they changed or on every 'full_reload_every' refresh (edits of existing rows, e.g. new
+    recipe ids, keep both unchanged, 0 disables). A new RecipeFinder and index are built in
+    a worker thread and handed to 'on_swap' together.
+    Requests which already hold the previous instances finish with them.
+    """
+
+    def __init__(
+        self,
+        uow: IUnitOfWork,
+        on_swap: Callable[[RecipeFinder, IngredientRecipeIndex], None],
+        refresh_interval: float = 300,
+        full_reload_every: int = 12,
+    ):
+        self._uow = uow
+        self._on_swap = on_swap
+        self._refresh_interval = refresh_interval
+        self._full_reload_every = full_reload_every
+        self._table_version: tuple[int, int | None] | None = None
+        self._refresh_count = 0
+        self._refresh_task: asyncio.Task | None = None
+        self.finder: RecipeFinder | None = None
+        self.index: IngredientRecipeIndex | None = None
+        self.version = 0
+
+    async def load(self) -> None:
+        """
+        Full load of the table, swaps RecipeFinder and index
+        """
+        table_version = await FuzzyIngredientsRecipesService().get_ingredients_version(self._uow)
+        rows = await FuzzyIngredientsRecipesService().get_all_ingredients(self._uow)
+        # Vocabulary preprocessing is CPU bound, event loop keeps serving requests meanwhile
+        finder, index = await asyncio.to_thread(self._build, rows)
+        self.finder = finder
+        self.index = index
+        self._table_version = table_version
+        self.version += 1
+        self._on_swap(finder, index)
+        logger.info(f"RecipeFinder swapped: {len(rows)} ingredients, version {self.version}")
+
+    async def refresh(self) -> bool:
+        """
+        Reload when rows were added or deleted, or on a periodic full reload, returns True on reload
+        """
+        self._refresh_count += 1
+        full_reload = self._full_reload_every and self._refresh_count % self._full_reload_every == 0
+        if not full_reload:
+            table_version = await FuzzyIngredientsRecipesService().get_ingredients_version(self._uow)
+            if table_version == self._table_version:
+                return False
+        await self.load()
+        return True
+
+    @staticmethod
+    def _build(rows: list) -> tuple[RecipeFinder, IngredientRecipeIndex]:
+        # Hebrew names first, then English
+        names = [row.ingredient_he for row in rows] + [row.ingredient_en for row in rows]
+        return RecipeFinder(names), IngredientRecipeIndex(rows)
+
+    def start_background_refresh(self) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh RecipeFinder: {e}")
@@ -0,0 +1,198 @@
+import asyncio
+import numpy as np
+from supabase import AsyncClient
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("recipe_food_matrix")
+
+
+class RecipeFoodMatrix:
+    """
+    App-scoped recipe x food incidence from 'recipes_foods', stored as one bitset over recipes per food
+    (uint64 words, bit i is i-th recipe of sorted recipe ids).
+    Set queries are OR / AND of a few bitset rows and return boolean masks aligned with 'recipe_ids'.
+    Refreshed in background on its own signal: rebuilt when 'recipes_foods' row count changes,
+    and every 'full_reload_every' refresh to pick up edited rows (0 disables full reloads).
+    Rebuilt as a whole, readers never see a half-built matrix.
+    """
+
+    def __init__(
+        self,
+        supabase_client: AsyncClient,
+        table: str = "recipes_foods",
+        page_size: int = 1000,
+        refresh_interval: float = 300,
+        full_reload_every: int = 12,
+    ):
+        self._supabase_client = supabase_client
+        self._table = table
+        self._page_size = page_size
+        self._refresh_interval = refresh_interval
+        self._full_reload_every = full_reload_every
+        self._recipe_ids = np.empty(0, dtype=np.int64)
+        self._food_ids = np.empty(0, dtype=np.int64)
+        self._bits = np.zeros((0, 0), dtype="<u8")
+        self._row_count: int | None = None
+        self._refresh_count = 0
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return len(self._recipe_ids) > 0
+
+    def __len__(self) -> int:
+        return len(self._recipe_ids)
+
+    def __contains__(self, recipe_id: int) -> bool:
+        position = np.searchsorted(self._recipe_ids, recipe_id)
+        return position < len(self._recipe_ids) and self._recipe_ids[position] == recipe_id
+
+    @property
+    def recipe_ids(self) -> np.ndarray:
+        return self._recipe_ids
+
+    async def load(self) -> None:
+        rows = await self._fetch_rows()
+        self.build([row["recipe_id"] for row in rows], [row["food_id"] for row in rows])
+        self._row_count = len(rows)
+
+    async def refresh(self) -> bool:
+        """
+        Rebuild when row count changed or full reload is due, True when rebuilt
+        """
+        self._refresh_count += 1
+        full_reload = self._full_reload_every and self._refresh_count % self._full_reload_every == 0
+        if not full_reload and await self._fetch_count() == self._row_count:
+            return False
+        await self.load()
+        return True
+
+    def build(self, recipe_ids: list[int], food_ids: list[int]) -> None:
+        """
+        Build from parallel (recipe_id, food_id) pair lists
+        """
+        recipe_column = np.asarray(recipe_ids, dtype=np.int64)
+        food_column = np.asarray(food_ids, dtype=np.int64)
+        unique_recipes = np.unique(recipe_column)
+        unique_foods = np.unique(food_column)
+        recipe_positions = np.searchsorted(unique_recipes, recipe_column)
+        food_positions = np.searchsorted(unique_foods, food_column)
+
+        bits = np.zeros((len(unique_foods), (len(unique_recipes) + 63) // 64), dtype="<u8")
+        np.bitwise_or.at(
+            bits,
+            (food_positions, recipe_positions >> 6),
+            np.left_shift(np.uint64(1), (recipe_positions & 63).astype(np.uint64)),
+        )
+        # Swapped together, queries never mix arrays of two builds
+        self._recipe_ids, self._food_ids, self._bits = unique_recipes, unique_foods, bits
+        logger.info(f"Recipe food matrix built: {len(unique_recipes)} recipes, {len(unique_foods)} foods, {len(recipe_column)} pairs")
+
+    def contains_any(self, food_ids: list[int]) -> np.ndarray:
+        """
+        Mask of recipes containing at least one of the foods
+        """
+        rows = self._food_rows(food_ids)
+        if not len(rows):
+            return np.zeros(len(self._recipe_ids), dtype=bool)
+        return self._unpack(np.bitwise_or.reduce(self._bits[rows], axis=0), len(self._recipe_ids))
+
+    def contains_all(self, food_ids: list[int]) -> np.ndarray:
+        """
+        Mask of recipes containing every one of the foods, unknown food matches nothing
+        """
+        rows = self._food_rows(food_ids)
+        if len(rows) < len(set(food_ids)):
+            return np.zeros(len(self._recipe_ids), dtype=bool)
+        if not len(rows):
+            return np.ones(len(self._recipe_ids), dtype=bool)
+        return self._unpack(np.bitwise_and.reduce(self._bits[rows], axis=0), len(self._recipe_ids))
+
+    def exclude_any(self, food_ids: list[int]) -> np.ndarray:
+        """
+        Mask of recipes containing none of the foods
+        """
+        return ~self.contains_any(food_ids)
+
+    def select(self, mask: np.ndarray) -> list[int]:
+        return self._recipe_ids[mask].tolist()
+
+    def known(self, recipe_ids: list[int]) -> set[int]:
+        """
+        Subset of 'recipe_ids' which have rows in 'recipes_foods'
+        """
+        candidates, positions, found = self._positions(recipe_ids)
+        return set(candidates[found].tolist())
+
+    def recipes_with_any(self, recipe_ids: list[int], food_ids: list[int]) -> set[int]:
+        """
+        Subset of 'recipe_ids' containing at least one of the foods, recipes unknown to the matrix have no foods
+        """
+        mask = self.contains_any(food_ids)
+        if not mask.any():
+            return set()
+        candidates, positions, found = self._positions(recipe_ids)
+        return set(candidates[found & mask[positions]].tolist())
+
+    def _positions(self, recipe_ids: list[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (candidates, their positions in 'recipe_ids', found mask), positions are valid where found
+        candidates = np.asarray(recipe_ids, dtype=np.int64)
+        if not len(self._recipe_ids):
+            return candidates, np.zeros(len(candidates), dtype=np.int64), np.zeros(len(candidates), dtype=bool)
+        positions = np.minimum(np.searchsorted(self._recipe_ids, candidates), len(self._recipe_ids) - 1)
+        return candidates, positions, self._recipe_ids[positions] == candidates
+
+    def _food_rows(self, food_ids: list[int]) -> np.ndarray:
+        food_ids = np.unique(np.asarray(food_ids, dtype=np.int64))
+        if not len(self._food_ids) or not len(food_ids):
+            return np.empty(0, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._food_ids, food_ids), len(self._food_ids) - 1)
+        return positions[self._food_ids[positions] == food_ids]
+
+    @staticmethod
+    def _unpack(words: np.ndarray, count: int) -> np.ndarray:
+        return np.unpackbits(words.view(np.uint8), bitorder="little")[:count].astype(bool)
+
+    def start_background_refresh(self) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh recipe food matrix: {e}")
+
+    async def _fetch_count(self) -> int:
+        response = await self._supabase_client.table(self._table).select("recipe_id", count="exact").limit(1).execute()
+        return response.count or 0
+
+    async def _fetch_rows(self) -> list[dict]:
+        rows = []
+        offset = 0
+        while True:
+            response = await (
+                self._supabase_client.table(self._table)
+                .select("recipe_id,food_id")
+                .order("recipe_id")
+                .order("food_id")
+                .range(offset, offset + self._page_size - 1)
+                .execute()
+            )
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < self._page_size:
+                return rows
+            offset += self._page_size
@@ -0,0 +1,100 @@
+import re
+import html
+from cachetools import LRUCache
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("recipe_message_renderer")
+
+RECIPE_HEADER = "\n\n*🍽 Recipe structure:*\n"
+RENDERED_FIELDS = (
+    "name",
+    "sub_title",
+    "meal_type",
+    "minutes",
+    "preparation_method",
+    "ingredients",
+    "nut_recommend",
+    "comment",
+)
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    text = html.unescape(text)
+    text = text.replace("\\'", "'")
+    text = text.replace('\r\n', '\n')
+    text = text.replace('\r', '\n')
+    text = re.sub(r'\n{2,}', '\n', text)
+    return text.strip()
+
+
+class RecipeMessageRenderer:
+    """
+    One place where recipe is formatted as WhatsApp message.
+    Rendered text is memoized by recipe id and content of rendered fields,
+    so a changed recipe gets a new entry and repeated views return the built string.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self._cache = LRUCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, recipe: dict, with_header: bool = True) -> str:
+        fields = tuple(recipe.get(name) for name in RENDERED_FIELDS)
+        key = (recipe.get("id"), fields, with_header)
+        message = self._cache.get(key)
+        if message is not None:
+            self.hits += 1
+            return message
+
+        self.misses += 1
+        message = self._build(recipe, with_header)
+        self._cache[key] = message
+        return message
+
+    def prerender(self, recipes: list[dict]) -> None:
+        """
+        Render recipes ahead of time, e.g. the whole recipe catalog on startup
+        """
+        for recipe in recipes:
+            self.render(recipe)
+        logger.info(f"Pre-rendered {len(recipes)} recipe messages")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _build(recipe: dict, with_header: bool) -> str:
+        preparation = clean_text(recipe.get('preparation_method', '')).replace('\\r\\n', '\n')
+        ingredients = clean_text(recipe.get('ingredients', '')).replace(';', '\n')
+        nut_recommend = clean_text(recipe.get('nut_recommend', '')).replace('\\r\\n', '\n')
+        comment = clean_text(recipe.get('comment', '')).replace('\\r\\n', '\n')
+
+        name = clean_text(recipe.get('name', ''))
+        sub_title = clean_text(recipe.get('sub_title', ''))
+        meal_type = clean_text(recipe.get('meal_type', '')).replace(';', ', ')
+        minutes = recipe.get('minutes')
+        minutes = "" if minutes is None else minutes
+
+        recipe_details = (
+            f"*Name:* {name}\n"
+            f"*Sub title:* {sub_title}\n"
+            f"*Meal type:* {meal_type}\n"
+            f"*Minutes:* {minutes}\n"
+            f"*Preparation Method:*\n{preparation}\n"
+            f"*Ingredients:*\n{ingredients}\n"
+            f"*Nut recommend:*\n{nut_recommend}\n"
+            f"*Comment:*\n{comment}\n"
+        )
+        if with_header:
+            return RECIPE_HEADER + recipe_details
+        return recipe_details
@@ -0,0 +1,159 @@
+import re
+from dataclasses import dataclass, field
+from app.services.vector_index import SIMILARITY_THRESHOLD
+
+
+QUICK_MEAL_MINUTES = 20
+MINUTES_PATTERN = re.compile(r"(\d+)\s*(?:min|minutes|mins|דקות|דק)", re.IGNORECASE)
+QUICK_MEAL_PATTERN = re.compile(r"\b(?:quick|fast)\b|מהיר", re.IGNORECASE)
+# Signals which rank recipes by degree, meal type and time fit alone don't tell recipes apart well
+GRADED_SIGNALS = ("similarity", "ingredients")
+
+
+@dataclass
+class RerankResult:
+    recipes: list[dict] = field(default_factory=list)  # Ordered by score, best first
+    scores: list[float] = field(default_factory=list)
+    signals: list[dict] = field(default_factory=list)
+    margin: float = 0.0
+
+    @property
+    def best(self) -> dict | None:
+        return self.recipes[0] if self.recipes else None
+
+
+class RecipeReranker:
+    """
+    Fast local scorer over 'recipes_view_data' rows.
+    Combines vector similarity, fuzzy ingredient hits, meal type match and preparation time fit
+    into one score in [0, 1]. Signals which are unknown for a request (no similarity for fuzzy search,
+    no meal type, no time limit) are left out and the remaining weights are renormalized.
+    Margin between the two best scores tells if the winner is clear without asking LLM.
+    """
+
+    def __init__(
+        self,
+        similarity_weight: float = 0.45,
+        ingredients_weight: float = 0.3,
+        meal_type_weight: float = 0.2,
+        time_weight: float = 0.05,
+        confidence_margin: float = 0.2,
+    ):
+        self.weights = {
+            "similarity": similarity_weight,
+            "ingredients": ingredients_weight,
+            "meal_type": meal_type_weight,
+            "time": time_weight,
+        }
+        self.confidence_margin = confidence_margin
+
+    def rerank(
+        self,
+        recipes: list[dict],
+        client_response: dict,
+        similarities: dict[int, float] | None = None,
+        ingredient_hits: dict[int, int] | None = None,
+    ) -> RerankResult:
+        """
+        Score recipes and return them ordered by score (stable for equal scores)
+        """
+        if not recipes:
+            return RerankResult()
+
+        meal_type = self._preferred_meal_type(client_response)
+        max_minutes = self._preferred_max_minutes(client_response)
+        max_hits = max(ingredient_hits.values(), default=0) if ingredient_hits else 0
+
+        scored = []
+        for recipe in recipes:
+            signals = {}
+            if similarities:
+                similarity = similarities.get(recipe["id"], SIMILARITY_THRESHOLD)
+                signals["similarity"] = min(max((similarity - SIMILARITY_THRESHOLD) / (1 - SIMILARITY_THRESHOLD), 0.0), 1.0)
+            if max_hits:
+                signals["ingredients"] = ingredient_hits.get(recipe["id"], 0) / max_hits
+            if meal_type:
+                signals["meal_type"] = self._meal_type_match(recipe, meal_type)
+            if max_minutes:
+                signals["time"] = self._time_fit(recipe, max_minutes)
+            scored.append((self._combine(signals), recipe, signals))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        scores = [score for score, _, _ in scored]
+        margin = scores[0] - scores[1] if len(scores) > 1 else 0.0
+        return RerankResult(
+            recipes=[recipe for _, recipe, _ in scored],
+            scores=scores,
+            signals=[signals for _, _, signals in scored],
+            margin=margin,
+        )
+
+    def is_confident(self, result: RerankResult) -> bool:
+        """
+        True when the best of at least two recipes wins by at least the configured margin
+        and a graded signal (similarity or ingredient hits) took part in the score
+        """
+        if len(result.recipes) < 2 or not any(name in result.signals[0] for name in GRADED_SIGNALS):
+            return False
+        return result.margin >= self.confidence_margin
+
+    @staticmethod
+    def explain(recipe: dict, client_response: dict, signals: dict, ingredient_hits: int = 0) -> str:
+        """
+        Templated recommendation text for a locally selected recipe
+        """
+        name = recipe.get("name") or "this recipe"
+        sub_title = recipe.get("sub_title")
+        lines = [f"I recommend *{name}*" + (f" – {sub_title}" if sub_title else "") + "."]
+
+        if signals.get("meal_type") == 1.0:
+            lines.append(f"It's a great choice for {client_response.get('meal_type', '').lower()}.")
+        if ingredient_hits:
+            lines.append("It includes the ingredients you asked for.")
+        if signals.get("similarity", 0) >= 0.5:
+            lines.append("It closely matches your preferences.")
+        minutes = recipe.get("minutes")
+        if minutes:
+            lines.append(f"It's ready in about {minutes} minutes.")
+        lines.append("Enjoy your meal! 🍽")
+
+        ltr_fix = "\u200E"
+        return ltr_fix + " ".join(lines)
+
+    def _combine(self, signals: dict[str, float]) -> float:
+        total_weight = sum(self.weights[name] for name in signals)
+        if not total_weight:
+            return 0.0
+        return sum(self.weights[name] * value for name, value in signals.items()) / total_weight
+
+    @staticmethod
+    def _preferred_meal_type(client_response: dict) -> str | None:
+        meal_type = (client_response.get("meal_type") or "").strip().casefold()
+        if not meal_type or meal_type == "no preference":
+            return None
+        return meal_type
+
+    @staticmethod
+    def _preferred_max_minutes(client_response: dict) -> int | None:
+        notes = client_response.get("additional_notes") or ""
+        match = MINUTES_PATTERN.search(notes)
+        if match:
+            return int(match.group(1)) or None
+        if QUICK_MEAL_PATTERN.search(notes):
+            return QUICK_MEAL_MINUTES
+        return None
+
+    @staticmethod
+    def _meal_type_match(recipe: dict, meal_type: str) -> float:
+        recipe_meal_types = {item.strip().casefold() for item in re.split(r"[;,]", recipe.get("meal_type") or "")}
+        return 1.0 if meal_type in recipe_meal_types else 0.0
+
+    @staticmethod
+    def _time_fit(recipe: dict, max_minutes: int) -> float:
+        try:
+            minutes = float(recipe.get("minutes"))
+        except (TypeError, ValueError):
+            return 0.5
+        if minutes <= max_minutes:
+            return 1.0
+        return max_minutes / minutes
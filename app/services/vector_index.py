@@ -0,0 +1,217 @@
+import os
+import json
+import numpy as np
+from supabase import AsyncClient
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("vector_index")
+
+SIMILARITY_THRESHOLD = 0.75
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+
+def quantize(matrix: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Encode normalized float32 rows for storage.
+    int8 uses symmetric per-vector scale: row ~= codes * scale
+    """
+    if dtype == "float32":
+        return np.ascontiguousarray(matrix, dtype=np.float32), None
+    if dtype == "float16":
+        return np.ascontiguousarray(matrix, dtype=np.float16), None
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise Exception(f"Unknown vector index dtype: {dtype}, expected one of {STORAGE_DTYPES}")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+async def fetch_recipe_embeddings(
+    supabase_client: AsyncClient, table: str = "recipe_embeddings", page_size: int = 1000
+) -> tuple[list[int], np.ndarray]:
+    """
+    Read all rows of embeddings table page by page.
+    Every page is converted to float32 right away, so Python float lists of the
+    whole table are never held at once.
+    """
+    recipe_ids = []
+    pages = []
+    offset = 0
+    while True:
+        response = await (
+            supabase_client.table(table)
+            .select("recipe_id, embedding_vector")
+            .range(offset, offset + page_size - 1)
+            .execute()
+        )
+        rows = response.data or []
+        vectors = []
+        for row in rows:
+            vector = row["embedding_vector"]
+            if isinstance(vector, str):
+                # pgvector columns come back from PostgREST as '[0.1,0.2,...]'
+                vector = json.loads(vector)
+            recipe_ids.append(int(row["recipe_id"]))
+            vectors.append(vector)
+        if vectors:
+            pages.append(np.asarray(vectors, dtype=np.float32))
+
+        if len(rows) < page_size:
+            break
+        offset += page_size
+
+    matrix = np.concatenate(pages) if pages else np.empty((0, 0), dtype=np.float32)
+    return recipe_ids, matrix
+
+
+class RecipeVectorIndex:
+    """
+    In-process cosine index over 'recipe_embeddings'.
+    Rows are kept in one contiguous matrix with pre-normalized vectors,
+    so a query is a matrix-vector product plus argpartition top-k.
+    Storage can be float32, float16 or int8 (per-vector scale) to fit more recipes in RAM.
+    With 'rescore_path' exact float32 vectors are kept in a memory-mapped file
+    and the top 'rescore_candidates' approximate hits are re-scored exactly.
+    """
+
+    def __init__(
+        self,
+        supabase_client: AsyncClient,
+        table: str = "recipe_embeddings",
+        page_size: int = 1000,
+        dtype: str = "float32",
+        rescore_path: str | None = None,
+        rescore_candidates: int = 50,
+        chunk_size: int = 256,
+    ):
+        if dtype not in STORAGE_DTYPES:
+            raise Exception(f"Unknown vector index dtype: {dtype}, expected one of {STORAGE_DTYPES}")
+        self._supabase_client = supabase_client
+        self._table = table
+        self._page_size = page_size
+        self._dtype = dtype
+        self._rescore_path = rescore_path
+        self._rescore_candidates = rescore_candidates
+        self._chunk_size = chunk_size
+        self._recipe_ids: np.ndarray | None = None
+        self._matrix: np.ndarray | None = None
+        self._scales: np.ndarray | None = None
+        self._exact: np.ndarray | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._matrix is not None and len(self._recipe_ids) > 0
+
+    def __len__(self) -> int:
+        return 0 if self._recipe_ids is None else len(self._recipe_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        RAM used by vectors (memory-mapped re-scoring file is not counted)
+        """
+        if self._matrix is None:
+            return 0
+        scales = 0 if self._scales is None else self._scales.nbytes
+        return self._matrix.nbytes + scales + self._recipe_ids.nbytes
+
+    async def load(self) -> None:
+        """
+        Load all recipe embeddings from Supabase and build the matrix
+        """
+        recipe_ids, matrix = await fetch_recipe_embeddings(self._supabase_client, self._table, self._page_size)
+        self.build(recipe_ids, matrix)
+        logger.info(f"Recipe vector index loaded: {len(self)} vectors, {self._dtype}, {self.nbytes / 2**20:.1f} MiB")
+
+    def build(self, recipe_ids: list[int], embeddings: list[list[float]] | np.ndarray) -> None:
+        """
+        Build index from already fetched rows
+        """
+        if not len(recipe_ids):
+            self._recipe_ids = np.empty(0, dtype=np.int64)
+            self._matrix = np.empty((0, 0), dtype=np.float32)
+            self._scales = None
+            self._exact = None
+            return
+
+        matrix = normalize_rows(np.array(embeddings, dtype=np.float32))
+        if self._rescore_path and self._dtype != "float32":
+            os.makedirs(os.path.dirname(self._rescore_path) or ".", exist_ok=True)
+            # Several workers may write the same file, each one replaces it atomically
+            tmp_path = f"{self._rescore_path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, matrix)
+            os.replace(tmp_path, self._rescore_path)
+            self._exact = np.load(self._rescore_path, mmap_mode="r")
+        else:
+            self._exact = None
+
+        self._matrix, self._scales = quantize(matrix, self._dtype)
+        self._recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+
+    def search(
+        self,
+        query_embedding: list[float],
+        match_count: int = 10,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+    ) -> list[dict]:
+        """
+        Return up to match_count rows {'recipe_id', 'similarity'} ordered by similarity,
+        same shape as the 'match_recipes' RPC after the similarity cutoff.
+        """
+        if not self.is_loaded or match_count <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        scores = self._approximate_scores(query)
+        if self._exact is not None:
+            # Sorted row order keeps reads from the memory-mapped file sequential
+            candidates = np.sort(self._top_k(scores, max(match_count, self._rescore_candidates)))
+            exact_scores = np.asarray(self._exact[candidates] @ query)
+            order = np.argsort(-exact_scores, kind="stable")[:match_count]
+            top = candidates[order]
+            top_scores = exact_scores[order]
+        else:
+            top = self._top_k(scores, match_count)
+            top_scores = scores[top]
+
+        return [
+            {"recipe_id": int(self._recipe_ids[i]), "similarity": float(score)}
+            for i, score in zip(top, top_scores)
+            if score >= similarity_threshold
+        ]
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        if self._matrix.dtype == np.float32:
+            return self._matrix @ query
+
+        # Decode in small cache-sized chunks, a query never materializes the whole float32 matrix
+        scores = np.empty(len(self._matrix), dtype=np.float32)
+        for start in range(0, len(self._matrix), self._chunk_size):
+            chunk = self._matrix[start:start + self._chunk_size].astype(np.float32)
+            scores[start:start + self._chunk_size] = chunk @ query
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, scores.shape[0])
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        return top[np.argsort(-scores[top], kind="stable")]
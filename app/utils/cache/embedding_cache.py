@@ -0,0 +1,166 @@
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from cachetools import TTLCache
+from app.config.logger_settings import get_logger
+
+
+logger = get_logger("embedding_cache")
+
+
+class _CountingTTLCache(TTLCache):
+    """
+    TTLCache that counts LRU evictions (expired items are not counted)
+    """
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings:
+    in-memory LRU with TTL in front of an on-disk SQLite store.
+    Keys are built from normalized query text and embedding model name.
+    Disk entries expire after the same TTL and are capped at 'disk_maxsize' rows, oldest removed first,
+    pruned on open and every 'prune_every' writes. Disk errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        maxsize: int = 1024,
+        ttl: int = 24 * 3600,
+        disk_maxsize: int = 100_000,
+        prune_every: int = 100,
+    ):
+        self._memory = _CountingTTLCache(maxsize=maxsize, ttl=ttl)
+        self._ttl = ttl
+        self._disk_maxsize = disk_maxsize
+        self._prune_every = prune_every
+        self._writes = 0
+        self._db_path = db_path
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            try:
+                self._open_disk(db_path)
+            except (OSError, sqlite3.Error) as e:
+                # Disk tier is optional, the cache keeps working in memory
+                logger.warning(f"Embedding cache disk tier unavailable at {db_path}, memory only: {e}")
+                if self._db is not None:
+                    self._db.close()
+                self._db = None
+
+    def _open_disk(self, db_path: str) -> None:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+        self._db.commit()
+        self._prune_disk()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split()).casefold()
+
+    @classmethod
+    def make_key(cls, text: str, model: str) -> str:
+        digest = hashlib.sha256(cls.normalize(text).encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    async def get(self, text: str, model: str) -> list[float] | None:
+        key = self.make_key(text, model)
+        embedding = self._memory.get(key)
+        if embedding is not None:
+            self.memory_hits += 1
+            return embedding
+
+        if self._db is not None:
+            try:
+                embedding = await asyncio.to_thread(self._read_disk, key)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache disk read failed: {e}")
+                embedding = None
+            if embedding is not None:
+                self.disk_hits += 1
+                self._memory[key] = embedding
+                return embedding
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, model: str, embedding: list[float]) -> None:
+        key = self.make_key(text, model)
+        self._memory[key] = embedding
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._write_disk, key, model, embedding)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache disk write failed: {e}")
+
+    def _read_disk(self, key: str) -> list[float] | None:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT embedding FROM embeddings WHERE key = ? AND created_at >= ?", (key, time.time() - self._ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def _write_disk(self, key: str, model: str, embedding: list[float]) -> None:
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model, embedding, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, blob, time.time()),
+            )
+            self._db.commit()
+            self._writes += 1
+            if self._writes % self._prune_every == 0:
+                self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        # Called with '_db_lock' held or before the cache is shared
+        self._db.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self._ttl,))
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self._disk_maxsize,),
+        )
+        self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self._memory.evictions,
+            "memory_size": len(self._memory),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        logger.info(f"Embedding cache closed, stats: {self.stats()}")
@@ -0,0 +1,69 @@
+import json
+import hashlib
+from dataclasses import dataclass, field
+from cachetools import TTLCache
+
+
+@dataclass
+class CachedRecommendation:
+    message: str
+    recipe_id: str
+    usage: dict = field(default_factory=dict)
+
+
+class RecommendationCache:
+    """
+    Exact-match cache for LLM recipe recommendations.
+    Key is a stable hash of chat model, candidate recipe IDs (in prompt order)
+    and the preference fields which are used in the prompt.
+    """
+
+    PROMPT_FIELDS = (
+        "meal_type",
+        "dietary_preference",
+        "include_ingredients",
+        "additional_notes",
+        "banned_foods",
+        "disliked_recipes_comments",
+    )
+
+    def __init__(self, maxsize: int = 512, ttl: int = 900):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def make_key(cls, recipe_ids: list[int], client_response: dict, model: str) -> str:
+        preferences = {}
+        for name in cls.PROMPT_FIELDS:
+            value = client_response.get(name)
+            if name == "banned_foods" and value:
+                value = sorted(value)
+            preferences[name] = value
+
+        raw = json.dumps(
+            {"model": model, "recipe_ids": [int(i) for i in recipe_ids], "preferences": preferences},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> CachedRecommendation | None:
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: CachedRecommendation) -> None:
+        self.cache[key] = value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.cache),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -154,6 +154,13 @@ class BotMenuService:
             f"*- Filtered recipes ID after check Restrictions user recipes:*\n{final_answer_recipe.filtered_restrictions_recipes_id}\n\n"
             f"*- Recipes for analyse with LLM:*\nCount: {len(final_answer_recipe.recipes_id_after_filter)}\nRecipes ID: {final_answer_recipe.recipes_id_after_filter}\n\n"
         )
+        usage = final_answer_recipe.llm_usage
+        if usage:
+            menu_text += (
+                f"*- LLM usage:*\nModel: {usage['model']}, cached: {usage['cached']}\n"
+                f"Prompt: {usage['prompt_tokens']}, Completion: {usage['completion_tokens']}, Total: {usage['total_tokens']}\n"
+                f"Cost: ${usage['cost']:.4f}, Latency: {usage['latency_ms']:.0f} ms\n\n"
+            )
         await self.message_client.send_message(whatsapp_number, menu_text)
 
     async def send_promt_with_txt_file(self, whatsapp_number: str, link: str):
@@ -5,6 +5,36 @@ from app.config.logger_settings import get_logger
 
 logger = get_logger(__name__)
 
+WHATSAPP_MAX_LENGTH = 1600
+
+
+def split_message(text: str, max_length: int = WHATSAPP_MAX_LENGTH) -> list[str]:
+    """
+    Split long text into WhatsApp sized parts, on line breaks where possible
+    """
+    if len(text) <= max_length:
+        return [text]
+
+    parts = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_length:
+            # Single line longer than limit, cut on the last space
+            cut = line.rfind(" ", 0, max_length)
+            cut = cut if cut > 0 else max_length
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:cut])
+            line = line[cut:].lstrip(" ")
+        if len(current) + len(line) > max_length:
+            parts.append(current)
+            current = ""
+        current += line
+    if current:
+        parts.append(current)
+    return parts
+
 
 class MessageClient:
     """
@@ -16,16 +46,18 @@ class MessageClient:
         self.twilio_number = twilio_number
 
     async def send_message(self, to_number: str, body_text: str):
-        try:
-            message = await asyncio.to_thread(
-                self.client.messages.create,
-                from_=f"whatsapp:{self.twilio_number}",
-                body=body_text,
-                to=f"whatsapp:{to_number}"
-            )
-            logger.info(f"Message sent to {to_number}: {message.body}")
-        except Exception as e:
-            logger.error(f"Error sending message to {to_number}: {e}")
+        # Messages over WhatsApp limit are rejected, send them in parts
+        for part in split_message(body_text):
+            try:
+                message = await asyncio.to_thread(
+                    self.client.messages.create,
+                    from_=f"whatsapp:{self.twilio_number}",
+                    body=part,
+                    to=f"whatsapp:{to_number}"
+                )
+                logger.info(f"Message sent to {to_number}: {message.body}")
+            except Exception as e:
+                logger.error(f"Error sending message to {to_number}: {e}")
 
     async def send_interactive_message(self, to_number: str, body: str, buttons: list):
         try:
@@ -0,0 +1,57 @@
+"""
+Recall@k and query latency of the IVF index against exact RecipeVectorIndex search
+for growing catalog sizes and several n_probe values.
+
+Run: python -m benchmarks.ann_index_benchmark --sizes 1000 10000 50000 --n-probe 4 8 16
+"""
+import time
+import argparse
+import statistics
+
+from benchmarks.vector_index_benchmark import make_embeddings
+from app.services.vector_index import RecipeVectorIndex
+from app.services.ivf_index import RecipeIVFIndex
+
+
+def search_all(index, queries, k: int) -> tuple[list[set[int]], list[float]]:
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows = index.search(query, match_count=k, similarity_threshold=-1.0)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append({row["recipe_id"] for row in rows})
+    return results, timings
+
+
+def main(args) -> None:
+    print(f"{'recipes':>8}{'lists':>7}{'n_probe':>9}{'recall@k':>10}{'p50 ms':>9}{'exact p50 ms':>14}{'build s':>9}")
+    for size in args.sizes:
+        matrix, queries = make_embeddings(size, args.dim, args.seed)
+        recipe_ids = list(range(1, size + 1))
+
+        exact = RecipeVectorIndex(None)
+        exact.build(recipe_ids, matrix)
+        exact_results, exact_timings = search_all(exact, queries, args.k)
+
+        ivf = RecipeIVFIndex()
+        start = time.perf_counter()
+        ivf.build(recipe_ids, matrix, n_lists=args.n_lists)
+        build_s = time.perf_counter() - start
+
+        for n_probe in args.n_probe:
+            ivf.n_probe = n_probe
+            results, timings = search_all(ivf, queries, args.k)
+            recall = statistics.mean(len(a & b) / args.k for a, b in zip(results, exact_results))
+            print(f"{size:>8}{ivf.n_lists:>7}{n_probe:>9}{recall:>10.4f}{statistics.median(timings):>9.3f}"
+                  f"{statistics.median(exact_timings):>14.3f}{build_s:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,116 @@
+"""
+Local stand-in for the parts of supabase AsyncClient used by the RAG services.
+Data lives in memory, every execute() optionally sleeps to imitate network latency.
+"""
+import asyncio
+import math
+from dataclasses import dataclass
+
+
+@dataclass
+class LocalResponse:
+    data: list
+
+
+class LocalQuery:
+    def __init__(self, client: "LocalSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._filters = []
+        self._range = None
+        self._order = None
+        self._upsert_rows = None
+
+    def select(self, *args, **kwargs) -> "LocalQuery":
+        return self
+
+    def upsert(self, rows: dict | list[dict]) -> "LocalQuery":
+        self._upsert_rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def eq(self, column: str, value) -> "LocalQuery":
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column: str, values: list) -> "LocalQuery":
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def gt(self, column: str, value) -> "LocalQuery":
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "LocalQuery":
+        self._order = (column, desc)
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._range = (start, end)
+        return self
+
+    async def execute(self) -> LocalResponse:
+        await self._client.sleep()
+        if self._upsert_rows is not None:
+            return LocalResponse(data=self._client.upsert(self._table, self._upsert_rows))
+
+        rows = [row for row in self._client.tables.get(self._table, []) if all(f(row) for f in self._filters)]
+        if self._order is not None:
+            column, desc = self._order
+            rows.sort(key=lambda row: row.get(column), reverse=desc)
+        if self._range is not None:
+            start, end = self._range
+            rows = rows[start:end + 1]
+        return LocalResponse(data=[dict(row) for row in rows])
+
+
+class LocalRpc:
+    def __init__(self, client: "LocalSupabaseClient", name: str, params: dict):
+        self._client = client
+        self._name = name
+        self._params = params
+
+    async def execute(self) -> LocalResponse:
+        await self._client.sleep()
+        if self._name != "match_recipes":
+            raise ValueError(f"Unknown RPC: {self._name}")
+        return LocalResponse(data=self._client.match_recipes(**self._params))
+
+
+class LocalSupabaseClient:
+    def __init__(self, tables: dict[str, list[dict]] | None = None, latency_ms: float = 0.0):
+        self.tables = tables or {}
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    async def sleep(self) -> None:
+        self.calls += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    def upsert(self, table: str, rows: list[dict], key: str = "recipe_id") -> list[dict]:
+        existing = {row[key]: row for row in self.tables.setdefault(table, [])}
+        for row in rows:
+            existing[row[key]] = dict(row)
+        self.tables[table] = list(existing.values())
+        return rows
+
+    def rpc(self, name: str, params: dict) -> LocalRpc:
+        return LocalRpc(self, name, params)
+
+    def match_recipes(self, query_embedding: list[float], match_count: int) -> list[dict]:
+        """
+        Same contract as the Postgres 'match_recipes' function: cosine top match_count rows
+        """
+        query_norm = math.sqrt(sum(x * x for x in query_embedding)) or 1.0
+        scored = []
+        for row in self.tables.get("recipe_embeddings", []):
+            vector = row["embedding_vector"]
+            dot = sum(a * b for a, b in zip(query_embedding, vector))
+            norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+            scored.append({"recipe_id": row["recipe_id"], "similarity": dot / (query_norm * norm)})
+        scored.sort(key=lambda r: r["similarity"], reverse=True)
+        return scored[:match_count]
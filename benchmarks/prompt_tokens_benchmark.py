@@ -0,0 +1,102 @@
+"""
+Before/after prompt size for the recommendation prompt on real recipe rows.
+"Before" is the unbounded prompt, "after" uses budget and limits from project settings.
+
+Run: python -m benchmarks.prompt_tokens_benchmark --source csv --csv recipes.csv
+     python -m benchmarks.prompt_tokens_benchmark --source db
+"""
+import csv
+import time
+import asyncio
+import argparse
+import statistics
+
+from app.config.project_config import project_settings
+from app.services.prompt_builder import RecipePromptBuilder
+
+
+CLIENT_RESPONSE = {
+    "meal_type": "Lunch",
+    "dietary_preference": "No preference",
+    "include_ingredients": "No preference",
+    "additional_notes": "",
+    "banned_foods": ["Wheat", "Cow milk", "Egg white", "Soy", "Peanut"],
+    "disliked_recipes_id": [],
+    "disliked_recipes_comments": ["Too spicy for me", "Takes too long to prepare", "I don't like fish"] * 4,
+}
+
+
+def load_rows_from_csv(file_path: str) -> list[dict]:
+    rows = []
+    with open(file_path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=',')
+        reader.fieldnames = [name.lstrip("﻿") for name in reader.fieldnames]
+        reader.fieldnames[0] = "id"
+        for row in reader:
+            rows.append({
+                "id": row["id"],
+                "name": row["name"],
+                "sub_title": row["sub_title"],
+                "preparation_method": row["preparation_method"],
+                "minutes": row["minutes"],
+                "meal_type": row["meal_types"],
+                "foods": row.get("foods", row["ingredients"]),
+                "ingredients": row["ingredients"],
+            })
+    return rows
+
+
+async def load_rows_from_db() -> list[dict]:
+    from app.database.db import get_supabase_client
+
+    supabase_client = await get_supabase_client()
+    return await supabase_client.read("recipes_view_data", {})
+
+
+def measure(builder: RecipePromptBuilder, groups: list[list[dict]]) -> tuple[list[int], list[float]]:
+    tokens, timings = [], []
+    for group in groups:
+        start = time.perf_counter()
+        _, estimated = builder.build(group, CLIENT_RESPONSE)
+        timings.append((time.perf_counter() - start) * 1000)
+        tokens.append(estimated)
+    return tokens, timings
+
+
+def main(args) -> None:
+    if args.source == "db":
+        rows = asyncio.run(load_rows_from_db())
+    else:
+        rows = load_rows_from_csv(args.csv)
+
+    groups = [rows[i:i + args.candidates] for i in range(0, len(rows) - args.candidates + 1, args.candidates)]
+    if not groups:
+        raise SystemExit(f"Need at least {args.candidates} recipe rows, got {len(rows)}")
+
+    before = RecipePromptBuilder()
+    after = RecipePromptBuilder(
+        token_budget=project_settings.prompt_token_budget,
+        max_field_chars=project_settings.prompt_max_field_chars,
+        max_ingredients_chars=project_settings.prompt_max_ingredients_chars,
+        max_comments=project_settings.prompt_max_comments,
+        max_comment_chars=project_settings.prompt_max_comment_chars,
+        dedupe_foods=True,
+    )
+    before_tokens, before_ms = measure(before, groups)
+    after_tokens, after_ms = measure(after, groups)
+
+    print(f"rows={len(rows)} prompts={len(groups)} candidates per prompt={args.candidates} "
+          f"budget={project_settings.prompt_token_budget}")
+    for name, tokens, timings in (("before", before_tokens, before_ms), ("after", after_tokens, after_ms)):
+        print(f"{name:<7} tokens mean {statistics.mean(tokens):8.0f}   max {max(tokens):6d}   "
+              f"build {statistics.mean(timings):.3f} ms")
+    saved = 1 - statistics.mean(after_tokens) / statistics.mean(before_tokens)
+    print(f"estimated prompt tokens saved: {saved:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", choices=("csv", "db"), default="csv")
+    parser.add_argument("--csv", default=project_settings.recipes_rag_csv_path)
+    parser.add_argument("--candidates", type=int, default=10)
+    main(parser.parse_args())
@@ -0,0 +1,281 @@
+"""
+Offline quality and latency harness for AskRagForRecipe.ask_recipe.
+
+Every external dependency is replaced by a deterministic local stand-in:
+- OpenAI embeddings: hashed bag-of-words vectors, served through httpx.MockTransport
+- OpenAI chat: picks the first recipe of the prompt, plain JSON or SSE stream
+- Supabase tables and 'match_recipes' RPC: benchmarks.local_supabase
+Each stand-in sleeps a configurable latency, so stage timings resemble production shape.
+
+A fixed set of RecipeUserPreferencesDTO queries is replayed, every query has relevant
+recipes labeled from the synthetic catalog (meal type matches, all requested ingredients
+are present, no banned food). Report has p50/p95/p99 per stage and recall@k.
+With --rerank, recipes chosen locally (without LLM) and how many of them are relevant are
+reported separately, run with several --rerank-margin values to calibrate LOCAL_RERANK_MARGIN.
+
+Run: python -m benchmarks.rag_harness --recipes 2000 --index int8 --catalog --rerank
+"""
+import re
+import json
+import asyncio
+import hashlib
+import argparse
+import statistics
+import numpy as np
+import httpx
+
+from benchmarks.local_supabase import LocalSupabaseClient
+from app.api.dtos.recipe_user_preferences_dto import RecipeUserPreferencesDTO
+from app.services.openai_client import OpenAIClient
+from app.services.prompt_builder import estimate_tokens
+from app.services.rag_service import AskRagForRecipe
+from app.services.recipe_catalog import RecipeCatalog
+from app.services.recipe_reranker import RecipeReranker
+from app.services.vector_index import RecipeVectorIndex
+from app.services.llm_usage_tracker import LLMUsageTracker
+from app.services.ivf_index import RecipeIVFIndex
+
+
+MEAL_TYPES = ("Breakfast", "Lunch", "Dinner", "Snack")
+FOODS = (
+    "egg", "milk", "chicken", "rice", "tomato", "cheese", "tuna", "oats", "banana", "lentils",
+    "tofu", "beef", "spinach", "yogurt", "peanut", "salmon", "potato", "avocado", "bread", "pasta",
+)
+STAGES = ("embedding", "search", "load", "filter", "rerank", "prompt", "llm", "total")
+PROMPT_RECIPE_ID_PATTERN = re.compile(r"\[RECIPE_ID:\s*(\d+)\]")
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+# (meal_type, include_ingredients, banned_foods, additional_notes)
+QUERIES = (
+    ("Breakfast", "egg", None, ""),
+    ("Breakfast", "oats, banana", None, "quick"),
+    ("Breakfast", "yogurt", ["peanut"], ""),
+    ("Lunch", "chicken, rice", None, ""),
+    ("Lunch", "tuna", ["egg"], "20 min"),
+    ("Lunch", "lentils", ["milk", "cheese"], ""),
+    ("Dinner", "salmon, potato", None, ""),
+    ("Dinner", "beef", ["tomato"], ""),
+    ("Dinner", "tofu, spinach", ["beef", "chicken"], ""),
+    ("Snack", "avocado, bread", None, "quick"),
+    ("Snack", "banana", ["peanut", "milk"], ""),
+    ("Dinner", "pasta, cheese", None, ""),
+)
+
+
+def text_embedding(text: str, dim: int, base_weight: float = 0.9) -> list[float]:
+    """
+    Deterministic embedding: unit hashed bag of words plus a component shared by all texts,
+    so every pair passes the 0.75 similarity cutoff and ranking follows word overlap
+    """
+    vector = np.zeros(dim, dtype=np.float64)
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        vector[1 + int.from_bytes(digest, "little") % (dim - 1)] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector *= np.sqrt(1 - base_weight ** 2) / norm
+    vector[0] = base_weight
+    return vector.tolist()
+
+
+def make_recipes(count: int, seed: int) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    recipes = []
+    for recipe_id in range(1, count + 1):
+        foods = [FOODS[i] for i in rng.choice(len(FOODS), int(rng.integers(3, 6)), replace=False)]
+        meal_type = MEAL_TYPES[int(rng.integers(0, len(MEAL_TYPES)))]
+        recipes.append({
+            "id": recipe_id,
+            "name": f"{foods[0].title()} and {foods[1]} {meal_type.lower()} #{recipe_id}",
+            "sub_title": f"With {foods[-1]}",
+            "preparation_method": "Mix everything.\r\nCook for a while.",
+            "nut_recommend": "Balanced meal",
+            "comment": "",
+            "minutes": int(rng.choice([10, 15, 20, 30, 45, 60])),
+            "meal_type": meal_type,
+            "foods": ", ".join(foods),
+            "ingredients": ";".join(f"{int(rng.integers(1, 4))} {food}" for food in foods),
+        })
+    return recipes
+
+
+def recipe_text(recipe: dict) -> str:
+    return (
+        f"Name: {recipe['name']}\nSubtitle: {recipe['sub_title']}\n"
+        f"Meal Type: {recipe['meal_type']}\nIngredients: {recipe['ingredients']}"
+    )
+
+
+def make_queries(count: int) -> list[RecipeUserPreferencesDTO]:
+    return [
+        RecipeUserPreferencesDTO(
+            meal_type=meal_type,
+            include_ingredients=include_ingredients,
+            banned_foods=banned_foods,
+            additional_notes=additional_notes,
+        )
+        for meal_type, include_ingredients, banned_foods, additional_notes in (QUERIES[i % len(QUERIES)] for i in range(count))
+    ]
+
+
+def relevant_ids(recipes: list[dict], query: RecipeUserPreferencesDTO) -> set[int]:
+    wanted = [food.strip() for food in query.include_ingredients.split(",") if food.strip()]
+    banned = query.banned_foods or []
+    return {
+        recipe["id"]
+        for recipe in recipes
+        if recipe["meal_type"] == query.meal_type
+        and all(food in recipe["foods"] for food in wanted)
+        and not any(food in recipe["foods"] for food in banned)
+    }
+
+
+def make_openai_transport(dim: int, embedding_latency_ms: float, chat_latency_ms: float) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if request.url.path.endswith("/embeddings"):
+            await asyncio.sleep(embedding_latency_ms / 1000)
+            data = [{"index": i, "embedding": text_embedding(text, dim)} for i, text in enumerate(payload["input"])]
+            return httpx.Response(200, json={"data": data})
+
+        await asyncio.sleep(chat_latency_ms / 1000)
+        prompt = payload["messages"][-1]["content"]
+        match = PROMPT_RECIPE_ID_PATTERN.search(prompt)
+        message = f"[RECIPE_ID: {match.group(1) if match else 0}]\nThis recipe fits your request."
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(message)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+        if not payload.get("stream"):
+            return httpx.Response(200, json={"choices": [{"message": {"content": message}}], "usage": usage})
+
+        events = [{"choices": [{"delta": {"content": message[i:i + 8]}}]} for i in range(0, len(message), 8)]
+        events.append({"choices": [], "usage": usage})
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=body.encode("utf-8"), headers={"content-type": "text/event-stream"})
+
+    return httpx.MockTransport(handler)
+
+
+async def make_vector_index(kind: str, supabase: LocalSupabaseClient, args):
+    if kind == "rpc":
+        return None
+    if kind == "ivf":
+        embedding_rows = supabase.tables["recipe_embeddings"]
+        index = RecipeIVFIndex(n_probe=args.n_probe)
+        index.build([row["recipe_id"] for row in embedding_rows], [row["embedding_vector"] for row in embedding_rows])
+        return index
+    index = RecipeVectorIndex(supabase, dtype=kind)
+    await index.load()
+    return index
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(q * len(values))) - 1))]
+
+
+async def run(args) -> None:
+    recipes = make_recipes(args.recipes, args.seed)
+    embedding_rows = [{"recipe_id": r["id"], "embedding_vector": text_embedding(recipe_text(r), args.dim)} for r in recipes]
+    supabase = LocalSupabaseClient(
+        {"recipes_view_data": recipes, "recipe_embeddings": embedding_rows}, latency_ms=0
+    )
+
+    vector_index = await make_vector_index(args.index, supabase, args)
+    recipe_catalog = None
+    if args.catalog:
+        recipe_catalog = RecipeCatalog(supabase)
+        await recipe_catalog.load()
+    # Latency applies to request-time calls only, not to startup loading
+    supabase.latency_ms = args.db_latency_ms
+
+    openai_client = OpenAIClient(
+        "local",
+        max_retries=0,
+        transport=make_openai_transport(args.dim, args.embedding_latency_ms, args.chat_latency_ms),
+    )
+    usage_tracker = LLMUsageTracker(daily_budget=args.daily_budget)
+    rag = AskRagForRecipe(
+        openai_client,
+        supabase,
+        csv_file_path="",
+        vector_index=vector_index,
+        stream_completions=args.stream,
+        reranker=RecipeReranker(confidence_margin=args.rerank_margin) if args.rerank else None,
+        recipe_catalog=recipe_catalog,
+        usage_tracker=usage_tracker,
+    )
+
+    timings = {stage: [] for stage in STAGES}
+    recalls, selected_hits, llm_calls, empty = [], 0, 0, 0
+    local_calls, local_hits = 0, 0
+    loop = asyncio.get_running_loop()
+    for query in make_queries(args.queries):
+        relevant = relevant_ids(recipes, query)
+        start = loop.time()
+        answer = await rag.ask_recipe(query)
+        total_ms = (loop.time() - start) * 1000
+        if answer is None:
+            empty += 1
+            continue
+
+        for stage, value in answer.stage_timings_ms.items():
+            timings[stage].append(value)
+        timings["total"].append(total_ms)
+        llm_calls += "llm" in answer.stage_timings_ms
+
+        retrieved = (answer.recipes_id_after_filter or [])[:args.k]
+        if relevant:
+            recalls.append(len(relevant.intersection(retrieved)) / min(args.k, len(relevant)))
+        selected_relevant = answer.ai_result_recipe_id is not None and int(answer.ai_result_recipe_id) in relevant
+        selected_hits += selected_relevant
+        if "llm" not in answer.stage_timings_ms:
+            local_calls += 1
+            local_hits += selected_relevant
+
+    await openai_client.aclose()
+
+    answered = args.queries - empty
+    print(
+        f"recipes={args.recipes} dim={args.dim} queries={args.queries} index={args.index} catalog={args.catalog} "
+        f"rerank={args.rerank} margin={args.rerank_margin} stream={args.stream}"
+    )
+    print(
+        f"latency ms: embedding={args.embedding_latency_ms} chat={args.chat_latency_ms} db={args.db_latency_ms}"
+    )
+    print(f"{'stage':<10} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for stage in STAGES:
+        values = timings[stage]
+        if values:
+            print(f"{stage:<10} {len(values):>5} {statistics.median(values):9.2f} {percentile(values, .95):9.2f} {percentile(values, .99):9.2f}")
+    recall = statistics.mean(recalls) if recalls else 0.0
+    print(f"recall@{args.k}: {recall:.3f} over {len(recalls)} labeled queries")
+    for model, usage in usage_tracker.snapshot()["by_model"].items():
+        print(
+            f"LLM {model}: {usage['requests']} calls, avg prompt {usage['avg_prompt_tokens']} tokens, "
+            f"avg latency {usage['avg_latency_ms']:.1f} ms, cost ${usage['cost']:.4f}"
+        )
+    print(f"selected recipe relevant: {selected_hits}/{answered}, LLM calls: {llm_calls}/{answered}, filtered out: {empty}")
+    if args.rerank:
+        print(f"chosen locally: {local_calls}/{answered}, relevant {local_hits}/{local_calls}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index", choices=("rpc", "float32", "float16", "int8", "ivf"), default="float32")
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--catalog", action="store_true")
+    parser.add_argument("--rerank", action="store_true")
+    parser.add_argument("--rerank-margin", type=float, default=0.2)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--embedding-latency-ms", type=float, default=80.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=600.0)
+    parser.add_argument("--db-latency-ms", type=float, default=40.0)
+    parser.add_argument("--daily-budget", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,122 @@
+"""
+Compare per-word 'process.extract' matching (previous RecipeFinder) with batch
+matching of RecipeFinder (character prefilter + one 'process.cpdist' call)
+on a synthetic Hebrew/English vocabulary. Also checks that batch matching finds the
+same names as a full 'process.cdist' over the processed vocabulary.
+Then times the full RecipeFinder path: exact phrase pass, fuzzy matching of leftover tokens only.
+
+Run: python -m benchmarks.recipe_finder_benchmark --ingredients 3000 --words 40
+"""
+import time
+import asyncio
+import argparse
+import statistics
+import numpy as np
+from rapidfuzz import process, fuzz
+
+from app.services.recipe_finder import RecipeFinder
+
+
+HEBREW_LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+ENGLISH_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def make_vocabulary(count: int, seed: int) -> tuple[list[str], list[str]]:
+    """
+    Same shape as FuzzyIngredientsService result: Hebrew names (some of two words), then English names
+    with many missing (None) and repeated entries
+    """
+    rng = np.random.default_rng(seed)
+
+    def word(letters: str) -> str:
+        return "".join(rng.choice(list(letters), int(rng.integers(3, 9))))
+
+    hebrew = [word(HEBREW_LETTERS) + (" " + word(HEBREW_LETTERS) if rng.random() < 0.2 else "") for _ in range(count)]
+    english = [None if rng.random() < 0.4 else word(ENGLISH_LETTERS).title() for _ in range(count)]
+    english = [english[int(rng.integers(0, i))] if i and rng.random() < 0.2 else name for i, name in enumerate(english)]
+    return hebrew + english, [name for name in hebrew + english if name]
+
+
+def make_message(names: list[str], words: int, seed: int) -> str:
+    """
+    Free text: known names, some with a typo or a Hebrew "and" prefix, mixed with unknown filler words
+    """
+    rng = np.random.default_rng(seed)
+    parts = []
+    for _ in range(words):
+        name = names[int(rng.integers(0, len(names)))]
+        if rng.random() < 0.3 and len(name) > 3:
+            i = int(rng.integers(0, len(name)))
+            name = name[:i] + name[i + 1:]
+        elif rng.random() < 0.3 and name[0] in HEBREW_LETTERS:
+            name = "ו" + name
+        parts.append(name if rng.random() < 0.6 else "filler" + str(int(rng.integers(0, 100))))
+    return " ".join(parts)
+
+
+def legacy_match(words: list[str], known_ingredients: list[str], similarity_threshold: int) -> list[str]:
+    matches = []
+    for word in words:
+        for match, score, _ in process.extract(word, known_ingredients):
+            if score >= similarity_threshold:
+                matches.append(match)
+    return matches
+
+
+def full_cdist_match(finder: RecipeFinder, words: list[str], similarity_threshold: int) -> set[str]:
+    queries = finder._processed_queries(words)
+    scores = process.cdist(queries, finder._processed_vocabulary, scorer=fuzz.WRatio, score_cutoff=similarity_threshold)
+    matches = set()
+    for row in scores:
+        passed = np.flatnonzero(row >= similarity_threshold)
+        matches.update(finder._vocabulary[i] for i in passed[np.argsort(-row[passed], kind="stable")[:finder._limit]])
+    return matches
+
+
+def measure(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(args) -> None:
+    known_ingredients, names = make_vocabulary(args.ingredients, args.seed)
+    message = make_message(names, args.words, args.seed)
+    finder = RecipeFinder(known_ingredients, workers=args.workers)
+    words = finder._extract_words(message)
+
+    legacy_timings = measure(lambda: legacy_match(words, known_ingredients, args.threshold), args.repeat)
+    batch_timings = measure(lambda: finder.match_words(words, args.threshold), args.repeat)
+
+    legacy = set(legacy_match(words, known_ingredients, args.threshold))
+    batch = set(finder.match_words(words, args.threshold))
+    print(f"vocabulary {len(known_ingredients)} names ({len(finder._vocabulary)} after dedupe), message {len(words)} words")
+    print(f"process.extract per word  median {statistics.median(legacy_timings):8.2f} ms")
+    print(f"prefilter + cpdist batch  median {statistics.median(batch_timings):8.2f} ms")
+    print(f"matched names: legacy {len(legacy)}, batch {len(batch)}, common {len(legacy & batch)}")
+    print(f"batch equals full cdist: {batch == full_cdist_match(finder, words, args.threshold)}")
+
+    tokens = message.lower().split()
+    exact, leftover = finder.match_phrases(tokens)
+    phrase_timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        await finder.find_recipes_by_ingredients(message, args.threshold)
+        phrase_timings.append((time.perf_counter() - start) * 1000)
+    found = await finder.find_recipes_by_ingredients(message, args.threshold) or []
+    print(f"exact pass: {len(exact)} names, {len(tokens) - len(leftover)} of {len(tokens)} tokens resolved")
+    print(f"exact + fuzzy leftovers   median {statistics.median(phrase_timings):8.2f} ms, {len(found)} names")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ingredients", type=int, default=3000)
+    parser.add_argument("--words", type=int, default=40)
+    parser.add_argument("--threshold", type=int, default=80)
+    parser.add_argument("--workers", type=int, default=-1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""
+Compare AskRagForRecipe._search_similar_embeddings through the in-process
+RecipeVectorIndex against the 'match_recipes' RPC path (local stand-in).
+
+Run: python -m benchmarks.vector_index_benchmark --recipes 500 --rpc-latency-ms 40
+"""
+import time
+import asyncio
+import argparse
+import statistics
+import numpy as np
+
+from benchmarks.local_supabase import LocalSupabaseClient
+from app.services.openai_client import OpenAIClient
+from app.services.rag_service import AskRagForRecipe
+from app.services.vector_index import RecipeVectorIndex
+
+
+def make_embeddings(recipes: int, dim: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Clustered unit vectors, so part of the catalog passes the 0.75 similarity cutoff
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(recipes // 20, 1), dim))
+    matrix = centers[rng.integers(0, len(centers), recipes)] + rng.normal(scale=0.35, size=(recipes, dim))
+    queries = centers[rng.integers(0, len(centers), 50)] + rng.normal(scale=0.35, size=(50, dim))
+    return matrix, queries
+
+
+async def measure(rag: AskRagForRecipe, queries: list[list[float]], match_count: int) -> tuple[list[float], list[list[int]]]:
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows = await rag._search_similar_embeddings(query_embedding=query, match_count=match_count)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append([int(r["recipe_id"]) for r in rows])
+    return timings, results
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<14} mean {statistics.mean(timings):8.3f} ms   p50 {statistics.median(timings):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+async def main(args) -> None:
+    matrix, queries = make_embeddings(args.recipes, args.dim, args.seed)
+    rows = [{"recipe_id": i + 1, "embedding_vector": vector.tolist()} for i, vector in enumerate(matrix)]
+    queries = [q.tolist() for q in queries]
+    supabase = LocalSupabaseClient({"recipe_embeddings": rows}, latency_ms=args.rpc_latency_ms)
+
+    openai_client = OpenAIClient("local")
+    rpc_rag = AskRagForRecipe(openai_client, supabase, csv_file_path="")
+    rpc_timings, rpc_results = await measure(rpc_rag, queries, args.match_count)
+
+    vector_index = RecipeVectorIndex(supabase)
+    start = time.perf_counter()
+    await vector_index.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    index_rag = AskRagForRecipe(openai_client, supabase, csv_file_path="", vector_index=vector_index)
+    index_timings, index_results = await measure(index_rag, queries, args.match_count)
+
+    await openai_client.aclose()
+
+    same = sum(a == b for a, b in zip(rpc_results, index_results))
+    print(f"recipes={args.recipes} dim={args.dim} match_count={args.match_count} rpc_latency={args.rpc_latency_ms}ms")
+    print(f"index load: {load_ms:.1f} ms, matrix {matrix.shape[0]}x{matrix.shape[1]} float32")
+    report("rpc", rpc_timings)
+    report("vector index", index_timings)
+    print(f"identical result lists: {same}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--match-count", type=int, default=15)
+    parser.add_argument("--rpc-latency-ms", type=float, default=40.0)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+"""
+Recall@k and memory of RecipeVectorIndex storage types against exact float32 search.
+The float64 Python lists row shows what keeping Supabase rows as-is would cost.
+
+Run: python -m benchmarks.vector_quantization_benchmark --recipes 20000 --k 10
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import numpy as np
+
+from benchmarks.vector_index_benchmark import make_embeddings
+from app.services.vector_index import RecipeVectorIndex
+
+
+def python_lists_bytes(matrix: np.ndarray) -> int:
+    """
+    Approximate size of embeddings kept as lists of Python floats
+    """
+    rows, dim = matrix.shape
+    return rows * (sys.getsizeof([0.0] * dim) + dim * sys.getsizeof(0.0))
+
+
+def search_all(index: RecipeVectorIndex, queries: np.ndarray, k: int) -> tuple[list[set[int]], list[float]]:
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows = index.search(query, match_count=k, similarity_threshold=-1.0)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append({row["recipe_id"] for row in rows})
+    return results, timings
+
+
+def main(args) -> None:
+    matrix, queries = make_embeddings(args.recipes, args.dim, args.seed)
+    recipe_ids = list(range(1, args.recipes + 1))
+
+    exact = RecipeVectorIndex(None)
+    exact.build(recipe_ids, matrix)
+    exact_results, _ = search_all(exact, queries, args.k)
+
+    print(f"recipes={args.recipes} dim={args.dim} k={args.k} queries={len(queries)}")
+    print(f"{'storage':<22}{'RAM MiB':>10}{'recall@k':>10}{'p50 ms':>10}")
+    print(f"{'float64 python lists':<22}{python_lists_bytes(matrix) / 2**20:>10.1f}{'':>10}{'':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        variants = [
+            ("float32", "float32", None),
+            ("float16", "float16", None),
+            ("int8", "int8", None),
+            ("float16 + rescore", "float16", os.path.join(tmp_dir, "f16.npy")),
+            ("int8 + rescore", "int8", os.path.join(tmp_dir, "i8.npy")),
+        ]
+        for name, dtype, rescore_path in variants:
+            index = RecipeVectorIndex(None, dtype=dtype, rescore_path=rescore_path, rescore_candidates=args.rescore_candidates)
+            index.build(recipe_ids, matrix)
+            results, timings = search_all(index, queries, args.k)
+            recall = statistics.mean(len(a & b) / args.k for a, b in zip(results, exact_results))
+            print(f"{name:<22}{index.nbytes / 2**20:>10.1f}{recall:>10.4f}{statistics.median(timings):>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-candidates", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,34 @@
+"""
+Build IVF approximate nearest-neighbour index over Supabase 'recipe_embeddings'
+and save it to ANN_INDEX_PATH. The app loads it on startup instead of the exact index.
+Re-run after new recipe embeddings are saved.
+
+Run: python -m scripts.build_recipe_ann_index [--n-lists 300]
+"""
+import asyncio
+import argparse
+
+from app.config.project_config import project_settings
+from app.database.db import get_supabase_client
+from app.services.vector_index import fetch_recipe_embeddings
+from app.services.ivf_index import RecipeIVFIndex
+
+
+async def main(args):
+    supabase_client = await get_supabase_client()
+    client = await supabase_client.get_client()
+    recipe_ids, matrix = await fetch_recipe_embeddings(client)
+    if not recipe_ids:
+        raise Exception("No recipe embeddings found, run scripts.save_recipes_embeddings first")
+
+    index = RecipeIVFIndex()
+    index.build(recipe_ids, matrix, n_lists=args.n_lists, iterations=args.iterations)
+    index.save(args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n-lists", type=int, default=None, help="Number of lists, default ~sqrt(recipes)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", default=project_settings.ann_index_path)
+    asyncio.run(main(parser.parse_args()))
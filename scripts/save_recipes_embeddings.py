@@ -0,0 +1,31 @@
+"""
+Embed recipes from recipes.csv and save them into Supabase 'recipe_embeddings'.
+Re-runs skip unchanged recipes and continue after a crash from the checkpoint file.
+
+Run: python -m scripts.save_recipes_embeddings
+"""
+import asyncio
+
+from app.config.project_config import project_settings
+from app.database.db import get_supabase_client
+from app.services.openai_client import OpenAIClient
+from app.services.rag_service import SaveRecipesEmbeddings
+
+
+async def main():
+    supabase_client = await get_supabase_client()
+    client = await supabase_client.get_client()
+    openai_client = OpenAIClient(project_settings.OPENAI_API_KEY, http2=project_settings.OPENAI_HTTP2)
+    service = SaveRecipesEmbeddings(
+        openai_client,
+        client,
+        checkpoint_path=project_settings.embeddings_checkpoint_path,
+    )
+    try:
+        await service.save_recipes(project_settings.recipes_rag_csv_path)
+    finally:
+        await openai_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
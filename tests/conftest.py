@@ -0,0 +1,17 @@
+import os
+
+
+# Settings without defaults are read on import of 'app.config.project_config',
+# unit tests never reach these services
+for name in (
+    "TWILIO_ACCOUNT_SID",
+    "TWILIO_AUTH_TOKEN",
+    "TWILIO_NUMBER",
+    "SUPABASE_URL",
+    "SUPABASE_KEY",
+    "OPENAI_API_KEY",
+    "GOOGLE_CLIENT_ID",
+    "GOOGLE_SERVICE_ACCOUNT",
+    "GOOGLE_SPREADSHEET_ID",
+):
+    os.environ.setdefault(name, "test")
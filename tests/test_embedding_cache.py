@@ -0,0 +1,62 @@
+import asyncio
+import os
+
+from app.utils.cache.embedding_cache import EmbeddingCache
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "cache" / "embeddings.sqlite3")
+
+    async def scenario():
+        cache = EmbeddingCache(db_path)
+        await cache.set("Vegan  lunch", "model", [0.5, 0.25])
+        cache.close()
+        reopened = EmbeddingCache(db_path)
+        embedding = await reopened.get("vegan lunch", "model")
+        reopened.close()
+        return embedding, reopened.disk_hits
+
+    assert asyncio.run(scenario()) == ([0.5, 0.25], 1)
+
+
+def test_expired_disk_entries_are_ignored(tmp_path):
+    db_path = str(tmp_path / "embeddings.sqlite3")
+
+    async def scenario():
+        cache = EmbeddingCache(db_path, ttl=0)
+        await cache.set("query", "model", [1.0])
+        return await EmbeddingCache(db_path, ttl=0).get("query", "model")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_disk_size_is_capped(tmp_path):
+    db_path = str(tmp_path / "embeddings.sqlite3")
+
+    async def scenario():
+        cache = EmbeddingCache(db_path, disk_maxsize=3, prune_every=1)
+        for i in range(10):
+            await cache.set(f"query {i}", "model", [float(i)])
+        return cache._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_unusable_path_falls_back_to_memory(tmp_path):
+    # Directory in place of the database file
+    db_path = str(tmp_path / "embeddings.sqlite3")
+    os.makedirs(db_path)
+
+    async def scenario():
+        cache = EmbeddingCache(db_path)
+        await cache.set("query", "model", [1.0])
+        return await cache.get("query", "model"), cache.stats()["memory_hits"]
+
+    assert asyncio.run(scenario()) == ([1.0], 1)
+
+
+def test_corrupt_database_falls_back_to_memory(tmp_path):
+    db_path = tmp_path / "embeddings.sqlite3"
+    db_path.write_bytes(b"not a database" * 100)
+    cache = EmbeddingCache(str(db_path))
+    assert cache._db is None
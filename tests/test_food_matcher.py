@@ -0,0 +1,63 @@
+import random
+import re
+
+from app.services.food_matcher import build_trie_pattern, get_banned_foods_matcher
+
+
+def legacy_search(banned_foods: list[str], foods: str) -> bool:
+    return any(banned.lower() in foods.lower() for banned in banned_foods if banned)
+
+
+def test_trie_pattern_matches_words_sharing_prefix():
+    pattern = re.compile(build_trie_pattern(("egg", "eggplant", "eel")))
+    assert pattern.fullmatch("egg")
+    assert pattern.fullmatch("eggplant")
+    assert pattern.fullmatch("eel")
+    assert not pattern.fullmatch("eggs")
+
+
+def test_trie_pattern_escapes_regex_characters():
+    pattern = re.compile(build_trie_pattern(("c++", "a.b")))
+    assert pattern.search("uses c++ code")
+    assert not pattern.search("axb")
+
+
+def test_empty_list_matches_nothing():
+    matcher = get_banned_foods_matcher([])
+    assert not matcher
+    assert matcher.search("milk, eggs") is None
+    assert not get_banned_foods_matcher(None)
+
+
+def test_search_returns_found_food():
+    matcher = get_banned_foods_matcher(["Milk", "Peanut"])
+    assert matcher.search("rice, peanut butter") == "peanut"
+    assert matcher.search("rice, beans") is None
+    assert matcher.search("") is None
+
+
+def test_hebrew_substring():
+    matcher = get_banned_foods_matcher(["חלב"])
+    assert matcher.search("קמח, חלב, ביצים") == "חלב"
+
+
+def test_matcher_is_reused_for_same_list():
+    assert get_banned_foods_matcher(["milk", "egg"]) is get_banned_foods_matcher(["EGG", "milk", ""])
+
+
+def test_memoized_verdict_is_stable():
+    matcher = get_banned_foods_matcher(["soy"])
+    assert matcher.search("soy sauce, rice") == "soy"
+    assert matcher.search("soy sauce, rice") == "soy"
+
+
+def test_same_verdict_as_legacy_check():
+    rng = random.Random(7)
+    alphabet = "abcde ,"
+    for _ in range(300):
+        banned = ["".join(rng.choices(alphabet[:5], k=rng.randint(1, 4))) for _ in range(rng.randint(1, 5))]
+        foods = "".join(rng.choices(alphabet, k=rng.randint(0, 30)))
+        found = get_banned_foods_matcher(banned).search(foods)
+        assert (found is not None) == legacy_search(banned, foods)
+        if found is not None:
+            assert found in foods and found in {food.lower() for food in banned}
@@ -0,0 +1,23 @@
+from app.services.hybrid_retriever import reciprocal_rank_fusion
+
+
+def test_single_ranking_keeps_order():
+    assert reciprocal_rank_fusion([[3, 1, 2]]) == [3, 1, 2]
+
+
+def test_id_in_both_rankings_goes_first():
+    assert reciprocal_rank_fusion([[1, 2, 3], [4, 3, 5]])[0] == 3
+
+
+def test_scores_are_sum_of_reciprocal_ranks():
+    # 2: 1/2 + 1/1, 1: 1/1 + 1/3, 3: 1/3 + 1/2 with k=0
+    assert reciprocal_rank_fusion([[1, 2, 3], [2, 3, 1]], k=0) == [2, 1, 3]
+
+
+def test_ties_keep_first_seen_order():
+    assert reciprocal_rank_fusion([[1, 2], [3, 4]]) == [1, 3, 2, 4]
+
+
+def test_empty_rankings():
+    assert reciprocal_rank_fusion([]) == []
+    assert reciprocal_rank_fusion([[], [5]]) == [5]
@@ -0,0 +1,27 @@
+import numpy as np
+
+from app.services.ivf_index import RecipeIVFIndex
+
+
+def build_index(n_probe: int) -> tuple[RecipeIVFIndex, np.ndarray]:
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(200, 16)).astype(np.float32)
+    index = RecipeIVFIndex(n_probe=n_probe)
+    index.build(list(range(1000, 1200)), embeddings, n_lists=8)
+    return index, embeddings
+
+
+def test_full_probe_finds_query_vector_first():
+    index, embeddings = build_index(n_probe=8)
+    rows = index.search(embeddings[5].tolist(), match_count=3, similarity_threshold=-1.0)
+    assert rows[0]["recipe_id"] == 1005
+    assert abs(rows[0]["similarity"] - 1.0) < 1e-5
+    assert [row["similarity"] for row in rows] == sorted((row["similarity"] for row in rows), reverse=True)
+
+
+def test_non_positive_n_probe_scans_one_list():
+    for n_probe in (0, -3):
+        index, embeddings = build_index(n_probe=n_probe)
+        rows = index.search(embeddings[5].tolist(), match_count=3, similarity_threshold=-1.0)
+        # The query's own list is the closest one, so the vector itself is found
+        assert rows[0]["recipe_id"] == 1005
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.services.menu_query_warmup import MenuQueryWarmup
+
+
+class FakeRagService:
+    def __init__(self):
+        self.recipe_ids = [1]
+
+    @staticmethod
+    def build_query_text(client_response: dict) -> str:
+        return f"{client_response['meal_type']} {client_response['dietary_preference']}"
+
+    async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return [[1.0] for _ in texts]
+
+    async def search_by_embedding(self, query_embedding: list[float], match_count: int = 15) -> list[dict]:
+        return [{"recipe_id": recipe_id, "similarity": 1.0} for recipe_id in self.recipe_ids]
+
+
+class FakeCatalog:
+    version = 1
+
+
+class FakeVectorIndex:
+    loads = 0
+
+    async def load(self) -> None:
+        self.loads += 1
+
+
+def test_warm_set_follows_catalog_version():
+    async def scenario():
+        rag_service, catalog, vector_index = FakeRagService(), FakeCatalog(), FakeVectorIndex()
+        warmup = MenuQueryWarmup(rag_service, catalog, vector_index=vector_index, refresh_interval=0.01)
+        await warmup.warm()
+        preferences = warmup.menu_preferences()[0]
+        before = warmup.get(preferences, 15)
+
+        warmup.start_background_refresh()
+        rag_service.recipe_ids = [1, 2]
+        await asyncio.sleep(0.05)
+        unchanged = warmup.get(preferences, 15)
+
+        catalog.version = 2
+        await asyncio.sleep(0.05)
+        after = warmup.get(preferences, 15)
+        await warmup.stop()
+        return before, unchanged, after, vector_index.loads
+
+    before, unchanged, after, loads = asyncio.run(scenario())
+    assert [row["recipe_id"] for row in before] == [1]
+    assert [row["recipe_id"] for row in unchanged] == [1]
+    assert [row["recipe_id"] for row in after] == [1, 2]
+    assert loads == 1
@@ -0,0 +1,30 @@
+from app.wa_hooks.message_hooks import split_message
+
+
+def test_short_text_is_one_part():
+    assert split_message("hello", max_length=10) == ["hello"]
+
+
+def test_splits_on_line_breaks():
+    text = "first line\nsecond line\nthird line\n"
+    parts = split_message(text, max_length=24)
+    assert parts == ["first line\nsecond line\n", "third line\n"]
+
+
+def test_long_line_is_cut_on_spaces():
+    text = "word " * 10
+    parts = split_message(text, max_length=12)
+    assert all(len(part) <= 12 for part in parts)
+    assert " ".join(part.strip() for part in parts).split() == text.split()
+
+
+def test_line_without_spaces_is_cut_at_limit():
+    parts = split_message("x" * 25, max_length=10)
+    assert parts == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_parts_keep_all_text():
+    text = "\n".join(f"line {i} " + "ab " * (i % 7) for i in range(200))
+    parts = split_message(text, max_length=100)
+    assert all(len(part) <= 100 for part in parts)
+    assert "".join(parts) == text
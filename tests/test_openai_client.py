@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.openai_client import OpenAIClient
+
+
+SSE_BODY = b'data: {"choices": [{"delta": {"content": "Hi"}}]}\n\ndata: [DONE]\n\n'
+
+
+def make_client(responses: list) -> tuple[OpenAIClient, list]:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client = OpenAIClient("key", backoff_base=0.001, backoff_max=0.01, transport=httpx.MockTransport(handler))
+    return client, requests
+
+
+async def collect(client: OpenAIClient) -> list[dict]:
+    try:
+        return [event async for event in client.stream("chat/completions", {"model": "gpt-4"})]
+    finally:
+        await client.aclose()
+
+
+def test_stream_retries_transport_error_before_first_event():
+    client, requests = make_client([httpx.ConnectError("refused"), httpx.Response(200, content=SSE_BODY)])
+    events = asyncio.run(collect(client))
+    assert events == [{"choices": [{"delta": {"content": "Hi"}}]}]
+    assert len(requests) == 2
+
+
+def test_stream_retries_server_error_status():
+    client, requests = make_client([httpx.Response(503, text="busy"), httpx.Response(200, content=SSE_BODY)])
+    assert len(asyncio.run(collect(client))) == 1
+    assert len(requests) == 2
+
+
+def test_stream_gives_up_after_max_retries():
+    client, requests = make_client([httpx.ConnectError("refused") for _ in range(4)])
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(collect(client))
+    assert len(requests) == 4
+
+
+def test_post_retries_transport_error():
+    client, requests = make_client([httpx.ReadError("reset"), httpx.Response(200, json={"ok": True})])
+
+    async def scenario():
+        try:
+            return await client.post("embeddings", {})
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(scenario()).json() == {"ok": True}
+    assert len(requests) == 2
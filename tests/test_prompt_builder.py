@@ -0,0 +1,81 @@
+from app.services.prompt_builder import RecipePromptBuilder, dedupe_list_text, estimate_tokens, truncate
+
+
+PREFERENCES = {"meal_type": "Lunch", "include_ingredients": "", "banned_foods": ["milk"]}
+
+
+def make_recipe(recipe_id: int, preparation_chars: int = 400) -> dict:
+    return {
+        "id": recipe_id,
+        "name": f"Recipe {recipe_id}",
+        "sub_title": "Quick and easy",
+        "minutes": 20,
+        "meal_type": "Lunch",
+        "foods": "tomato; onion",
+        "ingredients": "2 tomatoes, 1 onion",
+        "preparation_method": "Chop and mix " * (preparation_chars // 13),
+    }
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("שלום") == 2
+
+
+def test_truncate_cuts_on_word_boundary():
+    assert truncate("one two three", 9) == "one two…"
+    assert truncate("short", 10) == "short"
+    assert truncate(None, 3) is None
+    assert truncate("anything", None) == "anything"
+
+
+def test_dedupe_list_text_keeps_order():
+    assert dedupe_list_text("tomato; onion, tomato;; garlic") == "tomato, onion, garlic"
+
+
+def test_unbounded_prompt_includes_all_recipes():
+    recipes = [make_recipe(i) for i in range(1, 6)]
+    prompt, tokens = RecipePromptBuilder().build(recipes, PREFERENCES)
+    assert all(f"[RECIPE_ID: {i}]" in prompt for i in range(1, 6))
+    # Blocks are estimated separately, rounding makes the sum an upper bound
+    assert tokens >= estimate_tokens(prompt)
+
+
+def test_budget_drops_recipes_in_ranking_order():
+    recipes = [make_recipe(i) for i in range(1, 11)]
+    budget = 800
+    prompt, tokens = RecipePromptBuilder(token_budget=budget).build(recipes, PREFERENCES)
+    included = [i for i in range(1, 11) if f"[RECIPE_ID: {i}]" in prompt]
+    assert included == list(range(1, len(included) + 1))
+    assert 1 <= len(included) < 10
+    assert tokens <= budget
+
+
+def test_budget_drops_preparation_before_recipe():
+    recipes = [make_recipe(1, preparation_chars=0), make_recipe(2, preparation_chars=4000)]
+    builder = RecipePromptBuilder()
+    full_prompt, full_tokens = builder.build(recipes, PREFERENCES)
+    first_only, first_tokens = builder.build(recipes[:1], PREFERENCES)
+
+    # Room for the second recipe only without its preparation method
+    budget = first_tokens + (full_tokens - first_tokens) // 2
+    prompt, tokens = RecipePromptBuilder(token_budget=budget).build(recipes, PREFERENCES)
+    second_block = prompt.split("Recipe 2:\n", 1)[1]
+    assert "[RECIPE_ID: 2]" in second_block
+    assert "Preparation Method" not in second_block
+    assert tokens <= budget
+
+
+def test_first_recipe_is_always_included():
+    prompt, tokens = RecipePromptBuilder(token_budget=10).build([make_recipe(1), make_recipe(2)], PREFERENCES)
+    assert "[RECIPE_ID: 1]" in prompt
+    assert "[RECIPE_ID: 2]" not in prompt
+    assert tokens > 10
+
+
+def test_disliked_comments_are_capped():
+    preferences = {**PREFERENCES, "disliked_recipes_comments": ["too salty", "too spicy", "too long to cook"]}
+    prompt, _ = RecipePromptBuilder(max_comments=2, max_comment_chars=9).build([make_recipe(1)], preferences)
+    assert "too salty" not in prompt
+    assert "too spicy, too long…" in prompt
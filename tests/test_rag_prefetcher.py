@@ -0,0 +1,59 @@
+import asyncio
+
+from app.api.dtos.recipe_user_preferences_dto import RecipeUserPreferencesDTO
+from app.services.rag_prefetcher import QUERY_EMBEDDING, RagPrefetcher
+
+
+class FakeRagService:
+    def __init__(self):
+        self.requested = []
+
+    @staticmethod
+    def build_query_text(client_response: dict) -> str:
+        return f"{client_response['meal_type']} {client_response['dietary_preference']}"
+
+    async def get_embedding(self, text: str) -> list[float]:
+        self.requested.append(text)
+        await asyncio.sleep(1)
+        return [1.0]
+
+
+def preferences(dietary_preference: str) -> RecipeUserPreferencesDTO:
+    return RecipeUserPreferencesDTO(meal_type="Lunch", dietary_preference=dietary_preference)
+
+
+def test_query_embedding_restarts_only_when_preferences_change():
+    async def scenario():
+        prefetcher, rag_service = RagPrefetcher(), FakeRagService()
+        prefetcher.prefetch_query_embedding("user", rag_service, preferences("Vegan"))
+        first = prefetcher._jobs["user"][QUERY_EMBEDDING][0]
+        prefetcher.prefetch_query_embedding("user", rag_service, preferences("Vegan"))
+        same = prefetcher._jobs["user"][QUERY_EMBEDDING][0]
+        prefetcher.prefetch_query_embedding("user", rag_service, preferences("Keto"))
+        changed = prefetcher._jobs["user"][QUERY_EMBEDDING][0]
+        await asyncio.sleep(0)
+        prefetcher.stop()
+        return first, same, changed, rag_service.requested
+
+    first, same, changed, requested = asyncio.run(scenario())
+    assert first is same
+    assert changed is not first
+    assert first.cancelled()
+    # Replaced job was cancelled before it started
+    assert requested == ["Lunch Keto"]
+
+
+def test_new_flow_cancels_previous_jobs():
+    async def scenario():
+        prefetcher, rag_service = RagPrefetcher(), FakeRagService()
+        prefetcher.prefetch_query_embedding("user", rag_service, preferences("Vegan"))
+        stale = prefetcher._jobs["user"][QUERY_EMBEDDING][0]
+        prefetcher.prefetch_rag_inputs("user", uow=None, user_id=1, ascii_result_link=None, restrictions_loaded=True)
+        jobs = set(prefetcher._jobs["user"])
+        await asyncio.sleep(0)
+        prefetcher.stop()
+        return stale, jobs
+
+    stale, jobs = asyncio.run(scenario())
+    assert stale.cancelled()
+    assert QUERY_EMBEDDING not in jobs
@@ -0,0 +1,90 @@
+import asyncio
+
+from app.services.recipe_catalog import RecipeCatalog
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabaseClient"):
+        self._client = client
+        self._rows = list(client.rows)
+
+    def select(self, columns: str) -> "FakeQuery":
+        return self
+
+    def in_(self, column: str, values: list) -> "FakeQuery":
+        self._client.in_queries.append(list(values))
+        self._rows = [row for row in self._rows if row[column] in values]
+        return self
+
+    def gt(self, column: str, value) -> "FakeQuery":
+        self._rows = [row for row in self._rows if row[column] > value]
+        return self
+
+    def order(self, column: str) -> "FakeQuery":
+        self._rows.sort(key=lambda row: row[column])
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self._rows = self._rows[start:end + 1]
+        return self
+
+    async def execute(self):
+        return type("Response", (), {"data": self._rows})()
+
+
+class FakeSupabaseClient:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.in_queries = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self)
+
+
+def recipe(recipe_id: int) -> dict:
+    return {"id": recipe_id, "name": f"Recipe {recipe_id}", "meal_type": "Lunch", "foods": "Tomato"}
+
+
+def test_miss_does_not_skip_recipes_in_incremental_refresh():
+    async def scenario():
+        client = FakeSupabaseClient([recipe(1), recipe(2)])
+        catalog = RecipeCatalog(client)
+        await catalog.load()
+        version = catalog.version
+
+        client.rows += [recipe(3), recipe(4)]
+        assert [record["id"] for record in await catalog.get_recipes([4])] == [4]
+        assert catalog.version == version
+
+        await catalog.refresh()
+        return catalog
+
+    catalog = asyncio.run(scenario())
+    assert sorted(catalog.ids()) == [1, 2, 3, 4]
+    assert catalog.foods_lower([3]) == {3: "tomato"}
+
+
+def test_ids_missing_in_db_are_not_fetched_again():
+    async def scenario():
+        client = FakeSupabaseClient([recipe(1)])
+        catalog = RecipeCatalog(client)
+        await catalog.load()
+        first = await catalog.get_recipes([1, 99])
+        second = await catalog.get_recipes([99, 1])
+        return client, first, second
+
+    client, first, second = asyncio.run(scenario())
+    assert [record["id"] for record in first] == [1]
+    assert [record["id"] for record in second] == [1]
+    assert client.in_queries == [[99]]
+
+
+def test_full_reload_disabled_with_zero():
+    async def scenario():
+        catalog = RecipeCatalog(FakeSupabaseClient([recipe(1)]), full_reload_every=0)
+        await catalog.load()
+        for _ in range(3):
+            await catalog.refresh()
+        return catalog
+
+    assert asyncio.run(scenario()).version == 1
@@ -0,0 +1,124 @@
+import asyncio
+
+import numpy as np
+
+from app.services.recipe_food_matrix import RecipeFoodMatrix
+
+
+# recipe -> foods, 70 recipes so bitsets span two words
+RECIPE_FOODS = {recipe_id: {recipe_id % 3, 10 + recipe_id % 5} for recipe_id in range(100, 170)}
+
+
+class FakeQuery:
+    def __init__(self, rows: list[dict]):
+        self._rows = rows
+        self._count = None
+
+    def select(self, columns: str, count: str | None = None) -> "FakeQuery":
+        self._count = len(self._rows) if count else None
+        return self
+
+    def order(self, column: str) -> "FakeQuery":
+        return self
+
+    def limit(self, size: int) -> "FakeQuery":
+        self._rows = self._rows[:size]
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self._rows = self._rows[start:end + 1]
+        return self
+
+    async def execute(self):
+        return type("Response", (), {"data": [dict(row) for row in self._rows], "count": self._count})()
+
+
+class FakeSupabaseClient:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.rows)
+
+
+def build_matrix() -> RecipeFoodMatrix:
+    pairs = [(recipe_id, food_id) for recipe_id, foods in RECIPE_FOODS.items() for food_id in foods]
+    matrix = RecipeFoodMatrix(supabase_client=None)
+    matrix.build([recipe_id for recipe_id, _ in pairs], [food_id for _, food_id in pairs])
+    return matrix
+
+
+def expected(predicate) -> list[int]:
+    return sorted(recipe_id for recipe_id, foods in RECIPE_FOODS.items() if predicate(foods))
+
+
+def test_build():
+    matrix = build_matrix()
+    assert matrix.is_loaded
+    assert len(matrix) == len(RECIPE_FOODS)
+    assert matrix.recipe_ids.tolist() == sorted(RECIPE_FOODS)
+    assert 100 in matrix
+    assert 99 not in matrix
+    assert 170 not in matrix
+
+
+def test_contains_any():
+    matrix = build_matrix()
+    assert matrix.select(matrix.contains_any([0, 11])) == expected(lambda foods: foods & {0, 11})
+    assert not matrix.contains_any([999]).any()
+    assert not matrix.contains_any([]).any()
+
+
+def test_contains_all():
+    matrix = build_matrix()
+    assert matrix.select(matrix.contains_all([1, 12])) == expected(lambda foods: {1, 12} <= foods)
+    assert not matrix.contains_all([1, 999]).any()
+    assert matrix.contains_all([]).all()
+
+
+def test_exclude_any():
+    matrix = build_matrix()
+    assert matrix.select(matrix.exclude_any([2, 14])) == expected(lambda foods: not foods & {2, 14})
+
+
+def test_known_and_recipes_with_any():
+    matrix = build_matrix()
+    candidates = [50, 100, 101, 102, 169, 500]
+    assert matrix.known(candidates) == {100, 101, 102, 169}
+    assert matrix.recipes_with_any(candidates, [0]) == {102}
+    assert matrix.recipes_with_any(candidates, [999]) == set()
+
+
+def test_empty_matrix():
+    matrix = RecipeFoodMatrix(supabase_client=None)
+    assert not matrix.is_loaded
+    assert 1 not in matrix
+    assert matrix.contains_any([1]).shape == (0,)
+    assert matrix.known([1, 2]) == set()
+    assert matrix.recipes_with_any([1, 2], [1]) == set()
+
+
+def test_rebuild_replaces_previous_data():
+    matrix = build_matrix()
+    matrix.build([1, 2], [5, 6])
+    assert matrix.recipe_ids.tolist() == [1, 2]
+    assert np.array_equal(matrix.contains_any([6]), np.array([False, True]))
+
+
+def test_refresh_rebuilds_on_row_count_change_and_full_reload():
+    async def scenario():
+        client = FakeSupabaseClient([{"recipe_id": 1, "food_id": 5}])
+        matrix = RecipeFoodMatrix(client, full_reload_every=3)
+        await matrix.load()
+        unchanged = await matrix.refresh()
+
+        client.rows.append({"recipe_id": 2, "food_id": 6})
+        added = await matrix.refresh()
+        after_add = matrix.select(matrix.contains_any([6]))
+
+        # Edit keeps row count, picked up by the full reload
+        client.rows[0]["food_id"] = 6
+        full_reload = await matrix.refresh()
+        return unchanged, added, after_add, full_reload, matrix.select(matrix.contains_any([6]))
+
+    assert asyncio.run(scenario()) == (False, True, [2], True, [1, 2])
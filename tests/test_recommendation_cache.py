@@ -0,0 +1,50 @@
+from app.utils.cache.recommendation_cache import RecommendationCache
+
+
+PREFERENCES = {
+    "meal_type": "Lunch",
+    "dietary_preference": "Vegan",
+    "include_ingredients": "tomato",
+    "additional_notes": "",
+    "banned_foods": ["milk", "egg"],
+    "disliked_recipes_comments": [],
+}
+
+
+def test_key_is_stable():
+    assert RecommendationCache.make_key([1, 2], PREFERENCES, "gpt-4") == RecommendationCache.make_key(
+        [1, 2], dict(PREFERENCES), "gpt-4"
+    )
+
+
+def test_key_depends_on_model():
+    assert RecommendationCache.make_key([1, 2], PREFERENCES, "gpt-4") != RecommendationCache.make_key(
+        [1, 2], PREFERENCES, "gpt-4o-mini"
+    )
+
+
+def test_key_depends_on_candidate_order():
+    assert RecommendationCache.make_key([1, 2], PREFERENCES, "gpt-4") != RecommendationCache.make_key(
+        [2, 1], PREFERENCES, "gpt-4"
+    )
+
+
+def test_key_ignores_banned_foods_order():
+    reordered = {**PREFERENCES, "banned_foods": ["egg", "milk"]}
+    assert RecommendationCache.make_key([1], PREFERENCES, "gpt-4") == RecommendationCache.make_key([1], reordered, "gpt-4")
+
+
+def test_key_ignores_fields_outside_prompt():
+    extended = {**PREFERENCES, "disliked_recipes_id": [7, 8]}
+    assert RecommendationCache.make_key([1], PREFERENCES, "gpt-4") == RecommendationCache.make_key([1], extended, "gpt-4")
+
+
+def test_key_depends_on_prompt_fields():
+    changed = {**PREFERENCES, "include_ingredients": "potato"}
+    assert RecommendationCache.make_key([1], PREFERENCES, "gpt-4") != RecommendationCache.make_key([1], changed, "gpt-4")
+
+
+def test_string_and_int_ids_give_same_key():
+    assert RecommendationCache.make_key(["1", "2"], PREFERENCES, "gpt-4") == RecommendationCache.make_key(
+        [1, 2], PREFERENCES, "gpt-4"
+    )
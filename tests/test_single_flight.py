@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_call():
+    async def scenario():
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(single_flight.do("key", fetch) for _ in range(5)))
+        return calls, results, single_flight.stats()
+
+    calls, results, stats = asyncio.run(scenario())
+    assert calls == 1
+    assert [result for result, _ in results] == ["result"] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert stats == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        single_flight = SingleFlight()
+        return await asyncio.gather(
+            single_flight.do("a", lambda: asyncio.sleep(0, result="a")),
+            single_flight.do("b", lambda: asyncio.sleep(0, result="b")),
+        )
+
+    assert asyncio.run(scenario()) == [("a", False), ("b", False)]
+
+
+def test_nothing_is_kept_after_completion():
+    async def scenario():
+        single_flight = SingleFlight()
+        first = await single_flight.do("key", lambda: asyncio.sleep(0, result=1))
+        second = await single_flight.do("key", lambda: asyncio.sleep(0, result=2))
+        return first, second
+
+    assert asyncio.run(scenario()) == ((1, False), (2, False))
+
+
+def test_exception_is_shared_and_forgotten():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(single_flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        retry = await single_flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retry
+
+    results, retry = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retry == ("ok", False)
+
+
+def test_call_survives_cancelled_caller():
+    async def scenario():
+        single_flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            finished.set()
+            return "result"
+
+        first = asyncio.create_task(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await waiter, finished.is_set()
+
+    assert asyncio.run(scenario()) == (("result", True), True)